@@ -0,0 +1,12 @@
+from zrp.benchmark.fixtures import make_fixtures
+import pytest
+
+
+@pytest.fixture(scope="session")
+def fixture_pipelines(tmp_path_factory):
+    """
+    Support files & pipelines written by `make_fixtures`, shared by the tests that run ZRP end to end
+    """
+    support_path = str(tmp_path_factory.mktemp("support"))
+    pipe_path = make_fixtures(support_path, n_train=500)
+    return (support_path, pipe_path)
@@ -0,0 +1,63 @@
+from zrp.prepare.address import AddressParser
+from zrp.prepare.preprocessing import replicate_street_keys
+from zrp.prepare.utils import load_mappings
+from os.path import dirname, join
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope="module")
+def parser():
+    _, street_suffix_mapping, directionals_mapping, unit_mapping = load_mappings(join(dirname(dirname(__file__)), "zrp", "data", "processed"))
+    return (AddressParser(street_suffix_mapping, directionals_mapping, unit_mapping))
+
+
+@pytest.mark.parametrize("street_address, street_key, unit", [
+    ("NORTH MAIN STREET APT 4", "N MAIN ST", "APT 4"),
+    ("ELM STREET #4", "ELM ST", "# 4"),
+    ("ELM STREET # 4", "ELM ST", "# 4"),
+    ("ELM ST #4B", "ELM ST", "# 4B"),
+    ("ELM ST 4", "ELM ST", "# 4"),
+    ("ELM ST 2B", "ELM ST", "# 2B"),
+    ("ELM ST N APT 4", "ELM ST N", "APT 4"),
+    ("ELM ST N 4", "ELM ST N", "# 4"),
+    ("MAIN ST UNIT 2B", "MAIN ST", "UNIT 2B"),
+    # Post-directionals after a suffix or a street name without suffix
+    ("ELM ST NORTH", "ELM ST N", None),
+    ("BROADWAY N", "BROADWAY N", None),
+    # Street names that are directionals, suffixes, or numbers
+    ("AVENUE N", "AVENUE N", None),
+    ("NORTH ST", "NORTH ST", None),
+    ("N ST", "N ST", None),
+    ("11TH ST", "11TH ST", None),
+    ("HIGHWAY 50", "HIGHWAY 50", None),
+    (None, None, None),
+])
+def test_parse_units_and_directionals(parser, street_address, street_key, unit):
+    components = dict(zip(["pre_directional", "street_name", "street_suffix", "post_directional", "unit", "street_key"],
+                          parser.parse(street_address)))
+    assert components["street_key"] == street_key
+    assert components["unit"] == unit
+
+
+def test_lookup_street_names_keep_numbers(parser):
+    names = pd.Series(["COUNTY RD 12", "ELM STREET", "STATE HWY 9 N"], index=[3, 4, 5])
+    assert parser.street_keys(names).tolist() == ["COUNTY RD", "ELM ST", "STATE HWY 9 N"]
+    assert parser.street_keys(names, units=False).tolist() == ["COUNTY RD 12", "ELM ST", "STATE HWY 9 N"]
+
+
+def test_street_keys_without_directionals(parser):
+    addresses = pd.Series(["N ELM ST APT 4", "ELM ST W", "AVENUE N", None], index=[7, 8, 9, 10])
+    keys = parser.street_keys(addresses, directionals=False)
+    assert keys.tolist() == ["ELM ST", "ELM ST", "AVENUE N", None]
+    assert keys.index.tolist() == [7, 8, 9, 10]
+
+
+def test_replicate_street_keys_fallbacks(parser):
+    addresses = pd.Series(["COUNTY RD 12", "ELM ST N 4", "OAK AVE"], index=["a", "b", "c"])
+    data = pd.DataFrame({"street_address": parser.street_keys(addresses), "replicate_flg": "000000"})
+    replicated = replicate_street_keys(data, "street_address", addresses, parser, 10)
+    rows = sorted(zip(replicated.index, replicated["street_address"], replicated["replicate_flg"]))
+    assert rows == [("a", "COUNTY RD", "000000"), ("a", "COUNTY RD 12", "000010"),
+                    ("b", "ELM ST", "000100"), ("b", "ELM ST N", "000000"), ("b", "ELM ST N 4", "000010"),
+                    ("c", "OAK AVE", "000000")]
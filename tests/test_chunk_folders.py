@@ -0,0 +1,51 @@
+from zrp.benchmark.synthetic import generate_synthetic
+from zrp.benchmark.fixtures import fixture_states
+from zrp.prepare.utils import collect_chunk_artifacts
+from zrp.zrp import ZRP
+from zrp.cli import chunks_path
+import pandas as pd
+import os
+
+
+def test_collect_chunk_folders(tmp_path):
+    zrp = ZRP(out_path=str(tmp_path), runname="run")
+    for chunk in range(3):
+        os.makedirs(zrp.chunk_out_path(chunk))
+        (tmp_path / "chunks_run" / f"chunk_{chunk:05d}" / "input_validator.json").write_text(str(chunk))
+        (tmp_path / "chunks_run" / f"chunk_{chunk:05d}" / "Zest_Geocoded_run__2019__13_1.parquet").write_text(str(chunk))
+    (tmp_path / "chunks_run" / "chunk_00002" / "Zest_Geocoded_run__2019__36_1.parquet").write_text("2")
+    (tmp_path / "run_manifest.json").write_text("{}")
+    zrp.collect_chunk_folders()
+    assert sorted(os.listdir(tmp_path)) == ["Zest_Geocoded_run__2019__13_1.parquet", "Zest_Geocoded_run__2019__13_2.parquet",
+                                            "Zest_Geocoded_run__2019__13_3.parquet", "Zest_Geocoded_run__2019__36_1.parquet",
+                                            "input_validator.json", "run_manifest.json"]
+    # Tables are numbered in chunk order and the last chunk's validator is kept
+    assert [(tmp_path / f"Zest_Geocoded_run__2019__13_{i}.parquet").read_text() for i in [1, 2, 3]] == ["0", "1", "2"]
+    assert (tmp_path / "input_validator.json").read_text() == "2"
+    # Nothing to collect when no chunk was processed in a worker process
+    zrp.collect_chunk_folders()
+    collect_chunk_artifacts(str(tmp_path / "chunks"), str(tmp_path))
+
+
+def test_parallel_run_keeps_serial_artifacts(fixture_pipelines, tmp_path):
+    support_path, pipe_path = fixture_pipelines
+    data = generate_synthetic(300, state_mix={state: 1.0 for state in fixture_states}, seed=4)
+    listings = {}
+    for workers in [None, 2]:
+        out_path = str(tmp_path / f"workers_{workers}")
+        zrp = ZRP(pipe_path=pipe_path, data_path=support_path, out_path=out_path, runname="run")
+        zrp.fit()
+        zrp.transform(data, chunk_size=100, workers=workers)
+        listings[workers] = sorted(os.listdir(out_path))
+    assert listings[2] == listings[None]
+    geocoded = [file for file in listings[None] if file.startswith("Zest_Geocoded_run__")]
+    assert len(geocoded) >= 3
+    for file in geocoded:
+        serial, parallel = [pd.read_parquet(tmp_path / f"workers_{workers}" / file) for workers in [None, 2]]
+        pd.testing.assert_frame_equal(serial, parallel)
+    assert "input_geo_validator.json" in listings[None]
+
+
+def test_cli_chunks_path():
+    assert chunks_path({"out_path": "out", "runname": "run"}) == os.path.join("out", "chunks_run")
+    assert chunks_path({"out_path": None, "runname": None}) == os.path.join("artifacts", "chunks")
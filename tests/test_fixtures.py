@@ -0,0 +1,66 @@
+from zrp.benchmark.fixtures import make_fixtures
+from zrp.session import ZRP_Session
+from os.path import dirname, join
+import pytest
+import os
+
+
+package_data_path = join(dirname(dirname(__file__)), "zrp", "data")
+
+
+def list_files(path):
+    return sorted(os.path.relpath(join(root, name), path) for root, _, files in os.walk(path) for name in files)
+
+
+def test_fixtures_are_written_to_support_path(tmp_path):
+    package_files = list_files(package_data_path)
+    support_path = str(tmp_path / "support")
+    assert make_fixtures(support_path, states=["GA"], n_train=0) is None
+
+    assert list_files(package_data_path) == package_files
+    files = list_files(support_path)
+    assert "lookup_tables_config.json" in files
+    assert "inv_state_mapping.json" in files
+    assert join("geo", "2019", "Zest_Geo_Lookup_2019_State_13.parquet") in files
+    assert len([f for f in files if f.startswith(join("acs", "2019", "5yr"))]) == 3
+
+    session = ZRP_Session(data_path=support_path).load(models=False)
+    assert session.data_path == support_path
+    assert [len(acs_table) > 0 for acs_table in session.acs_tables] == [True, True, True]
+    assert len(session.geo_table("13")) > 0
+
+
+def test_fixtures_do_not_replace_other_support_files(tmp_path):
+    geo_path = tmp_path / "geo" / "2019"
+    geo_path.mkdir(parents=True)
+    (geo_path / "Zest_Geo_Lookup_2019_State_13.parquet").write_bytes(b"release")
+    with pytest.raises(FileExistsError):
+        make_fixtures(str(tmp_path), states=["GA"], n_train=0)
+    assert (geo_path / "Zest_Geo_Lookup_2019_State_13.parquet").read_bytes() == b"release"
+
+    # Fixtures replace fixtures written earlier
+    other_path = str(tmp_path / "fixtures")
+    make_fixtures(other_path, states=["GA"], n_train=0)
+    make_fixtures(other_path, states=["AL"], n_train=0)
+    assert list_files(join(other_path, "geo", "2019")) == ["Zest_Geo_Lookup_2019_State_01.parquet"]
+
+
+def test_fixture_pipelines_score_records(tmp_path):
+    from zrp.benchmark.synthetic import generate_synthetic
+    from zrp.benchmark.fixtures import fixture_states
+    from zrp.zrp import ZRP
+
+    support_path = str(tmp_path / "support")
+    pipe_path = make_fixtures(support_path, n_train=500)
+    for model_type in ["block_group", "census_tract", "zip_code"]:
+        assert os.path.exists(join(pipe_path, model_type, "pipe.pkl"))
+        assert os.path.exists(join(pipe_path, model_type, "model.txt"))
+
+    data = generate_synthetic(200, state_mix={state: 1.0 for state in fixture_states}, seed=1)
+    zrp = ZRP(pipe_path=pipe_path, data_path=support_path, out_path=str(tmp_path / "artifacts"))
+    zrp.fit()
+    proxies = zrp.transform(data)
+    assert len(proxies) == len(data)
+    assert set(proxies["ZEST_KEY"]) == set(data["ZEST_KEY"])
+    assert proxies["race_proxy"].notna().mean() > 0.5
+    assert set(proxies["race_proxy"].dropna()) <= {"AAPI", "AIAN", "BLACK", "HISPANIC", "WHITE"}
@@ -0,0 +1,96 @@
+from zrp.prepare.geo_geocoder import join_geoid, fill_geoid
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def reference_join(parts, length):
+    """
+    GEOID joined row by row: missing codes are skipped, and GEOIDs that are not `length` digits are None
+    """
+    joined = "".join(str(part) for part in parts if not pd.isna(part))
+    return joined if (len(joined) == length) and joined.isdigit() and joined.isascii() else None
+
+
+def codes(rows):
+    return pd.DataFrame(rows, columns=["STATEFP", "COUNTYFP", "TRACTCE", "BLKGRPCE"], index=[10 + i for i in range(len(rows))])
+
+
+@pytest.mark.parametrize("row, tract, block_group", [
+    (["13", "121", "000100", "1"], "13121000100", "131210001001"),
+    # Missing codes are skipped, leaving GEOIDs of the wrong width
+    ([None, "121", "000100", "1"], None, None),
+    (["13", np.nan, "000100", "1"], None, None),
+    (["13", "121", "000100", None], "13121000100", None),
+    # Wrong widths
+    (["1", "121", "000100", "1"], None, None),
+    (["13", "121", "0001000", ""], None, None),
+    (["13", "1210", "00100", "1"], "13121000100", "131210001001"),
+    (["13", "121", "000100", "12"], "13121000100", None),
+    # Non digits of the right width
+    (["13", "121", "00010a", "1"], None, None),
+    (["13", "Non", "e00100", "1"], None, None),
+    (["13", "121", "0001 0", "1"], None, None),
+    (["13", "121", "000١00", "1"], None, None),
+    # Everything missing
+    ([None, np.nan, None, None], None, None),
+    (["", "", "", ""], None, None),
+])
+def test_join_geoid_edge_cases(row, tract, block_group):
+    data = codes([row])
+    data["GEOID_CT"] = join_geoid(data, ["STATEFP", "COUNTYFP", "TRACTCE"], 11)
+    data["GEOID_BG"] = join_geoid(data, ["GEOID_CT", "BLKGRPCE"], 12)
+    assert data["GEOID_CT"].iloc[0] == tract
+    assert data["GEOID_BG"].iloc[0] == block_group
+    assert data["GEOID_CT"].dtype == object
+    assert data.index.tolist() == [10]
+
+
+def test_join_geoid_matches_row_by_row_join():
+    rng = np.random.default_rng(0)
+    n = 20000
+
+    def column(choices):
+        values = np.array(rng.choice(choices, n), dtype=object)
+        values[rng.random(n) < 0.05] = None
+        values[rng.random(n) < 0.03] = np.nan
+        return values
+
+    data = pd.DataFrame({"STATEFP": column(["13", "01", "1"]), "COUNTYFP": column(["121", "001", "None", "12"]),
+                         "TRACTCE": column(["000100", "010203", "", "12345a"]), "BLKGRPCE": column(["1", "2", "12", ""])})
+    tracts = join_geoid(data, ["STATEFP", "COUNTYFP", "TRACTCE"], 11)
+    expected = [reference_join(row, 11) for row in data[["STATEFP", "COUNTYFP", "TRACTCE"]].itertuples(index=False)]
+    assert tracts.tolist() == expected
+    data["GEOID_CT"] = tracts
+    expected = [reference_join(row, 12) for row in data[["GEOID_CT", "BLKGRPCE"]].itertuples(index=False)]
+    assert join_geoid(data, ["GEOID_CT", "BLKGRPCE"], 12).tolist() == expected
+
+
+def test_join_geoid_empty():
+    data = codes([])
+    assert len(join_geoid(data, ["STATEFP", "COUNTYFP", "TRACTCE"], 11)) == 0
+
+
+def test_fill_geoid_prefers_user_geoids():
+    geoid = pd.Series(["g0", "g1", "g2", "g3", "g4", "g5", "g6"], index=[5, 6, 7, 8, 9, 10, 11])
+    user_geoid = pd.Series(["13121000100", None, np.nan, "", "None", "1312None", "nan"], index=geoid.index)
+    assert fill_geoid(geoid, user_geoid).tolist() == ["13121000100", "g1", "g2", "g3", "g4", "g5", "nan"]
+
+
+def test_fill_geoid_keeps_missing_geocoded_geoids():
+    geoid = pd.Series([None, np.nan, "g2"], dtype=object)
+    user_geoid = pd.Series([None, "", "060373116003"], dtype=object)
+    filled = fill_geoid(geoid, user_geoid)
+    assert filled[0] is None
+    assert pd.isna(filled[1])
+    assert filled[2] == "060373116003"
+
+
+def test_fill_geoid_matches_previous_expression():
+    rng = np.random.default_rng(1)
+    n = 10000
+    user_geoid = pd.Series(rng.choice(np.array(["13121000100", "None", "", "nan", None], dtype=object), n), dtype=object)
+    user_geoid[rng.random(n) < 0.05] = np.nan
+    geoid = pd.Series(np.arange(n).astype(str), dtype=object)
+    expected = np.where(user_geoid.isna() | (user_geoid.str.contains("None") | (user_geoid == '')), geoid, user_geoid)
+    assert (fill_geoid(geoid, user_geoid) == expected).all()
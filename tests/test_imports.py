@@ -0,0 +1,7 @@
+from zrp.benchmark.suite import benchmark_imports, check_imports, import_targets
+
+
+def test_modules_import_without_heavy_dependencies():
+    results = benchmark_imports(modules=[module for module, allowed in import_targets.items() if allowed is not None], repeat=1)
+    assert check_imports(results)
+    assert results["import zrp.cli"]["heavy_modules"] == []
@@ -0,0 +1,79 @@
+from zrp.benchmark.geocoding import reference_majority_vote, random_candidates
+from zrp.prepare.geo_geocoder import majority_vote, majority_vote_deduplication, majority_vote_cols
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def candidates(rows):
+    return pd.DataFrame(rows, columns=["ZEST_KEY_LONG", "TRACTCE", "BLKGRPCE", "NEW_SUPER_ZIP", "COUNTYFP", "other"])
+
+
+@pytest.mark.parametrize("n, n_keys, seed", [(5000, 50, 0), (5000, 2000, 1), (20000, 5000, 2)])
+def test_matches_mode_on_random_candidates(n, n_keys, seed):
+    data = random_candidates(n, n_keys, seed)
+    pd.testing.assert_frame_equal(majority_vote_deduplication(data, "ZEST_KEY_LONG"),
+                                  reference_majority_vote(data, "ZEST_KEY_LONG"))
+
+
+def test_ties_go_to_smallest_value():
+    data = candidates([["k1", "000200", "2", "30301", "001", "a"],
+                       ["k1", "000100", "1", "30302", "002", "b"],
+                       ["k1", "000200", "1", "30302", "001", "c"],
+                       ["k1", "000100", "2", "30301", "002", "d"]])
+    out = majority_vote_deduplication(data, "ZEST_KEY_LONG")
+    pd.testing.assert_frame_equal(out, reference_majority_vote(data, "ZEST_KEY_LONG"))
+    assert out[majority_vote_cols].values.tolist() == [["000100", "1", "30301", "001"]]
+    # The other columns are kept from the first row of the key
+    assert out["other"].tolist() == ["a"]
+
+
+def test_missing_values_are_not_counted():
+    data = candidates([["k1", np.nan, "1", None, "001", "a"],
+                       ["k1", np.nan, np.nan, None, "001", "b"],
+                       ["k1", "000300", "2", "30301", np.nan, "c"],
+                       ["k2", "000400", "3", "30302", "005", "d"]])
+    out = majority_vote_deduplication(data, "ZEST_KEY_LONG")
+    pd.testing.assert_frame_equal(out, reference_majority_vote(data, "ZEST_KEY_LONG"))
+    assert out[majority_vote_cols].values.tolist() == [["000300", "1", "30301", "001"], ["000400", "3", "30302", "005"]]
+
+
+def test_all_missing_votes_nan():
+    # `mode()[0]` raises on a key with no values in a column, majority_vote leaves the value missing
+    data = candidates([["k1", np.nan, "1", "30301", "001", "a"],
+                       ["k1", np.nan, "1", "30301", "001", "b"],
+                       ["k2", "000400", "3", "30302", "005", "c"]])
+    out = majority_vote_deduplication(data, "ZEST_KEY_LONG")
+    assert pd.isna(out["TRACTCE"].iloc[0])
+    assert out["TRACTCE"].iloc[1] == "000400"
+    assert out[["BLKGRPCE", "NEW_SUPER_ZIP", "COUNTYFP"]].values.tolist() == [["1", "30301", "001"], ["3", "30302", "005"]]
+
+
+def test_keys_in_order_of_first_appearance():
+    data = candidates([["k2", "000100", "1", "30301", "001", "a"],
+                       ["k1", "000200", "2", "30302", "002", "b"],
+                       ["k2", "000300", "3", "30303", "003", "c"],
+                       ["k2", "000300", "3", "30303", "003", "d"]])
+    modes = majority_vote(data, "ZEST_KEY_LONG", ["TRACTCE", "COUNTYFP"])
+    assert list(modes.index) == ["k2", "k1"]
+    assert list(modes.columns) == ["TRACTCE", "COUNTYFP"]
+    assert modes.values.tolist() == [["000300", "003"], ["000200", "002"]]
+    out = majority_vote_deduplication(data, "ZEST_KEY_LONG")
+    assert out.index.tolist() == [0, 1]
+    assert out["other"].tolist() == ["a", "b"]
+
+
+def test_numeric_columns_vote():
+    data = pd.DataFrame({"key": [1, 1, 1, 2], "x": [3.0, 1.0, 3.0, np.nan], "y": [2, 1, 1, 7]})
+    modes = majority_vote(data, "key", ["x", "y"])
+    assert modes.loc[1, "x"] == 3.0
+    assert modes.loc[1, "y"] == 1
+    assert np.isnan(modes.loc[2, "x"])
+    assert modes.loc[2, "y"] == 7
+
+
+def test_empty_candidates():
+    data = candidates([])
+    out = majority_vote_deduplication(data, "ZEST_KEY_LONG")
+    assert len(out) == 0
+    assert list(out.columns) == list(data.columns)
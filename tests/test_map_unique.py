@@ -0,0 +1,82 @@
+from zrp.benchmark.strings import random_corpus
+from zrp.prepare.preprocessing import map_unique, keep_digits, clean_names, add_to_replicate_flg, map_street_suffixes
+from zrp.prepare.utils import load_mappings
+from zrp.profiling import profiler
+from os.path import dirname, join
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def repeated_corpus(n, n_distinct, seed=0):
+    """
+    Returns a column of n values drawn from n_distinct random strings & missing values, on a shuffled index
+    """
+    rng = np.random.default_rng(seed)
+    distinct = random_corpus(n_distinct, seed)
+    values = distinct.take(rng.integers(0, n_distinct, n)).reset_index(drop=True)
+    values.index = rng.permutation(n) + 1000
+    values.name = "values"
+    return values
+
+
+@pytest.mark.parametrize("func", [keep_digits, clean_names, lambda x: x.str.upper(), lambda x: x.isna().astype(str)])
+def test_map_unique_matches_func_on_column(func):
+    values = repeated_corpus(20000, 500)
+    expected = func(values)
+    out = map_unique(values, func, "values")
+    assert out.index.equals(values.index)
+    assert out.name == values.name
+    pd.testing.assert_series_equal(out.fillna("<NA>").astype(object), expected.fillna("<NA>").astype(object), check_dtype=False)
+
+
+def test_map_unique_keeps_none_and_nan_apart():
+    values = pd.Series([None, "a", np.nan, "a", None], dtype=object)
+    assert list(map_unique(values, lambda x: x.map(repr), "values")) == ["None", "'a'", "nan", "'a'", "None"]
+
+
+def test_map_unique_transforms_each_distinct_value_once():
+    values = pd.Series(["B", "A", "B", "B", "A", None], dtype=object)
+    calls = []
+
+    def func(x):
+        calls.append(list(x))
+        return x.str.lower()
+
+    profiler.reset()
+    out = map_unique(values, func, "letters")
+    assert list(out) == ["b", "a", "b", "b", "a", None]
+    assert calls == [["B", "A", None]]
+    stage = profiler.stages[-1]
+    assert stage["stage"] == "unique_letters"
+    assert stage["unique_values"] == 3
+    assert stage["hit_rate"] == 0.5
+    assert stage["rows_out"] == 6
+
+
+def test_map_unique_empty_column():
+    out = map_unique(pd.Series([], dtype=object), keep_digits, "empty")
+    assert len(out) == 0
+
+
+def test_add_to_replicate_flg():
+    flags = pd.Series(["000000", "000001", "000000"], index=[5, 3, 1])
+    out = add_to_replicate_flg(flags, 10)
+    assert list(out) == ["000010", "000011", "000010"]
+    assert out.index.equals(flags.index)
+
+
+def test_map_street_suffixes_matches_direct_call():
+    _, street_suffix_mapping, _, _ = load_mappings(join(dirname(dirname(__file__)), "zrp", "data", "processed"))
+    streets = pd.Series(["100 MAIN STREET", "MAIN STREET", "OAK AVENUE-APT 4", "12AB ELM ROAD", None, "MAIN STREET"] * 50,
+                        dtype=object)
+    expected = map_street_suffixes(streets, street_suffix_mapping)
+    out = map_unique(streets, lambda x: map_street_suffixes(x, street_suffix_mapping), "street_suffixes")
+    assert list(out.fillna("<NA>")) == list(expected.fillna("<NA>"))
+
+
+def test_map_unique_keeps_arrow_results():
+    values = pd.Series(["12A", "B3", "12A", None], dtype=object)
+    out = map_unique(values, lambda x: keep_digits(x, "arrow"), "values")
+    assert out.dtype == keep_digits(values, "arrow").dtype
+    assert list(out) == ["12", "3", "12", ""]
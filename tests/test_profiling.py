@@ -0,0 +1,37 @@
+from zrp.benchmark.synthetic import generate_synthetic
+from zrp.benchmark.fixtures import fixture_states
+from zrp.profiling import StageProfiler
+from zrp.zrp import ZRP
+import json
+import os
+
+
+def test_merge_adds_fields():
+    profiler = StageProfiler()
+    with profiler.stage("dedupe", 10) as stage:
+        profiler.set_output(stage, [1, 2])
+    worker_stages = [{"stage": "ProcessStrings", "rows_in": 5, "rows_out": 5, "wall_time": 1.0, "peak_rss_mb": 10.0}]
+    profiler.merge(worker_stages, chunk=3)
+    assert [record["stage"] for record in profiler.stages] == ["dedupe", "ProcessStrings"]
+    assert profiler.stages[1]["chunk"] == 3
+    assert "chunk" not in worker_stages[0]
+    assert profiler.summary()["ProcessStrings"]["rows_in"] == 5
+
+
+def test_parallel_profile_has_worker_stages(fixture_pipelines, tmp_path):
+    support_path, pipe_path = fixture_pipelines
+    data = generate_synthetic(300, state_mix={state: 1.0 for state in fixture_states}, seed=2)
+    profiles = {}
+    for workers in [None, 2]:
+        out_path = str(tmp_path / f"workers_{workers}")
+        zrp = ZRP(pipe_path=pipe_path, data_path=support_path, out_path=out_path)
+        zrp.fit()
+        zrp.transform(data, chunk_size=100, workers=workers)
+        with open(os.path.join(out_path, "zrp_profile.json")) as f:
+            profiles[workers] = json.load(f)
+
+    parallel_profile = profiles[2]
+    assert len(parallel_profile["stages"]) > 0
+    assert set(parallel_profile["summary"]) == set(profiles[None]["summary"])
+    assert sorted(set(record["chunk"] for record in parallel_profile["stages"])) == [0, 1, 2]
+    assert parallel_profile["summary"]["ProcessStrings"]["rows_in"] == len(data)
@@ -0,0 +1,86 @@
+from zrp.benchmark.strings import random_corpus
+from zrp.prepare.preprocessing import na_patterns
+from zrp.prepare.replacer import MultiPatternReplacer, replace_patterns
+from zrp.prepare.utils import load_mappings
+from os.path import dirname, join
+import pandas as pd
+import numpy as np
+import pytest
+
+
+street_suffix_mapping = load_mappings(join(dirname(dirname(__file__)), "zrp", "data", "processed"))[1]
+
+mappings = {
+    "word_bounded": {"\\bNORTH\\b": "N", "\\bSOUTH\\b": "S", "\\bSTREET\\b": "ST"},
+    # A value matching the first pattern is not replaced again by the second, matches are found before any replacement
+    "chained": {"\\bAVENUE\\b": "AVE", "\\bAVE\\b": "AV", "A": "B"},
+    "overlapping": {"\\bST\\b": "STREET", "STREET": "ST", "^[0-9]+ ": ""},
+    "none": {"^N/?A$": None, "\\bNONE\\b": None, "X": "Y"},
+    # Backreferences cannot be combined into one pattern
+    "backreference": {"(A)\\1": "A", "(\\w) \\1": "\\1"},
+    "na_patterns": {pattern: None for pattern in na_patterns},
+}
+
+words = ["NORTH", "SOUTH", "STREET", "ST", "AVENUE", "AVE", "AA", "A A", "NONE", "N/A", "NA", "X", "12", "MAIN", "", " "]
+
+
+def random_values(n, seed=0):
+    """
+    Returns random strings built from the words of the mappings, mixed with a random corpus and missing values
+    """
+    rng = np.random.default_rng(seed)
+    streets = [" ".join(rng.choice(words, rng.integers(1, 5))) for _ in range(n // 2)]
+    values = pd.concat([pd.Series(streets, dtype=object), random_corpus(n - len(streets), seed)], ignore_index=True)
+    return pd.concat([values, values.str.upper()], ignore_index=True)
+
+
+def assert_same(replaced, expected):
+    assert list(replaced.fillna("<NA>").values) == list(expected.fillna("<NA>").values)
+
+
+@pytest.mark.parametrize("name", list(mappings))
+def test_replacer_matches_pandas_replace(name):
+    values = random_values(4000)
+    assert_same(MultiPatternReplacer(mappings[name]).replace(values), values.replace(mappings[name], regex=True))
+
+
+def test_street_suffixes_match_pandas_replace():
+    rng = np.random.default_rng(1)
+    suffix_words = [pattern.replace("\\b", "") for pattern in street_suffix_mapping] + list(street_suffix_mapping.values())
+    values = pd.Series([" ".join(rng.choice(suffix_words + ["MAIN", "12"], rng.integers(1, 4))) for _ in range(500)],
+                       dtype=object)
+    assert_same(replace_patterns(values, street_suffix_mapping), values.replace(street_suffix_mapping, regex=True))
+
+
+def test_non_strings_are_kept():
+    values = pd.Series(["NORTH", 5, None, np.nan, 2.5, "NORTH"], dtype=object)
+    replaced = MultiPatternReplacer(mappings["word_bounded"]).replace(values)
+    assert replaced.iloc[0] == "N"
+    assert replaced.iloc[1] == 5
+    assert replaced.iloc[2] is None
+    assert np.isnan(replaced.iloc[3])
+    assert replaced.iloc[4] == 2.5
+
+
+def test_numeric_columns_are_returned_as_they_are():
+    values = pd.Series([1, 2, 3])
+    assert MultiPatternReplacer({"1": "2"}).replace(values) is values
+
+
+def test_dataframe_replaced_by_column():
+    data = pd.DataFrame({"street": ["NORTH STREET", "N/A"], "city": ["NONE", "SOUTH X"], "n": [1, 2]}, index=[7, 3])
+    mapping = dict(mappings["word_bounded"], **mappings["none"])
+    expected = data.replace(mapping, regex=True)
+    replaced = replace_patterns(data, mapping)
+    assert replaced.index.equals(data.index)
+    for col in ["street", "city"]:
+        assert_same(replaced[col], expected[col])
+    assert list(replaced["n"]) == [1, 2]
+
+
+def test_replace_patterns_reuses_compiled_replacer():
+    mapping = {"\\bWEST\\b": "W"}
+    values = pd.Series(["WEST END", "WESTERN"], dtype=object)
+    assert list(replace_patterns(values, mapping)) == ["W END", "WESTERN"]
+    from zrp.prepare.replacer import cached_replacer
+    assert cached_replacer(tuple(mapping.items())) is cached_replacer(tuple(mapping.items()))
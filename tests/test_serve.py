@@ -0,0 +1,108 @@
+from zrp.serve import ZRPServer, arrow_content_type, json_content_type
+import pyarrow as pa
+import pandas as pd
+import asyncio
+import json
+
+
+records = [{"ZEST_KEY": "a", "first_name": "ALEX", "last_name": "SMITH", "house_number": "10",
+            "street_address": "MAIN ST", "city": "ATLANTA", "state": "GA", "zip_code": "30301"},
+           {"ZEST_KEY": "b", "first_name": "MARIA", "last_name": "GARCIA", "house_number": "5",
+            "street_address": "ELM AVE", "city": "AUSTIN", "state": "TX", "zip_code": "73301"}]
+
+
+class FakeSession():
+    def load(self):
+        return self
+
+
+class FakeZRP():
+    """
+    Stands in for ZRP, scoring a record by the length of its last name without support files or models
+    """
+    key = "ZEST_KEY"
+    bisg = False
+    pipe_path = "pipelines"
+    year = "2019"
+    span = "5"
+
+    def __init__(self):
+        self.session = FakeSession()
+        self.batches = []
+
+    def data_column_mapping(self):
+        return {}
+
+    def reset_column_names(self):
+        pass
+
+    def score_records(self, data, bisg=False):
+        self.batches.append(data)
+        proxies = pd.DataFrame({"WHITE": data["last_name"].str.len().values / 10.0}, index=data[self.key].values)
+        proxies["race_proxy"] = "WHITE"
+        return (proxies, None)
+
+
+async def post(port, body, content_type):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write((f"POST /predict HTTP/1.1\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                  f"Connection: close\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, response_body = response.split(b"\r\n\r\n", 1)
+    return (head.decode("latin-1"), response_body)
+
+
+async def post_batches(zrp):
+    server = ZRPServer(zrp=zrp, max_wait_ms=1).load()
+    server.queue = asyncio.Queue()
+    batch_task = asyncio.ensure_future(server.batch_loop())
+    http_server = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+    port = http_server.sockets[0].getsockname()[1]
+    try:
+        json_response = await post(port, json.dumps({"records": records}).encode(), json_content_type)
+        table = pa.Table.from_pandas(pd.DataFrame(records), preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        arrow_response = await post(port, sink.getvalue().to_pybytes(), arrow_content_type)
+    finally:
+        http_server.close()
+        batch_task.cancel()
+    return (json_response, arrow_response)
+
+
+def test_predict_json_and_arrow_batches():
+    zrp = FakeZRP()
+    (json_head, json_body), (arrow_head, arrow_body) = asyncio.run(post_batches(zrp))
+
+    assert json_head.startswith("HTTP/1.1 200")
+    assert f"Content-Type: {json_content_type}" in json_head
+    response = json.loads(json_body)
+    assert "bisg_proxies" not in response
+    assert [row["ZEST_KEY"] for row in response["proxies"]] == ["a", "b"]
+    assert [row["WHITE"] for row in response["proxies"]] == [0.5, 0.6]
+
+    assert arrow_head.startswith("HTTP/1.1 200")
+    assert f"Content-Type: {arrow_content_type}" in arrow_head
+    proxies = pa.ipc.open_stream(arrow_body).read_all()
+    assert proxies.column("ZEST_KEY").to_pylist() == ["a", "b"]
+    assert proxies.column("WHITE").to_pylist() == [0.5, 0.6]
+    assert proxies.column("race_proxy").to_pylist() == ["WHITE", "WHITE"]
+
+    # Each request is scored with score_records, keyed by request & row rather than the posted keys
+    assert len(zrp.batches) == 2
+    assert all(batch["ZEST_KEY"].str.startswith("request_").all() for batch in zrp.batches)
+
+
+def test_predict_without_records():
+    zrp = FakeZRP()
+    server = ZRPServer(zrp=zrp).load()
+    try:
+        asyncio.run(server.handle_predict(b"[]", json_content_type))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Posting no records should raise a ValueError")
+    assert zrp.batches == []
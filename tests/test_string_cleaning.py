@@ -0,0 +1,75 @@
+from zrp.benchmark.strings import reference_cleaning, vectorized_cleaning, random_corpus, benchmark_string_backends
+from zrp.prepare.preprocessing import as_str, keep_digits, clean_names, clean_addresses, format_strings, reduce_whitespace, \
+    arrow_strings, from_arrow_strings, arrow_string_dtype
+import pandas as pd
+import numpy as np
+import pytest
+
+
+edge_cases = pd.Series([None, np.nan, "", " ", "O'BRIEN", "SMITH-JONES", "de la Cruz", "José Müller", "ß", "١٢٣",
+                        "12 1/2", "123A", "123A\n", "30301-1234", "N/A", "\t#4 B\n", "’"], dtype=object)
+
+
+def reference_values(name, values):
+    if name == "zfill":
+        # Zip codes are cleaned to strings before they are padded
+        values = as_str(values)
+    return (values, values.apply(reference_cleaning[name]))
+
+
+@pytest.mark.parametrize("name", list(reference_cleaning))
+@pytest.mark.parametrize("seed", [0, 1])
+def test_cleaning_matches_regex_on_random_corpus(name, seed):
+    values, expected = reference_values(name, random_corpus(20000, seed))
+    cleaned = vectorized_cleaning[name](values)
+    assert list(cleaned.values) == list(expected.values)
+    assert cleaned.index.equals(values.index)
+
+
+@pytest.mark.parametrize("name", list(reference_cleaning))
+def test_cleaning_matches_regex_on_edge_cases(name):
+    values, expected = reference_values(name, edge_cases)
+    assert list(vectorized_cleaning[name](values).values) == list(expected.values)
+
+
+def test_as_str_matches_str():
+    assert list(as_str(edge_cases).values) == [str(x) for x in edge_cases]
+    assert as_str(edge_cases).dtype == object
+
+
+def test_missing_values_are_cleaned_as_strings():
+    values = pd.Series([None, np.nan, "A1"], dtype=object)
+    assert list(keep_digits(values)) == ["", "", "1"]
+    assert list(clean_names(values)) == ["None", "nan", "A "]
+    assert list(clean_addresses(values)) == ["None", "nan", "A1"]
+
+
+def test_apostrophes_are_removed_and_punctuation_spaced():
+    values = pd.Series(["O'BRIEN", "SMITH-JONES", "1ST.ST#2"], dtype=object)
+    assert list(clean_names(values)) == ["OBRIEN", "SMITH JONES", " ST ST  "]
+    assert list(clean_addresses(values)) == ["OBRIEN", "SMITH JONES", "1ST ST 2"]
+
+
+@pytest.mark.skipif(arrow_string_dtype is None, reason="pandas has no Arrow string dtype")
+def test_arrow_backend_keeps_columns_in_arrow():
+    data = pd.DataFrame({"name": ["  o'brien ", None, "smith-jones"], "zip": ["30301-1234", "nan", None]}, dtype=object)
+    formatted = format_strings(data, "arrow")
+    assert all(formatted[col].dtype == arrow_string_dtype for col in formatted.columns)
+    assert list(formatted["name"].fillna("<NA>")) == ["O'BRIEN", "<NA>", "SMITH-JONES"]
+
+    # Kernels read & return the Arrow buffers, missing values are cleaned as str(NaN)
+    cleaned = keep_digits(formatted["zip"], "arrow")
+    assert cleaned.dtype == arrow_string_dtype
+    assert list(cleaned) == ["303011234", "", ""]
+    array = arrow_strings(cleaned, missing_as_str=False)
+    round_trip = arrow_strings(from_arrow_strings(array, cleaned), missing_as_str=False)
+    assert round_trip.buffers()[2].address == array.buffers()[2].address
+    assert reduce_whitespace(formatted, "arrow")["name"].dtype == arrow_string_dtype
+
+
+def test_string_backends_return_the_same_values():
+    results = benchmark_string_backends(n=2000, repeat=1)
+    for stage in ["ProcessStrings", "ProcessGeo"]:
+        assert results[stage]["n_rows"] == 2000
+        if arrow_string_dtype is not None:
+            assert results[stage]["arrow_mb"] < results[stage]["python_mb"]
@@ -1,3 +1,21 @@
-from .zrp import ZRP
+import importlib
 
-__all__ = ['ZRP']
\ No newline at end of file
+# Subsystems are imported the first time one of their names is used, so `import zrp` and the command line do not
+# pay for the modeling dependencies (xgboost, surgeo, sklearn) until they are needed
+_lazy_imports = {
+    'ZRP': '.zrp',
+    'ZRP_Session': '.session',
+}
+
+__all__ = ['ZRP', 'ZRP_Session']
+
+
+def __getattr__(name):
+    if name in _lazy_imports:
+        module = importlib.import_module(_lazy_imports[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(list(globals()) + list(_lazy_imports)))
@@ -1,10 +1,16 @@
 if __name__ == '__main__':
     from .download import download
+    from .cli import predict, prepare, build, serve, build_index
     import plac
     import sys
 
     commands = {
         "download": download,
+        "predict": predict,
+        "prepare": prepare,
+        "build": build,
+        "serve": serve,
+        "build-index": build_index,
     }
 
     if len(sys.argv) == 1:
@@ -0,0 +1,93 @@
+from zrp.profiling import profiler, peak_rss_mb, frame_mb
+import numpy as np
+import os
+
+
+# Stages hold their input, intermediate copies (ie the four copies made by `ACSModelPrep.acs_combine`), and their
+# output at the same time, so the working memory of a chunk is a multiple of its largest stage output
+working_set_factor = 5
+min_chunk_size = 1000
+
+
+def probe_memory(run_chunk, data, probe_size=2000):
+    """
+    Runs a small sample of the input through a chunk of the run with stage output memory recorded, and returns the
+    memory needed per row. Stages recorded by the probe are removed from the run's profile.
+
+    Parameters
+    ----------
+    run_chunk: callable
+        Processes a chunk of input data, returning its outputs as a dataframe or tuple of dataframes
+    data: pd.DataFrame
+        Input data with ZRP's default column names
+    probe_size: int
+        Number of sampled rows to probe with
+    """
+    baseline_mb = peak_rss_mb()
+    sample = data.sample(min(probe_size, len(data)), random_state=0).sort_values("state")
+    n_stages = len(profiler.stages)
+    profiler.measure_memory = True
+    try:
+        outputs = run_chunk(sample)
+    finally:
+        profiler.measure_memory = False
+    probe_stages = profiler.stages[n_stages:]
+    del profiler.stages[n_stages:]
+
+    stage_mb = {}
+    for record in probe_stages:
+        # Geocoding runs once per state, the states of the chunk are held together
+        name = "ZGeo" if record["stage"].startswith("ZGeo_") else record["stage"]
+        stage_mb[name] = stage_mb.get(name, 0) + (record.get("mb_out") or 0)
+    if not isinstance(outputs, tuple):
+        outputs = (outputs,)
+    out_mb = sum(frame_mb(output) for output in outputs if output is not None)
+    probe = {"probe_rows": len(sample),
+             "baseline_mb": baseline_mb,
+             "mb_per_row": float(max(stage_mb.values(), default=0)) / len(sample),
+             "out_mb_per_row": float(out_mb) / len(sample),
+             "stage_mb": stage_mb}
+    return (probe)
+
+
+def tune_chunks(memory_budget, probe, n_rows, workers=None, max_workers=None):
+    """
+    Returns the chunk size and number of workers that keep the peak RSS of a run under a memory budget. Every worker
+    holds its own copy of the support files, taken to be as large as the baseline of the probing process. The
+    process running the run also holds the outputs of every chunk. The most workers that still leave each worker
+    chunks of at least `min_chunk_size` rows are used.
+
+    Parameters
+    ----------
+    memory_budget: float
+        Peak RSS to stay under, in Mb, summed over the run's process and its workers
+    probe: dict
+        Memory needed per row, as returned by `probe_memory`
+    n_rows: int
+        Number of input rows of the run
+    workers: int, optional
+        Number of workers to use. Picked from the budget if not provided.
+    max_workers: int, optional
+        Most workers to use when picking the number of workers. The number of CPUs is used if not provided.
+    """
+    baseline_mb = probe["baseline_mb"] or 0
+    chunk_mb_per_row = max(working_set_factor * probe["mb_per_row"], 1.0e-6)
+    main_mb = baseline_mb + n_rows * probe["out_mb_per_row"]
+    if workers is not None:
+        candidate_workers = [workers]
+    else:
+        candidate_workers = range(max_workers or os.cpu_count() or 1, 0, -1)
+
+    for n_workers in candidate_workers:
+        free_mb = memory_budget - main_mb
+        if n_workers > 1:
+            free_mb -= n_workers * baseline_mb
+        chunk_size = int(free_mb / n_workers / chunk_mb_per_row)
+        chunk_size = min(chunk_size, int(np.ceil(n_rows / n_workers)))
+        if (chunk_size >= min(min_chunk_size, n_rows)) or (n_workers == candidate_workers[-1]):
+            break
+    if chunk_size < min(min_chunk_size, n_rows):
+        print(f"Warning: a memory budget of {memory_budget}Mb is too small for this run, about {main_mb + min_chunk_size * chunk_mb_per_row:.0f}Mb is needed for chunks of {min_chunk_size} rows")
+        chunk_size = min(min_chunk_size, n_rows)
+    print(f"Memory budget of {memory_budget}Mb: chunk_size = {chunk_size}, workers = {n_workers}")
+    return (chunk_size, n_workers)
@@ -0,0 +1,8 @@
+from .synthetic import generate_synthetic
+from .suite import run_benchmarks, benchmark_entry_points, benchmark_imports, check_imports, compare_results, load_results, save_results
+from .fixtures import make_fixtures
+from .strings import check_string_cleaning, benchmark_string_cleaning, check_pattern_replacement, benchmark_address_cleaning, benchmark_string_backends
+from .geocoding import benchmark_majority_vote
+from .latency import benchmark_record_latency
+
+__all__ = ['generate_synthetic', 'run_benchmarks', 'benchmark_entry_points', 'benchmark_imports', 'check_imports', 'compare_results', 'load_results', 'save_results', 'make_fixtures', 'check_string_cleaning', 'benchmark_string_cleaning', 'check_pattern_replacement', 'benchmark_address_cleaning', 'benchmark_string_backends', 'benchmark_majority_vote', 'benchmark_record_latency']
@@ -0,0 +1,31 @@
+if __name__ == '__main__':
+    from .suite import run_benchmarks, compare_results
+    from .fixtures import make_fixtures, fixture_states
+    import tempfile
+    import plac
+
+    @plac.pos("sizes", "Comma separated sizes of synthetic input to time, from 10k, 100k, 1m, and 10m")
+    @plac.opt("results_path", "Json file to store results in", type=str, abbrev="o")
+    @plac.opt("pipe_path", "Folder containing pipelines", type=str, abbrev="p")
+    @plac.opt("entry_points", "Comma separated entry points to time", type=str, abbrev="e")
+    @plac.opt("repeat", "Number of times to run each entry point", type=int, abbrev="n")
+    @plac.opt("baseline", "Version to compare the results against", type=str, abbrev="b")
+    @plac.opt("data_path", "Folder of processed support files, fixtures are written to a temporary folder if not given", type=str, abbrev="d")
+    @plac.flg("fixtures", "Generate miniature support files & pipelines first, for machines without the release download", abbrev="f")
+    def main(sizes="10k", results_path="benchmark_results.json", pipe_path=None, entry_points=None, repeat=1, baseline=None,
+             data_path=None, fixtures=False):
+        synthetic_kwargs = {}
+        if fixtures:
+            if data_path is None:
+                data_path = tempfile.mkdtemp(prefix="zrp_fixtures_")
+            pipe_path = make_fixtures(data_path)
+            synthetic_kwargs["state_mix"] = {state: 1.0 for state in fixture_states}
+        if entry_points is not None:
+            entry_points = entry_points.split(",")
+        run_benchmarks(sizes.split(","), pipe_path=pipe_path, entry_points=entry_points, repeat=repeat, results_path=results_path,
+                       data_path=data_path, **synthetic_kwargs)
+        if baseline is not None:
+            from zrp.about import __version__
+            print(compare_results(results_path, baseline, __version__))
+
+    plac.call(main)
@@ -0,0 +1,205 @@
+from zrp.benchmark.synthetic import generate_synthetic, state_profiles, street_names, street_suffixes
+from zrp.prepare.preprocessing import ProcessGLookUp
+from zrp.prepare.utils import load_json, save_json, save_dataframe, make_directory
+from os.path import dirname, join
+import pandas as pd
+import numpy as np
+import shutil
+import glob
+import os
+
+
+fixture_states = ("AL", "GA", "NY")
+
+# Columns of the processed ACS lookup tables that are not ACS estimates
+non_acs_cols = ["GEOID_ZIP", "GEOID", "first_name", "GEOID_CT", "middle_name", "GEOID_BG", "last_name", "ZEST_KEY",
+                "ZEST_KEY_COL"]
+
+geo_cols = ['STATEFP', 'COUNTYFP', 'TRACTCE', 'BLKGRPCE', 'ZEST_FULLNAME', 'FROMHN', 'TOHN', 'ZEST_ZIP',
+            'ZCTA5CE', 'ZCTA5CE10', 'FROMHN_LEFT', 'FROMHN_RIGHT', 'TOHN_LEFT', 'TOHN_RIGHT', 'PARITY']
+
+# House number ranges each fixture street is split into, each range is its own census tract
+house_number_ranges = [(1, 2499), (2500, 4999), (5000, 7499), (7500, 9999)]
+
+
+def acs_feature_cols():
+    """
+    Returns the ACS estimate columns used by any of the packaged feature lists
+    """
+    modeling_path = join(dirname(__file__), "../modeling")
+    feature_cols = set()
+    for feature_list_name in ["bg", "ct", "zp"]:
+        feature_list = load_json(join(modeling_path, f"feature_list_{feature_list_name}.json"))
+        feature_cols = feature_cols.union(set(feature_list) - set(non_acs_cols))
+    return (sorted(feature_cols))
+
+
+def make_geo_lookup(state, state_fips):
+    """
+    Returns a miniature geo lookup table of a state with the schema of the released `Zest_Geo_Lookup_*` tables.
+    Every street of `synthetic.street_names` & `synthetic.street_suffixes` runs through each zip code of the state
+    profile, so synthetic records of the state geocode down to the block group.
+
+    Parameters
+    ----------
+    state: str
+        2-letter state code, one of the states in `synthetic.state_profiles`
+    state_fips: str
+        State fips code
+    """
+    streets = [f"{name} {suffix}" for name in street_names for suffix in street_suffixes]
+    ranges = []
+    for place_index, (_, zip_code) in enumerate(state_profiles[state]):
+        for range_index, (from_hn, to_hn) in enumerate(house_number_ranges):
+            # Odd house numbers are in block group 1 & even house numbers in block group 2
+            for parity, remainder, block_group in [("O", 1, "1"), ("E", 0, "2")]:
+                ranges.append({"ZIP": zip_code,
+                               "COUNTYFP": str(2 * place_index + 1),
+                               "TRACTCE": str(100 * (place_index + 1) + range_index),
+                               "BLKGRPCE": block_group,
+                               "FROMHN": str(from_hn + (from_hn + remainder) % 2),
+                               "TOHN": str(to_hn - (to_hn + remainder) % 2),
+                               "PARITY": parity})
+    ranges = pd.DataFrame(ranges)
+    aef = ranges.loc[ranges.index.repeat(len(streets))].reset_index(drop=True)
+    aef["FULLNAME"] = np.tile(streets, len(ranges))
+    aef["STATEFP"] = state_fips
+    aef["ZCTA5CE"] = aef["ZIP"]
+    aef["ZCTA5CE10"] = aef["ZIP"]
+
+    # Same steps as GeoLookUpBuilder
+    aef = aef.rename(columns={"ZIP": "ZEST_ZIP",
+                              "FULLNAME": "ZEST_FULLNAME"})
+    aef = aef.astype(str)
+    state_mapping = load_json(join(dirname(__file__), "../data/processed/state_mapping.json"))
+    aef = ProcessGLookUp().transform(aef, state_mapping)
+    aef = aef.sort_values(['PARITY', 'ZEST_ZIP', 'ZEST_FULLNAME', 'FROMHN_LEFT', 'FROMHN_RIGHT'])
+    aef = aef.reset_index(drop=True)
+    return (aef[geo_cols])
+
+
+def make_acs_lookup(geo_lookups, seed=0):
+    """
+    Returns miniature block group, census tract, and zip code ACS lookup tables with the schema of the released
+    `Zest_ACS_Lookup_*` tables, covering every GEOID of the given geo lookup tables. Estimates are random counts.
+
+    Parameters
+    ----------
+    geo_lookups: list
+        Geo lookup tables generated by `make_geo_lookup`
+    seed: int
+        Seed of the random number generator
+    """
+    rng = np.random.default_rng(seed)
+    geo_lookup = pd.concat(geo_lookups)
+    geoid_ct = geo_lookup["STATEFP"].str.zfill(2) + geo_lookup["COUNTYFP"] + geo_lookup["TRACTCE"]
+    geoids = {"blockgroup": (geoid_ct + geo_lookup["BLKGRPCE"]).unique(),
+              "tract": geoid_ct.unique(),
+              "zip": geo_lookup["ZEST_ZIP"].unique()}
+    feature_cols = acs_feature_cols()
+    acs_tables = {}
+    for level, level_geoids in geoids.items():
+        estimates = rng.integers(0, 5000, (len(level_geoids), len(feature_cols))).astype(float)
+        acs_tables[level] = pd.concat([pd.DataFrame({"GEOID": level_geoids}),
+                                       pd.DataFrame(estimates, columns=feature_cols)], axis=1)
+    return (acs_tables)
+
+
+def make_fixtures(support_path, states=fixture_states, n_train=20000, pipelines_path=None, zrp_model_name="zrp_fixture",
+                  xgb_params=None, year="2019", span="5", seed=0, force=False):
+    """
+    Writes a miniature, schema-accurate set of support files so ZRP can run without the release download: the
+    packaged mappings, geo lookup tables of a few states & the ACS lookup tables are written to `support_path`, and
+    small pipelines are trained with `ZRP_Build` on synthetic records of those states. Pass `support_path` as the
+    `data_path` of `ZRP`, `ZRP_Build`, or `ZRP_Session` to run on the fixtures; the package data folder is never
+    written to. Meant for benchmarks and regression runs on machines without network access; proxies from these
+    files are meaningless.
+
+    Parameters
+    ----------
+    support_path: str
+        Folder to write the support files to, ie a temporary folder. It gets the layout of `zrp/data/processed`.
+    states: list
+        2-letter state codes to write geo lookup tables for, from the states in `synthetic.state_profiles`
+    n_train: int
+        Number of synthetic records to train the pipelines on. Pipelines are not built if 0.
+    pipelines_path: str, optional
+        Folder to build the pipelines in. A 'pipelines' folder in `support_path` is used if not provided.
+    zrp_model_name: str
+        Name of the built model. Pipelines are written to `{pipelines_path}/artifacts/experiments/{zrp_model_name}`.
+    xgb_params: dict, optional
+        xgboost params of the built models. Small, fast models are built if not provided.
+    year: str
+        ACS & geo year of the support files
+    span: str
+        Year span of the ACS support files
+    seed: int
+        Seed of the random number generator
+    force: bool, default False
+        Whether to overwrite support files in `support_path` that were not written by `make_fixtures`. Fixtures
+        written by an earlier call are always replaced.
+    """
+    unknown_states = set(states) - set(state_profiles)
+    if len(unknown_states) > 0:
+        raise ValueError(f"Fixtures cannot be generated for states: {sorted(unknown_states)}. Available states: {sorted(state_profiles)}")
+    package_data_path = join(dirname(__file__), "../data/processed")
+    geo_path = join(support_path, "geo", year)
+    acs_path = join(support_path, "acs", year, f"{span}yr")
+    version_path = join(support_path, "version")
+    has_fixtures = False
+    if os.path.exists(version_path):
+        with open(version_path) as vfile:
+            has_fixtures = vfile.read().startswith("zrp fixtures")
+    for path in [geo_path, acs_path]:
+        if os.path.isdir(path) and len(os.listdir(path)) > 0:
+            if not (force or has_fixtures):
+                raise FileExistsError(f"Support files already exist in {os.path.abspath(path)}. Use force=True to replace them with fixtures.")
+            shutil.rmtree(path)
+
+    make_directory(geo_path)
+    make_directory(acs_path)
+
+    # The mappings are small and ship with the package, they are copied as they are
+    for mapping_path in glob.glob(join(package_data_path, "*.json")):
+        shutil.copy(mapping_path, support_path)
+    save_json({"acs_year": year, "acs_span": f"{span}yr", "geo_year": year}, support_path, "lookup_tables_config.json")
+
+    print("[Start] Writing geo lookup fixtures")
+    inv_state_mapping = load_json(join(support_path, "inv_state_mapping.json"))
+    geo_lookups = []
+    for state in states:
+        state_fips = inv_state_mapping[state].zfill(2)
+        geo_lookup = make_geo_lookup(state, state_fips)
+        save_dataframe(geo_lookup, geo_path, f"Zest_Geo_Lookup_{year}_State_{state_fips}.parquet")
+        geo_lookups.append(geo_lookup)
+
+    print("[Start] Writing ACS lookup fixtures")
+    for level, acs_table in make_acs_lookup(geo_lookups, seed).items():
+        save_dataframe(acs_table, acs_path, f"processed_Zest_ACS_Lookup_{year}{span}yr_{level}.parquet")
+
+    # save a version file so fixtures are not mistaken for the release support files
+    with open(version_path, 'w') as vfile:
+        vfile.write('zrp fixtures --> states {}'.format(",".join(states)))
+
+    if n_train == 0:
+        return (None)
+    print("[Start] Building fixture pipelines")
+    from zrp.modeling.pipeline_builder import ZRP_Build
+
+    if pipelines_path is None:
+        pipelines_path = join(support_path, "pipelines")
+    if xgb_params is None:
+        xgb_params = {'gamma': 5,
+                      'learning_rate': 0.1,
+                      'max_depth': 3,
+                      'min_child_weight': 5,
+                      'n_estimators': 20,
+                      'subsample': 0.5,
+                      'objective': 'multi:softprob'}
+    data = generate_synthetic(n_train, state_mix={state: 1.0 for state in states}, seed=seed)
+    z_build = ZRP_Build(file_path=pipelines_path, zrp_model_name=zrp_model_name, xgb_params=xgb_params,
+                        year=year, span=span, data_path=support_path)
+    z_build.transform(data)
+    pipe_path = os.path.join(z_build.out_path, "experiments", zrp_model_name)
+    print("[Completed] Fixture pipelines built in", pipe_path)
+    return (pipe_path)
@@ -0,0 +1,83 @@
+from zrp.prepare.geo_geocoder import majority_vote_deduplication, majority_vote_cols
+import pandas as pd
+import numpy as np
+import time
+
+
+def reference_majority_vote(data, key):
+    """
+    Deduplication by one `mode` call per key and column, the way the geocoder voted before `majority_vote`, kept as
+    the reference it is checked against
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Data to deduplicate
+    key: str
+        Key used in deduplication
+    """
+    data = data.copy()
+    for col in majority_vote_cols:
+        data[col] = data.groupby(key)[col].transform(lambda x: x.mode()[0])
+    return data.drop_duplicates(keep='first', subset=[key])
+
+
+def random_candidates(n, n_keys, seed=0):
+    """
+    Returns random geocoding candidates, addresses joined to the segments of their street, with a few values of each
+    voted column per address, ties, and missing values. The first candidate of every address has all its values.
+
+    Parameters
+    ----------
+    n: int
+        Number of candidate rows
+    n_keys: int
+        Number of addresses
+    seed: int
+        Seed of the random number generator
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.sort(rng.integers(0, n_keys, n))
+    candidates = pd.DataFrame({"ZEST_KEY_LONG": pd.Series(keys).astype(str).str.zfill(8)})
+    for col, width in zip(majority_vote_cols, [6, 1, 5, 3]):
+        values = pd.Series(rng.integers(0, 4, n)).astype(str).str.zfill(width).values.astype(object)
+        values[rng.random(n) < 0.05] = np.nan
+        candidates[col] = values
+    first = ~candidates["ZEST_KEY_LONG"].duplicated().values
+    candidates.loc[first, majority_vote_cols] = candidates.loc[first, majority_vote_cols].fillna("0")
+    return (candidates.sample(frac=1, random_state=seed).reset_index(drop=True))
+
+
+def benchmark_majority_vote(n=1000000, n_keys=20000, repeat=1, seed=0):
+    """
+    Times majority vote deduplication of random geocoding candidates with one `mode` call per key and column and with
+    `majority_vote_deduplication`, returning rows per second of both. Raises an error if they return different rows.
+
+    Parameters
+    ----------
+    n: int
+        Number of candidate rows
+    n_keys: int
+        Number of addresses the candidates are joined to
+    repeat: int
+        Number of times to time each method, the best time is kept
+    seed: int
+        Seed of the random number generator
+    """
+    candidates = random_candidates(n, n_keys, seed)
+    timings = {}
+    outputs = {}
+    for method, func in [("mode", reference_majority_vote), ("vectorized", majority_vote_deduplication)]:
+        wall_times = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            outputs[method] = func(candidates, "ZEST_KEY_LONG")
+            wall_times.append(time.perf_counter() - start_time)
+        timings[method] = n / min(wall_times)
+    if not outputs["mode"].equals(outputs["vectorized"]):
+        raise AssertionError("majority_vote_deduplication differs from the mode of each key and column")
+    return ({"n_rows": n,
+             "n_keys": n_keys,
+             "mode_rows_per_second": timings["mode"],
+             "vectorized_rows_per_second": timings["vectorized"],
+             "speedup": timings["vectorized"] / timings["mode"]})
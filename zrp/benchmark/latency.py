@@ -0,0 +1,76 @@
+from zrp.benchmark.synthetic import generate_synthetic
+import numpy as np
+import time
+
+
+def latency_summary(latencies):
+    """
+    Returns the p50, p90, p99, and maximum of call latencies in milliseconds
+
+    Parameters
+    ----------
+    latencies: list
+        Wall time of each call in seconds
+    """
+    latencies_ms = np.array(latencies) * 1000
+    return ({"n_calls": len(latencies_ms),
+             "p50_ms": float(np.percentile(latencies_ms, 50)),
+             "p90_ms": float(np.percentile(latencies_ms, 90)),
+             "p99_ms": float(np.percentile(latencies_ms, 99)),
+             "max_ms": float(latencies_ms.max())})
+
+
+def benchmark_record_latency(n_calls=200, batch_size=1, data=None, pipe_path=None, session=None, data_path=None,
+                             warmup=5, seed=0, **synthetic_kwargs):
+    """
+    Times `ZRP.predict_records` on single records or small batches with the support files and models held in a
+    loaded session, the way an online scoring service calls it. Returns the p50, p90, p99, and maximum latency of
+    the calls in milliseconds. Session loading and the first `warmup` calls, which fill the geo lookup table cache,
+    are not timed.
+
+    Parameters
+    ----------
+    n_calls: int
+        Number of timed calls
+    batch_size: int
+        Number of records per call
+    data: pd.DataFrame, optional
+        Records to score, with the columns of the sample data in `tests/data`. Synthetic records are generated if
+        not provided.
+    pipe_path: str, optional
+        Folder path to directory containing pipelines. The packaged pipelines are used if not provided.
+    session: ZRP_Session, optional
+        Session holding the support files & models. A session is loaded if not provided.
+    data_path: str, optional
+        Folder of the processed support files the session loads, ie written by `make_fixtures`. The package data
+        folder is used if not provided.
+    warmup: int
+        Number of calls made before timing
+    seed: int
+        Seed of the random number generator
+    synthetic_kwargs:
+        Passed on to `generate_synthetic`
+    """
+    from zrp import ZRP
+    from zrp.session import ZRP_Session
+
+    if data is None:
+        data = generate_synthetic((n_calls + warmup) * batch_size, seed=seed, **synthetic_kwargs)
+    if session is None:
+        session = ZRP_Session(pipe_path=pipe_path, data_path=data_path)
+    session.load()
+    zrp = ZRP(pipe_path=pipe_path, session=session, data_path=data_path)
+    records = data.to_dict("records")
+
+    def call(i):
+        start = (i * batch_size) % len(records)
+        return zrp.predict_records(records[start:start + batch_size])
+
+    for i in range(warmup):
+        call(i)
+    latencies = []
+    for i in range(warmup, warmup + n_calls):
+        start_time = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - start_time)
+    return (dict(latency_summary(latencies), batch_size=batch_size))
@@ -0,0 +1,257 @@
+from zrp.prepare.preprocessing import as_str, keep_digits, clean_names, clean_addresses, na_patterns, string_backends
+from zrp.prepare.replacer import replace_patterns
+from zrp.prepare.utils import load_mappings
+from zrp.profiling import frame_mb
+from os.path import dirname, join
+import pandas as pd
+import numpy as np
+from joblib import Parallel, delayed
+import time
+import re
+
+
+# Cell by cell cleaning the vectorized cleaning functions replaced, kept as the reference they are checked against
+reference_cleaning = {
+    "keep_digits": lambda x: re.sub("[^0-9]", "", str(x)),
+    "clean_names": lambda x: re.sub("[^A-Za-z\\s]", "", re.sub("[^A-Za-z']", " ", str(x))),
+    "house_number": lambda x: re.sub("[^0-9]$", "", str(x)),
+    "zfill": lambda x: x.zfill(5),
+    "clean_addresses": lambda x: re.sub("[^A-Za-z0-9\\s]", "", re.sub("[^A-Za-z0-9']", " ", str(x))),
+}
+
+vectorized_cleaning = {
+    "keep_digits": keep_digits,
+    "clean_names": clean_names,
+    "house_number": lambda data: as_str(data).str.replace("[^0-9]$", "", regex=True),
+    "zfill": lambda data: data.str.zfill(5),
+    "clean_addresses": clean_addresses,
+}
+
+def address_mining(data, i):
+    """
+    Cleans the street address at key `i` of a dict in place, the per address task `clean_addresses` replaced, kept as
+    the reference it is timed against
+
+    Parameters
+    ----------
+    data: dict
+        Street addresses by key
+    i: int
+        Key of the street address to clean
+    """
+    data[i] = re.sub("[^A-Za-z0-9\\s]", "", re.sub("[^A-Za-z0-9']", " ", str(data[i])))
+    return (data[i])
+
+
+corpus_characters = list("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789") + \
+                    list(" \t\n'-.,#/&()_") + ["É", "ñ", "Ö", "ß", "’", "½", "١"]
+
+
+def random_corpus(n, seed=0):
+    """
+    Returns a column of random strings mixing letters, digits, punctuation, whitespace, and non ascii characters, with
+    missing values, empty strings, and the name & address shapes of ZRP input
+
+    Parameters
+    ----------
+    n: int
+        Number of values
+    seed: int
+        Seed of the random number generator
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(0, 16, n)
+    chars = rng.choice(corpus_characters, lengths.sum())
+    values = np.array(["".join(c) for c in np.split(chars, np.cumsum(lengths)[:-1])], dtype=object)
+    shaped = rng.random(n)
+    values[shaped < 0.2] = rng.choice(["O'BRIEN", "SMITH-JONES", "DE LA CRUZ", "123A", "12 1/2", "30301-1234", "N/A"], (shaped < 0.2).sum())
+    values[shaped > 0.97] = None
+    values[(shaped > 0.95) & (shaped <= 0.97)] = np.nan
+    return (pd.Series(values, dtype=object))
+
+
+def check_string_cleaning(n=200000, seed=0):
+    """
+    Checks that each vectorized cleaning function returns the same values as the cell by cell cleaning it replaced, on
+    a random corpus. Raises an error listing mismatched values.
+
+    Parameters
+    ----------
+    n: int
+        Number of random values to check
+    seed: int
+        Seed of the random number generator
+    """
+    corpus = random_corpus(n, seed)
+    for name, reference in reference_cleaning.items():
+        values = corpus
+        if name == "zfill":
+            # Zip codes are cleaned to strings before they are padded
+            values = as_str(corpus)
+        expected = values.apply(reference)
+        cleaned = vectorized_cleaning[name](values)
+        mismatched = expected.values != cleaned.values
+        if mismatched.any():
+            examples = list(zip(values[mismatched][:5], expected[mismatched][:5], cleaned[mismatched][:5]))
+            raise AssertionError(f"{name} differs from the cell by cell cleaning on {mismatched.sum()} of {n} values, ie (value, expected, cleaned): {examples}")
+    return True
+
+
+def benchmark_string_cleaning(n=25000, repeat=3, seed=0):
+    """
+    Times each cleaning function cell by cell & vectorized on a random corpus, returning rows per second of both
+
+    Parameters
+    ----------
+    n: int
+        Number of rows, the chunk size of a run by default
+    repeat: int
+        Number of times to time each function, the best time is kept
+    seed: int
+        Seed of the random number generator
+    """
+    corpus = random_corpus(n, seed)
+    results = {}
+    for name, reference in reference_cleaning.items():
+        values = as_str(corpus) if name == "zfill" else corpus
+        timings = {}
+        for method, func in [("apply", lambda: values.apply(reference)), ("vectorized", lambda: vectorized_cleaning[name](values))]:
+            wall_times = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                func()
+                wall_times.append(time.perf_counter() - start_time)
+            timings[method] = n / min(wall_times)
+        results[name] = {"n_rows": n,
+                         "apply_rows_per_second": timings["apply"],
+                         "vectorized_rows_per_second": timings["vectorized"],
+                         "speedup": timings["vectorized"] / timings["apply"]}
+    return (results)
+
+
+def check_pattern_replacement(n=100000, seed=0, support_files_path=None):
+    """
+    Checks that `replace_patterns` returns the same values as `pd.Series.replace(mapping, regex=True)` for the street
+    suffix mapping and the missing value patterns, on random street addresses built from the words of the mapping
+    and a random corpus. Raises an error listing mismatched values, and returns the wall time of both.
+
+    Parameters
+    ----------
+    n: int
+        Number of random values to check
+    seed: int
+        Seed of the random number generator
+    support_files_path: str, optional
+        Folder with the mapping files. The package data folder is used if not provided.
+    """
+    if support_files_path is None:
+        support_files_path = join(dirname(dirname(__file__)), "data/processed")
+    _, street_suffix_mapping, _, _ = load_mappings(support_files_path)
+    rng = np.random.default_rng(seed)
+    words = [pattern.replace("\\b", "") for pattern in street_suffix_mapping] + list(street_suffix_mapping.values()) + \
+            ["NORTH", "MAIN", "NA", "N/A", "NAN", "NONE", "-", "12", "", "  "]
+    streets = [" ".join(rng.choice(words, rng.integers(1, 5))) for _ in range(n // 2)]
+    values = pd.concat([pd.Series(streets, dtype=object), random_corpus(n - len(streets), seed)], ignore_index=True)
+    values = pd.concat([values, values.str.upper()], ignore_index=True)
+
+    results = {}
+    for name, mapping in [("street_suffixes", street_suffix_mapping), ("na_patterns", {pattern: None for pattern in na_patterns})]:
+        start_time = time.perf_counter()
+        expected = values.replace(mapping, regex=True)
+        replace_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        replaced = replace_patterns(values, mapping)
+        replacer_time = time.perf_counter() - start_time
+        mismatched = (expected.fillna("<NA>").values != replaced.fillna("<NA>").values)
+        if mismatched.any():
+            examples = list(zip(values[mismatched][:5], expected[mismatched][:5], replaced[mismatched][:5]))
+            raise AssertionError(f"{name} differs from pd.Series.replace on {mismatched.sum()} of {len(values)} values, ie (value, expected, replaced): {examples}")
+        results[name] = {"n_rows": len(values), "replace_wall_time": replace_time, "replacer_wall_time": replacer_time}
+    return (results)
+
+
+def benchmark_address_cleaning(n=25000, repeat=3, seed=0, n_jobs=-1):
+    """
+    Times cleaning street addresses with one joblib task per address, the way `address_mining` was dispatched, and
+    with `clean_addresses`, returning rows per second of both. Raises an error if they return different strings.
+
+    Parameters
+    ----------
+    n: int
+        Number of rows, the chunk size of a run by default
+    repeat: int
+        Number of times to time each method, the best time is kept
+    seed: int
+        Seed of the random number generator
+    n_jobs: int
+        Number of threads the joblib tasks are dispatched to
+    """
+    corpus = random_corpus(n, seed)
+
+    def dispatched():
+        street_addr_dict = dict(zip(corpus.index, corpus))
+        return Parallel(n_jobs=n_jobs, prefer="threads")(delayed(address_mining)(street_addr_dict, i) for i in list(corpus.index))
+
+    timings = {}
+    outputs = {}
+    for method, func in [("joblib", dispatched), ("vectorized", lambda: clean_addresses(corpus))]:
+        wall_times = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            outputs[method] = func()
+            wall_times.append(time.perf_counter() - start_time)
+        timings[method] = n / min(wall_times)
+    mismatched = np.asarray(outputs["joblib"], dtype=object) != outputs["vectorized"].values
+    if mismatched.any():
+        raise AssertionError(f"clean_addresses differs from address_mining on {mismatched.sum()} of {n} values")
+    return ({"n_rows": n,
+             "joblib_rows_per_second": timings["joblib"],
+             "vectorized_rows_per_second": timings["vectorized"],
+             "speedup": timings["vectorized"] / timings["joblib"]})
+
+
+def benchmark_string_backends(n=25000, repeat=3, seed=0):
+    """
+    Runs `ProcessStrings` and `ProcessGeo` with the 'python' and 'arrow' string backends on synthetic input, returning
+    rows per second of both and the memory their outputs hold. The 'arrow' backend keeps string columns in pyarrow
+    between steps, the 'python' backend in Python objects. Raises an error if the backends return different values.
+
+    Parameters
+    ----------
+    n: int
+        Number of rows, the chunk size of a run by default
+    repeat: int
+        Number of times to run each stage, the best time is kept
+    seed: int
+        Seed of the random number generator
+    """
+    from zrp.benchmark.synthetic import generate_synthetic
+    from zrp.prepare.preprocessing import ProcessStrings, ProcessGeo
+
+    data = generate_synthetic(n, seed=seed)
+    stages = {"ProcessStrings": lambda backend, data: ProcessStrings(string_backend=backend).transform(data),
+              "ProcessGeo": lambda backend, data: ProcessGeo(string_backend=backend).transform(data.copy(), processed=True, replicate=True)}
+    inputs = {"python": data, "arrow": data}
+    results = {}
+    for name, stage in stages.items():
+        timings = {}
+        outputs = {}
+        for backend in string_backends:
+            wall_times = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                outputs[backend] = stage(backend, inputs[backend])
+                wall_times.append(time.perf_counter() - start_time)
+            timings[backend] = len(data) / min(wall_times)
+        expected, returned = outputs["python"].astype(object), outputs["arrow"].astype(object)[outputs["python"].columns]
+        mismatched = (expected.fillna("<NA>").values != returned.fillna("<NA>").values).any(axis=1)
+        if mismatched.any():
+            raise AssertionError(f"{name} differs between the string backends on {mismatched.sum()} of {len(expected)} rows")
+        inputs = outputs
+        results[name] = {"n_rows": len(data),
+                         "python_rows_per_second": timings["python"],
+                         "arrow_rows_per_second": timings["arrow"],
+                         "python_mb": frame_mb(outputs["python"]),
+                         "arrow_mb": frame_mb(outputs["arrow"]),
+                         "memory_saved_mb": frame_mb(outputs["python"]) - frame_mb(outputs["arrow"])}
+    return (results)
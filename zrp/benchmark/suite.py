@@ -0,0 +1,326 @@
+from zrp.benchmark.synthetic import generate_synthetic, sizes
+from zrp.profiling import peak_rss_mb
+from zrp.about import __version__
+import pandas as pd
+import subprocess
+import tempfile
+import json
+import time
+import sys
+import os
+
+
+all_entry_points = ["ZRP", "ZRP_Prepare", "ZGeo", "ACSModelPrep", "ZRP_Predict", "BISGWrapper", "ZRP_Build"]
+
+# Modules timed by `benchmark_imports`, and the heavy dependencies each may load when imported
+import_targets = {"zrp": [], "zrp.prepare": [], "zrp.session": ["pandas", "numpy", "pyarrow"], "zrp.cli": [], "zrp.zrp": None}
+heavy_modules = ["xgboost", "surgeo", "sklearn", "pycm", "category_encoders", "feature_engine", "fiona", "censusdata",
+                 "pandas", "numpy", "pyarrow"]
+
+
+def time_call(func, n_rows, repeat=1):
+    """
+    Times a call, returning the best wall time of `repeat` runs, rows per second, and peak RSS
+
+    Parameters
+    ----------
+    func: callable
+        Function to time, called without arguments
+    n_rows: int
+        Number of rows the call processes
+    repeat: int
+        Number of times to run the call
+    """
+    wall_times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        out = func()
+        wall_times.append(time.perf_counter() - start_time)
+    wall_time = min(wall_times)
+    result = {"n_rows": n_rows,
+              "wall_time": wall_time,
+              "rows_per_second": n_rows / wall_time if wall_time > 0 else None,
+              "peak_rss_mb": peak_rss_mb()}
+    return (result, out)
+
+
+def benchmark_imports(modules=None, repeat=3):
+    """
+    Times importing each module in a fresh interpreter and lists the heavy dependencies it loads. Import times are
+    stored under 'import <module>' so they can be compared between versions like entry points.
+
+    Parameters
+    ----------
+    modules: list, optional
+        Modules to import. The modules in `import_targets` are imported if not provided.
+    repeat: int
+        Number of times to import each module, the best time is kept
+    """
+    if modules is None:
+        modules = list(import_targets)
+    script = ("import sys, time, json; start_time = time.perf_counter(); import {module}; "
+              "wall_time = time.perf_counter() - start_time; "
+              "print(json.dumps([wall_time, [m for m in {heavy_modules} if m in sys.modules]]))")
+    results = {}
+    for module in modules:
+        wall_times = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", script.format(module=module, heavy_modules=heavy_modules)],
+                                 capture_output=True, text=True, check=True)
+            wall_time, loaded = json.loads(out.stdout.strip().splitlines()[-1])
+            wall_times.append(wall_time)
+        results[f"import {module}"] = {"wall_time": min(wall_times), "heavy_modules": loaded}
+    return (results)
+
+
+def check_imports(results=None):
+    """
+    Raises an error if importing a module of `import_targets` loads heavy dependencies it is not allowed to load
+
+    Parameters
+    ----------
+    results: dict, optional
+        Results returned by `benchmark_imports`. Imports are benchmarked if not provided.
+    """
+    if results is None:
+        results = benchmark_imports(repeat=1)
+    eager_imports = {}
+    for module, allowed in import_targets.items():
+        result = results.get(f"import {module}")
+        if (result is None) or (allowed is None):
+            continue
+        loaded = set(result["heavy_modules"]) - set(allowed)
+        if len(loaded) > 0:
+            eager_imports[module] = sorted(loaded)
+    if len(eager_imports) > 0:
+        raise AssertionError(f"Heavy dependencies are loaded on import, they need to be imported where they are used: {eager_imports}")
+    return True
+
+
+def benchmark_entry_points(data, pipe_path=None, entry_points=None, repeat=1, out_path=None, data_path=None):
+    """
+    Times each public entry point of ZRP on the same input. Support files are loaded once into a session up front,
+    so load time is reported separately and not counted in the entry point times.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Input data with the columns of the sample data in `tests/data`
+    pipe_path: str, optional
+        Folder path to directory containing pipelines. The packaged pipelines are used if not provided.
+    entry_points: list, optional
+        Entry points to time. All entry points except 'ZRP_Build' are timed if not provided.
+    repeat: int
+        Number of times to run each entry point, the best time is kept
+    out_path: str, optional
+        Folder to write artifacts to. A temporary folder is used if not provided.
+    data_path: str, optional
+        Folder of the processed support files, ie written by `make_fixtures`. The package data folder is used if not
+        provided.
+    """
+    from zrp import ZRP
+    from zrp.session import ZRP_Session
+    from zrp.prepare.prepare import ZRP_Prepare
+    from zrp.prepare.preprocessing import ProcessStrings
+    from zrp.prepare.geo_geocoder import ZGeo
+    from zrp.prepare.acs_mapper import ACSModelPrep
+    from zrp.modeling.predict import ZRP_Predict, BISGWrapper
+    from zrp.modeling.pipeline_builder import ZRP_Build
+    from zrp.prepare.geo_geocoder import geo_cache
+
+    if entry_points is None:
+        entry_points = [entry_point for entry_point in all_entry_points if entry_point != "ZRP_Build"]
+    if out_path is None:
+        out_path = tempfile.mkdtemp(prefix="zrp_benchmark_")
+    n_rows = len(data)
+    predict_needed = len(set(entry_points) & {"ZRP", "ZRP_Predict", "BISGWrapper"}) > 0
+    results = {}
+
+    start_time = time.perf_counter()
+    session = ZRP_Session(pipe_path=pipe_path, data_path=data_path).load(models=predict_needed)
+    results["session_load"] = {"wall_time": time.perf_counter() - start_time, "load_times": session.load_times}
+
+    runs = {"n": 0}
+
+    def params():
+        # Each call writes its artifacts under a run name of its own
+        runs["n"] += 1
+        return {"out_path": out_path, "runname": f"benchmark_{runs['n']}"}
+
+    prepared = None
+    if "ZRP" in entry_points:
+        results["ZRP"], _ = time_call(lambda: ZRP(pipe_path=pipe_path, session=session, data_path=data_path, **params()).transform(data), n_rows, repeat)
+
+    if len(set(entry_points) & {"ZRP_Prepare", "ZRP_Predict", "BISGWrapper"}) > 0:
+        def prepare():
+            z_prepare = ZRP_Prepare(session=session, **params())
+            z_prepare.fit(data)
+            return z_prepare.transform(data)
+        result, prepared = time_call(prepare, n_rows, repeat)
+        if "ZRP_Prepare" in entry_points:
+            results["ZRP_Prepare"] = result
+
+    if len(set(entry_points) & {"ZGeo", "ACSModelPrep"}) > 0:
+        gen_process = ProcessStrings(**params())
+        gen_process.fit(data)
+        processed = gen_process.transform(data)
+        state_groups = [(session.inv_state_mapping[s].zfill(2), g) for s, g in processed.groupby("state")
+                        if s in session.inv_state_mapping]
+
+        def geocode():
+            geocoder = ZGeo(session=session, **params())
+            return pd.concat([geocoder.transform(g, geo, processed=True, replicate=True, save_table=False)
+                              for geo, g in state_groups])
+        result, geocoded = time_call(geocode, n_rows, repeat)
+        if "ZGeo" in entry_points:
+            results["ZGeo"] = result
+
+        if "ACSModelPrep" in entry_points:
+            amp = ACSModelPrep(session=session, **params())
+            amp.fit()
+            results["ACSModelPrep"], _ = time_call(lambda: amp.transform(geocoded, False), len(geocoded), repeat)
+
+    if "ZRP_Predict" in entry_points:
+        def predict():
+            z_predict = ZRP_Predict(pipe_path=pipe_path, session=session, **params())
+            z_predict.fit(prepared)
+            return z_predict.transform(prepared, save_table=False)
+        results["ZRP_Predict"], _ = time_call(predict, len(prepared), repeat)
+
+    if "BISGWrapper" in entry_points:
+        bisg_input = prepared.astype(str)
+        bisg_input = bisg_input[~bisg_input.index.duplicated(keep="first")]
+        bisgw = BISGWrapper(session=session, **params())
+        results["BISGWrapper"], _ = time_call(lambda: bisgw.transform(bisg_input), len(bisg_input), repeat)
+
+    results["geo_cache"] = geo_cache.stats()
+
+    if "ZRP_Build" in entry_points:
+        def build():
+            build_params = params()
+            z_build = ZRP_Build(file_path=os.path.join(out_path, build_params["runname"]), runname=build_params["runname"],
+                                data_path=data_path)
+            return z_build.transform(data.copy())
+        results["ZRP_Build"], _ = time_call(build, n_rows, 1)
+    return (results)
+
+
+def run_benchmarks(size_labels=("10k",), pipe_path=None, entry_points=None, repeat=1, results_path=None,
+                   version=None, data_path=None, **synthetic_kwargs):
+    """
+    Generates synthetic input of each size & times each entry point on it, then times importing ZRP's modules under
+    'imports'. Results are stored under the ZRP version in `results_path` so versions can be compared with
+    `compare_results`. Raises an error after storing the results if a module loads heavy dependencies on import.
+
+    Parameters
+    ----------
+    size_labels: list
+        Sizes of synthetic input to time, from '10k', '100k', '1m', and '10m'
+    pipe_path: str, optional
+        Folder path to directory containing pipelines. The packaged pipelines are used if not provided.
+    entry_points: list, optional
+        Entry points to time. All entry points except 'ZRP_Build' are timed if not provided.
+    repeat: int
+        Number of times to run each entry point, the best time is kept
+    results_path: str, optional
+        Json file to store results in. Results are only returned if not provided.
+    version: str, optional
+        Version to store results under. The installed ZRP version is used if not provided.
+    data_path: str, optional
+        Folder of the processed support files, ie written by `make_fixtures`. The package data folder is used if not
+        provided.
+    synthetic_kwargs:
+        Passed on to `generate_synthetic`
+    """
+    if version is None:
+        version = __version__
+    results = {}
+    for size_label in size_labels:
+        print("####################################")
+        print(f"Benchmarking {size_label} rows")
+        print("####################################")
+        data = generate_synthetic(sizes[size_label], **synthetic_kwargs)
+        results[size_label] = benchmark_entry_points(data, pipe_path=pipe_path, entry_points=entry_points, repeat=repeat,
+                                                     data_path=data_path)
+    results["imports"] = benchmark_imports(repeat=max(repeat, 3))
+
+    if results_path is not None:
+        save_results(results, results_path, version)
+    check_imports(results["imports"])
+    return (results)
+
+
+def save_results(results, results_path, version):
+    """
+    Stores benchmark results under a version, keeping the results of other versions in the file
+
+    Parameters
+    ----------
+    results: dict
+        Results returned by `run_benchmarks`
+    results_path: str
+        Json file to store results in
+    version: str
+        Version to store results under
+    """
+    all_results = load_results(results_path)
+    all_results.setdefault(version, {}).update(results)
+    results_dir = os.path.dirname(results_path)
+    if results_dir:
+        os.makedirs(results_dir, exist_ok=True)
+    with open(results_path, "w") as f:
+        json.dump(all_results, f, indent=4)
+
+
+def load_results(results_path):
+    """
+    Loads stored benchmark results keyed by version, empty if none are stored yet
+
+    Parameters
+    ----------
+    results_path: str
+        Json file results are stored in
+    """
+    if not os.path.exists(results_path):
+        return ({})
+    with open(results_path) as f:
+        return (json.load(f))
+
+
+def compare_results(results_path, baseline_version, version, threshold=0.1):
+    """
+    Compares the wall time of each entry point & size between two versions. A ratio above 1 means `version` is
+    slower than `baseline_version`; entries more than `threshold` slower are flagged as regressions.
+
+    Parameters
+    ----------
+    results_path: str
+        Json file results are stored in
+    baseline_version: str
+        Version to compare against
+    version: str
+        Version to compare
+    threshold: float
+        Relative slowdown above which an entry is flagged as a regression
+    """
+    all_results = load_results(results_path)
+    for v in [baseline_version, version]:
+        if v not in all_results:
+            raise KeyError(f"No benchmark results stored for version {v} in {results_path}")
+    rows = []
+    for size_label, size_results in all_results[version].items():
+        baseline_size_results = all_results[baseline_version].get(size_label, {})
+        for entry_point, result in size_results.items():
+            if not ((entry_point in all_entry_points) or entry_point.startswith("import ")):
+                continue
+            if entry_point not in baseline_size_results:
+                continue
+            baseline_wall_time = baseline_size_results[entry_point]["wall_time"]
+            rows.append({"size": size_label,
+                         "entry_point": entry_point,
+                         "baseline_wall_time": baseline_wall_time,
+                         "wall_time": result["wall_time"],
+                         "ratio": result["wall_time"] / baseline_wall_time})
+    comparison = pd.DataFrame(rows, columns=["size", "entry_point", "baseline_wall_time", "wall_time", "ratio"])
+    comparison["regression"] = comparison["ratio"] > 1 + threshold
+    return (comparison)
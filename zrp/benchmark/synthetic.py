@@ -0,0 +1,155 @@
+import pandas as pd
+import numpy as np
+
+
+sizes = {"10k": 10000, "100k": 100000, "1m": 1000000, "10m": 10000000}
+
+# Cities & zip codes of each state records are generated for
+state_profiles = {
+    "AL": [("BIRMINGHAM", "35203"), ("MONTGOMERY", "36104"), ("MOBILE", "36602"), ("HUNTSVILLE", "35801")],
+    "CA": [("LOS ANGELES", "90012"), ("SAN DIEGO", "92101"), ("SAN JOSE", "95113"), ("FRESNO", "93721"), ("OAKLAND", "94612")],
+    "FL": [("MIAMI", "33130"), ("ORLANDO", "32801"), ("TAMPA", "33602"), ("JACKSONVILLE", "32202"), ("MELBOURNE", "32940")],
+    "GA": [("ATLANTA", "30303"), ("SAVANNAH", "31401"), ("COVINGTON", "30016"), ("SNELLVILLE", "30039"), ("CUMMING", "30041")],
+    "IL": [("CHICAGO", "60602"), ("SPRINGFIELD", "62701"), ("PEORIA", "61602"), ("ROCKFORD", "61101")],
+    "NY": [("NEW YORK", "10007"), ("BUFFALO", "14202"), ("ROCHESTER", "14604"), ("ALBANY", "12207")],
+    "NC": [("CHARLOTTE", "28202"), ("RALEIGH", "27601"), ("DURHAM", "27701"), ("GREENSBORO", "27401")],
+    "SC": [("COLUMBIA", "29205"), ("CLOVER", "29710"), ("CHERAW", "29520"), ("EARLY BRANCH", "29916"), ("CHARLESTON", "29401")],
+    "TX": [("HOUSTON", "77002"), ("DALLAS", "75201"), ("SAN ANTONIO", "78205"), ("AUSTIN", "78701"), ("EL PASO", "79901")],
+    "WA": [("SEATTLE", "98104"), ("SPOKANE", "99201"), ("TACOMA", "98402"), ("OLYMPIA", "98501")],
+}
+
+race_weights = {"WHITE": 0.582431051175432, "HISPANIC": 0.20265969066824, "BLACK": 0.140751100444378,
+                "AIAN": 0.00917898111532281, "AAPI": 0.0649791765966274}
+
+last_names = {
+    "WHITE": ["SMITH", "JOHNSON", "MILLER", "DAVIS", "WILSON", "ANDERSON", "TAYLOR", "THOMAS", "MOORE", "MARTIN",
+              "THOMPSON", "WHITE", "CLARK", "LEWIS", "ALLEN", "YOUNG", "KING", "WRIGHT", "HILL", "SCOTT",
+              "GREEN", "ADAMS", "BAKER", "NELSON", "CARTER", "MITCHELL", "ROBERTS", "PHILLIPS", "CAMPBELL", "PARKER",
+              "EVANS", "EDWARDS", "COLLINS", "STEWART", "MORRIS", "MURPHY", "COOK", "ROGERS", "MORGAN", "COOPER",
+              "KRUEGER", "SCHWARTZ", "SCHMITT", "MUELLER", "BRIDGES", "HORN", "ARTMAN", "SNYDER", "WAGNER", "BECKER"],
+    "HISPANIC": ["GARCIA", "RODRIGUEZ", "MARTINEZ", "HERNANDEZ", "LOPEZ", "GONZALEZ", "PEREZ", "SANCHEZ", "RAMIREZ", "TORRES",
+                 "FLORES", "RIVERA", "GOMEZ", "DIAZ", "CRUZ", "REYES", "MORALES", "GUTIERREZ", "ORTIZ", "CHAVEZ",
+                 "RAMOS", "RUIZ", "ALVAREZ", "MENDOZA", "CASTILLO", "JIMENEZ", "VASQUEZ", "MORENO", "HERRERA", "MEDINA"],
+    "BLACK": ["WILLIAMS", "JOHNSON", "SMITH", "JONES", "BROWN", "JACKSON", "DAVIS", "THOMAS", "HARRIS", "ROBINSON",
+              "TAYLOR", "WILSON", "MOORE", "WHITE", "WASHINGTON", "JEFFERSON", "BANKS", "MOSLEY", "JENKINS", "HOLMES",
+              "BOOKER", "GAINES", "DORSEY", "SIMMONS", "COLEMAN", "PATTERSON", "JOSEPH", "BRYANT", "ALEXANDER", "GRAHAM"],
+    "AIAN": ["BEGAY", "YAZZIE", "BENALLY", "TSOSIE", "NEZ", "CHEE", "JIM", "LOCKLEAR", "OXENDINE", "HUNT",
+             "SILVERSMITH", "WHITEHORSE", "TWOBULLS", "REDCLOUD", "LONGHORN", "ATCITTY", "HARJO", "MANUELITO", "TSINIGINE", "YELLOWHAIR"],
+    "AAPI": ["NGUYEN", "NGO", "LEE", "KIM", "PATEL", "TRAN", "CHEN", "WANG", "LI", "LE",
+             "PARK", "PHAM", "ZHANG", "HUANG", "LIU", "SINGH", "CHOI", "YANG", "WU", "NAKAMURA",
+             "TANAKA", "SHAH", "KAUR", "HOANG", "CHANG", "LIN", "SATO", "VU", "DANG", "YAMAMOTO"],
+}
+
+first_names = {
+    "FEMALE": ["MARY", "PATRICIA", "JENNIFER", "LINDA", "ELIZABETH", "BARBARA", "SUSAN", "JESSICA", "SARAH", "KAREN",
+               "MARIA", "ANA", "ROSA", "GUADALUPE", "KEISHA", "LATOYA", "EBONY", "MEI", "PRIYA", "LINH",
+               "GABBY", "REBEKAH", "EMILY", "ASHLEY", "OLIVIA", "SOPHIA", "ISABELLA", "CAMILA", "AALIYAH", "HANNAH"],
+    "MALE": ["JAMES", "JOHN", "ROBERT", "MICHAEL", "WILLIAM", "DAVID", "RICHARD", "JOSEPH", "THOMAS", "CHARLES",
+             "JOSE", "LUIS", "CARLOS", "JUAN", "JAMAAL", "DARNELL", "TYRONE", "WEI", "RAJ", "MINH",
+             "SAM", "HENRY", "JEDIDIAH", "BENJAMIN", "DANIEL", "MATTHEW", "ANTHONY", "MARK", "KEVIN", "BRIAN"],
+}
+
+street_names = ["MAIN", "OAK", "PINE", "MAPLE", "CEDAR", "ELM", "WASHINGTON", "LAKE", "HILL", "PARK",
+                "GRAYS MARKET", "SANDBAR", "KERSHAW", "DUNCAN", "EMPERORS", "TIMBERWOODS", "ENGRACIA", "CHARLESTON",
+                "MAN O WAR", "FENROSE", "BRIGHTWOOD", "11TH", "2ND", "MARTIN LUTHER KING JR", "SUNSET", "RIVERSIDE",
+                "JEFFERSON", "LINCOLN", "MADISON", "FRANKLIN", "HIGHLAND", "MEADOW", "FOREST", "SPRING", "VALLEY", "CHURCH"]
+street_suffixes = ["ST", "RD", "AVE", "DR", "LN", "CT", "CIR", "PL", "WAY", "BLVD", "PT", "CV", "PKWY", "TRL"]
+directionals = ["N", "S", "E", "W"]
+
+
+def generate_synthetic(n_rows, state_mix=None, duplicate_rate=0.05, missing_geoid_rate=0.1,
+                       compound_surname_rate=0.05, seed=0):
+    """
+    Generates a synthetic frame of names & addresses with the columns of the sample data in `tests/data`
+
+    Parameters
+    ----------
+    n_rows: int or str
+        Number of rows to generate, or one of the size labels '10k', '100k', '1m', and '10m'
+    state_mix: dict, optional
+        Share of records in each state, keyed by 2-letter state code. States are equally likely if not provided.
+    duplicate_rate: float
+        Share of records that repeat the name & address of another record under a new key
+    missing_geoid_rate: float
+        Share of records without a house number & street address, which cannot be geocoded to a block group
+        or census tract
+    compound_surname_rate: float
+        Share of records with a compound surname (ie 'GARCIA LOPEZ' or 'SMITH-JONES')
+    seed: int
+        Seed of the random number generator
+    """
+    n_rows = sizes.get(n_rows, n_rows)
+    rng = np.random.default_rng(seed)
+    if state_mix is None:
+        state_mix = {state: 1.0 for state in state_profiles}
+    unknown_states = set(state_mix) - set(state_profiles)
+    if len(unknown_states) > 0:
+        raise ValueError(f"Synthetic records cannot be generated for states: {sorted(unknown_states)}. Available states: {sorted(state_profiles)}")
+    states = np.array(list(state_mix))
+    state_p = np.array(list(state_mix.values()), dtype=float)
+
+    races = np.array(list(race_weights))
+    race_p = np.array(list(race_weights.values()))
+    race = rng.choice(races, n_rows, p=race_p / race_p.sum())
+    sex = rng.choice(np.array(["FEMALE", "MALE"]), n_rows)
+
+    last_name = np.empty(n_rows, dtype=object)
+    for r in races:
+        mask = race == r
+        last_name[mask] = rng.choice(np.array(last_names[r], dtype=object), mask.sum())
+    compound = rng.random(n_rows) < compound_surname_rate
+    second_last_name = np.empty(compound.sum(), dtype=object)
+    for r in races:
+        mask = race[compound] == r
+        second_last_name[mask] = rng.choice(np.array(last_names[r], dtype=object), mask.sum())
+    separator = rng.choice(np.array([" ", "-"], dtype=object), compound.sum())
+    last_name[compound] = last_name[compound] + separator + second_last_name
+
+    first_name = np.empty(n_rows, dtype=object)
+    for s in ["FEMALE", "MALE"]:
+        mask = sex == s
+        first_name[mask] = rng.choice(np.array(first_names[s], dtype=object), mask.sum())
+    middle_name = rng.choice(np.array(list("ABCDEFGHJKLMRST") + [None], dtype=object), n_rows)
+
+    state = rng.choice(states, n_rows, p=state_p / state_p.sum())
+    city = np.empty(n_rows, dtype=object)
+    zip_code = np.empty(n_rows, dtype=object)
+    for s in states:
+        mask = state == s
+        places = rng.integers(0, len(state_profiles[s]), mask.sum())
+        city[mask] = np.array([place[0] for place in state_profiles[s]], dtype=object)[places]
+        zip_code[mask] = np.array([place[1] for place in state_profiles[s]], dtype=object)[places]
+
+    house_number = rng.integers(1, 10000, n_rows).astype(str).astype(object)
+    street_address = (rng.choice(np.array(street_names, dtype=object), n_rows) + " "
+                      + rng.choice(np.array(street_suffixes, dtype=object), n_rows))
+    has_directional = rng.random(n_rows) < 0.1
+    street_address[has_directional] = (rng.choice(np.array(directionals, dtype=object), has_directional.sum())
+                                       + " " + street_address[has_directional])
+    missing_geoid = rng.random(n_rows) < missing_geoid_rate
+    house_number[missing_geoid] = None
+    street_address[missing_geoid] = None
+
+    data = pd.DataFrame({"first_name": first_name,
+                         "middle_name": middle_name,
+                         "last_name": last_name,
+                         "house_number": house_number,
+                         "street_address": street_address,
+                         "city": city,
+                         "state": state,
+                         "zip_code": zip_code,
+                         "original_race": race,
+                         "race": race,
+                         "original_sex": sex,
+                         "sex": sex,
+                         "age": rng.integers(18, 90, n_rows).astype(str)})
+
+    # Duplicates repeat an earlier record's name & address
+    duplicate = np.flatnonzero(rng.random(n_rows) < duplicate_rate)
+    duplicate = duplicate[duplicate > 0]
+    if len(duplicate) > 0:
+        sources = (rng.random(len(duplicate)) * duplicate).astype(int)
+        data.iloc[duplicate] = data.iloc[sources].values
+
+    data.insert(0, "ZEST_KEY", data["state"].str.cat(pd.Series(np.arange(n_rows)).astype(str).str.zfill(9), sep="_"))
+    return (data)
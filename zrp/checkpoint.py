@@ -0,0 +1,168 @@
+import pandas as pd
+import hashlib
+import json
+import os
+
+
+def data_fingerprint(data):
+    """
+    Returns a hash of the contents & row order of a dataframe, used to check that a resumed run is given the same input
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Input data of the run
+    """
+    row_hashes = pd.util.hash_pandas_object(data, index=True).values
+    return (hashlib.sha1(row_hashes.tobytes()).hexdigest())
+
+
+def write_atomic(path, write):
+    """
+    Writes a file through a temporary file that is renamed into place, so the file is either complete or absent
+
+    Parameters
+    ----------
+    path: str
+        File path to write
+    write: callable
+        Function writing to the temporary file path it is given
+    """
+    folder, file_name = os.path.split(path)
+    tmp_path = os.path.join(folder, f".{file_name}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class RunManifest():
+    """
+    Records which chunks of a chunked run have finished and where their outputs live, so a run that stops part way
+    can be restarted without repeating the finished chunks. Each finished chunk writes its outputs and a record of
+    its input row range to its own files, so chunks processed in separate worker processes never write to the
+    same file.
+
+    Parameters
+    ----------
+    path: str
+        Folder to keep the manifest & chunk outputs in
+    n_rows: int
+        Number of input rows of the run
+    chunk_size: int
+        Number of rows processed in each chunk
+    fingerprint: str, optional
+        Hash of the input data, see `data_fingerprint`
+    """
+
+    def __init__(self, path, n_rows, chunk_size, fingerprint=None):
+        self.path = path
+        self.config = {"n_rows": n_rows, "chunk_size": chunk_size, "fingerprint": fingerprint}
+        self.manifest_file = os.path.join(path, "run_manifest.json")
+
+    def exists(self):
+        """
+        Whether a manifest was started by a previous run
+        """
+        return (os.path.exists(self.manifest_file))
+
+    def recorded_config(self):
+        """
+        Returns the input size, chunk size, and input hash recorded by the run that started the manifest
+        """
+        with open(self.manifest_file) as f:
+            return (json.load(f))
+
+    def start(self):
+        """
+        Starts a new manifest, or checks that the manifest of a previous run matches this run's input.
+        """
+        if self.exists():
+            if self.recorded_config() != self.config:
+                raise ValueError(f"Run cannot be resumed, its input data or chunk size differs from the run recorded in {self.manifest_file}. New value of 'runname' parameter needs to be specified.")
+            print(f"Resuming run, {len(self.completed_chunks())} completed chunks found in {self.path}")
+        else:
+            os.makedirs(self.path, exist_ok=True)
+
+            def write(tmp_path):
+                with open(tmp_path, "w") as f:
+                    json.dump(self.config, f, indent=4)
+            write_atomic(self.manifest_file, write)
+        return self
+
+    def chunk_file(self, chunk):
+        """
+        Returns the file path of a chunk's record
+
+        Parameters
+        ----------
+        chunk: int
+            Chunk number
+        """
+        return (os.path.join(self.path, f"chunk_{chunk:05d}.json"))
+
+    def completed_chunks(self):
+        """
+        Returns the numbers of all finished chunks
+        """
+        chunks = []
+        for file in os.listdir(self.path):
+            if file.startswith("chunk_") and file.endswith(".json"):
+                chunks.append(int(file[len("chunk_"):-len(".json")]))
+        return (sorted(chunks))
+
+    def is_complete(self, chunk):
+        """
+        Whether a chunk has finished
+
+        Parameters
+        ----------
+        chunk: int
+            Chunk number
+        """
+        return (os.path.exists(self.chunk_file(chunk)))
+
+    def save_chunk(self, chunk, outputs):
+        """
+        Saves the outputs of a finished chunk, then records the chunk as finished
+
+        Parameters
+        ----------
+        chunk: int
+            Chunk number
+        outputs: dict
+            Dataframes to save keyed by output name. None values are recorded but not saved.
+        """
+        chunk_size = self.config["chunk_size"]
+        record = {"chunk": chunk,
+                  "rows": [chunk * chunk_size, min((chunk + 1) * chunk_size, self.config["n_rows"])],
+                  "outputs": {}}
+        for name, data in outputs.items():
+            if data is None:
+                record["outputs"][name] = None
+                continue
+            file_name = f"chunk_{chunk:05d}_{name}.parquet"
+            write_atomic(os.path.join(self.path, file_name), data.to_parquet)
+            record["outputs"][name] = file_name
+
+        def write(tmp_path):
+            with open(tmp_path, "w") as f:
+                json.dump(record, f, indent=4)
+        write_atomic(self.chunk_file(chunk), write)
+
+    def load_chunk(self, chunk):
+        """
+        Loads the outputs of a finished chunk, keyed by output name
+
+        Parameters
+        ----------
+        chunk: int
+            Chunk number
+        """
+        with open(self.chunk_file(chunk)) as f:
+            record = json.load(f)
+        outputs = {}
+        for name, file_name in record["outputs"].items():
+            if file_name is None:
+                outputs[name] = None
+            else:
+                outputs[name] = pd.read_parquet(os.path.join(self.path, file_name))
+        return (outputs)
@@ -0,0 +1,306 @@
+import plac
+import os
+
+
+output_formats = ["csv", "parquet", "feather", "dataset"]
+
+# Input column names, matching the parameters of BaseZRP
+column_options = [
+    ("key", "Name of key column", "k"),
+    ("first_name", "Name of first name column", "f"),
+    ("middle_name", "Name of middle name column", "m"),
+    ("last_name", "Name of last name/surname column", "l"),
+    ("house_number", "Name of house number column", "n"),
+    ("street_address", "Name of street address column", "a"),
+    ("city", "Name of city column", "c"),
+    ("state", "Name of state column", "s"),
+    ("zip_code", "Name of zip or postal code column", "z"),
+    ("race", "Name of race column", "r"),
+    ("census_tract", "Name of Census tract column", "t"),
+    ("block_group", "Name of Census block group column", "g"),
+    ("street_address_2", "Name of additional address column", "A"),
+    ("name_prefix", "Name of column containing full name prefix", "X"),
+    ("name_suffix", "Name of column containing full name suffix", "x"),
+]
+
+
+def with_column_options(command):
+    """
+    Adds an option for each input column name to a command
+    """
+    for name, help_text, abbrev in column_options:
+        command = plac.opt(name, help_text, type=str, abbrev=abbrev)(command)
+    return command
+
+
+def column_kwargs(values):
+    """
+    Returns the input column names given to a command
+
+    Parameters
+    ----------
+    values: dict
+        Arguments of the command
+    """
+    return {name: values[name] for name, _, _ in column_options}
+
+
+def resolve_output_path(output_path, output_format=None):
+    """
+    Returns the output path with the extension of the output format. Without an output format the format is taken
+    from the extension of the path, paths without a csv, parquet, or feather extension are written as parquet
+    datasets.
+
+    Parameters
+    ----------
+    output_path: str
+        File path or dataset folder to write to
+    output_format: str, optional
+        One of 'csv', 'parquet', 'feather', or 'dataset'
+    """
+    if output_format is None:
+        return output_path
+    if output_format == "dataset":
+        from zrp.stream import batch_file_formats
+        if output_path.endswith(batch_file_formats):
+            raise ValueError(f"A parquet dataset is written to a folder, not to a file: {output_path}")
+        return output_path
+    extension = f".{output_format}"
+    if output_path.endswith(extension):
+        return output_path
+    return output_path + extension
+
+
+@with_column_options
+@plac.pos("input_path", "csv, parquet, or feather file of records to predict")
+@plac.pos("output_path", "File or parquet dataset folder to write proxies to")
+@plac.opt("bisg_output_path", "File or parquet dataset folder to write BISG proxies to", type=str, abbrev="B")
+@plac.opt("pipe_path", "Folder containing pipelines", type=str, abbrev="P")
+@plac.opt("workers", "Number of worker processes chunks are sent to", type=int, abbrev="w")
+@plac.opt("chunk_size", "Number of rows processed in each iteration", type=int, abbrev="C")
+@plac.opt("batch_size", "Number of input rows read at a time", type=int, abbrev="b")
+@plac.flg("no_bisg", "Do not generate BISG proxies", abbrev="N")
+@plac.opt("output_format", "Output format, taken from the output path extension if not given", choices=output_formats, abbrev="o")
+@plac.opt("partition_by", "Column to partition parquet dataset output by", type=str, abbrev="p")
+@plac.opt("runname", "Name of the run, used to name artifacts", type=str, abbrev="R")
+@plac.opt("out_path", "Folder to write artifacts to", type=str, abbrev="d")
+@plac.opt("year", "ACS year to use", type=str, abbrev="y")
+@plac.opt("span", "Year span of ACS data to use", type=str, abbrev="S")
+@plac.opt("string_backend", "How strings are cleaned while preparing data", choices=["python", "arrow"], abbrev="u")
+@plac.flg("parse_address", "Geocode each street address by one parsed street key instead of replicating its variants", abbrev="e")
+@plac.flg("geo_index", "Join addresses only to the lookup table segments of their street in their zip code", abbrev="i")
+def predict(input_path, output_path, bisg_output_path=None, pipe_path=None, workers=None, chunk_size=25000,
+            batch_size=100000, no_bisg=False, output_format=None, partition_by=None, runname=None, out_path=None,
+            year="2019", span="5", string_backend="python", parse_address=False, geo_index=False, key="ZEST_KEY", first_name="first_name", middle_name="middle_name",
+            last_name="last_name", house_number="house_number", street_address="street_address", city="city",
+            state="state", zip_code="zip_code", race="race", census_tract=None, block_group=None,
+            street_address_2=None, name_prefix=None, name_suffix=None):
+    """
+    Generates race & ethnicity proxies for every record of a file, reading & writing in batches of rows
+    """
+    from zrp.zrp import ZRP
+
+    columns = column_kwargs(locals())
+    output_path = resolve_output_path(output_path, output_format)
+    if bisg_output_path is not None:
+        bisg_output_path = resolve_output_path(bisg_output_path, output_format)
+    zest_race_predictor = ZRP(pipe_path=pipe_path, bisg=not no_bisg, runname=runname, out_path=out_path, year=year,
+                              span=span, string_backend=string_backend, parse_address=parse_address, geo_index=geo_index, **columns)
+    zest_race_predictor.transform_file(input_path, output_path, batch_size=batch_size, chunk_size=chunk_size,
+                                       workers=workers, bisg_output_path=bisg_output_path, partition_by=partition_by)
+
+
+def chunks_path(params):
+    """
+    Returns the folder the artifacts folders of chunks prepared in worker processes are written to
+
+    Parameters
+    ----------
+    params: dict
+        Parameters of ZRP_Prepare
+    """
+    chunks_folder = f"chunks_{params['runname']}" if params.get("runname") else "chunks"
+    return (os.path.join(params.get("out_path") or "artifacts", chunks_folder))
+
+
+def _prepare_chunk(params, data_chunk, chunk=None):
+    """
+    Prepares one chunk of input data. In a worker process the worker's shared session is used and the chunk's
+    artifacts are written to a folder of its own, moved to the artifacts folder by `prepare` once the chunk is written.
+
+    Parameters
+    ----------
+    params: dict
+        Parameters of ZRP_Prepare
+    data_chunk: pd.DataFrame
+        Chunk of input data
+    chunk: int, optional
+        Chunk number, given when the chunk is prepared in a worker process
+    """
+    from zrp.prepare.prepare import ZRP_Prepare
+    from zrp.session import shared_session
+
+    if chunk is not None:
+        params = dict(params, out_path=os.path.join(chunks_path(params), f"chunk_{chunk:05d}"))
+    session = shared_session(year=params["year"], span=params["span"], models=False)
+    z_prepare = ZRP_Prepare(session=session, **params)
+    z_prepare.fit(data_chunk)
+    return (z_prepare.transform(data_chunk))
+
+
+@with_column_options
+@plac.pos("input_path", "csv, parquet, or feather file of records to prepare")
+@plac.pos("output_path", "File or parquet dataset folder to write prepared data to")
+@plac.opt("workers", "Number of worker processes chunks are sent to", type=int, abbrev="w")
+@plac.opt("chunk_size", "Number of rows processed in each iteration", type=int, abbrev="C")
+@plac.opt("batch_size", "Number of input rows read at a time", type=int, abbrev="b")
+@plac.opt("output_format", "Output format, taken from the output path extension if not given", choices=output_formats, abbrev="o")
+@plac.opt("runname", "Name of the run, used to name artifacts", type=str, abbrev="R")
+@plac.opt("out_path", "Folder to write artifacts to", type=str, abbrev="d")
+@plac.opt("year", "ACS year to use", type=str, abbrev="y")
+@plac.opt("span", "Year span of ACS data to use", type=str, abbrev="S")
+@plac.opt("string_backend", "How strings are cleaned while preparing data", choices=["python", "arrow"], abbrev="u")
+@plac.flg("parse_address", "Geocode each street address by one parsed street key instead of replicating its variants", abbrev="e")
+@plac.flg("geo_index", "Join addresses only to the lookup table segments of their street in their zip code", abbrev="i")
+def prepare(input_path, output_path, workers=None, chunk_size=25000, batch_size=100000, output_format=None,
+            runname=None, out_path=None, year="2019", span="5", string_backend="python", parse_address=False, geo_index=False, key="ZEST_KEY", first_name="first_name",
+            middle_name="middle_name", last_name="last_name", house_number="house_number",
+            street_address="street_address", city="city", state="state", zip_code="zip_code", race="race",
+            census_tract=None, block_group=None, street_address_2=None, name_prefix=None, name_suffix=None):
+    """
+    Geocodes every record of a file and joins ACS data, writing the prepared data in batches of rows
+    """
+    from joblib import Parallel, delayed
+    from zrp.session import shared_session
+    from zrp.stream import read_batches, output_writer
+    from zrp.prepare.utils import collect_chunk_artifacts
+
+    params = dict(column_kwargs(locals()), runname=runname, out_path=out_path, year=year, span=span,
+                  string_backend=string_backend, parse_address=parse_address, geo_index=geo_index)
+    output_path = resolve_output_path(output_path, output_format)
+    parallel = (workers is not None) and (workers > 1)
+    # Every batch is written with the columns of all ACS tables, whichever tables its records matched
+    acs_cols = set()
+    for acs_table in shared_session(year=year, span=span, models=False).acs_tables:
+        acs_cols = acs_cols.union(acs_table.columns)
+
+    chunk = 0
+    with output_writer(output_path) as writer, Parallel(n_jobs=workers if parallel else 1) as parallel_pool:
+        for batch in read_batches(input_path, batch_size):
+            if len(batch) == 0:
+                continue
+            batch = batch.sort_values(state)
+            if chunk_size is None:
+                batch_chunks = [batch]
+            else:
+                batch_chunks = [batch[i:i + chunk_size] for i in range(0, len(batch), chunk_size)]
+            if parallel:
+                prepared_chunks = parallel_pool(delayed(_prepare_chunk)(params, data_chunk, chunk + n)
+                                                for n, data_chunk in enumerate(batch_chunks))
+                collect_chunk_artifacts(chunks_path(params), params.get("out_path") or "artifacts")
+            else:
+                prepared_chunks = [_prepare_chunk(params, data_chunk) for data_chunk in batch_chunks]
+            chunk += len(batch_chunks)
+            for prepared_chunk in prepared_chunks:
+                missing_cols = sorted(acs_cols - set(prepared_chunk.columns))
+                writer.write(prepared_chunk.reindex(columns=list(prepared_chunk.columns) + missing_cols))
+    print(f"...{writer.n_rows} prepared rows saved to {output_path}")
+
+
+@with_column_options
+@plac.pos("input_path", "csv, parquet, or feather file of records with race to build models from")
+@plac.opt("file_path", "Folder to write the artifacts folder with pipelines, models, and supporting data to", type=str, abbrev="d")
+@plac.opt("zrp_model_name", "Name of the model", type=str, abbrev="M")
+@plac.opt("chunk_size", "Number of rows prepared in each iteration", type=int, abbrev="C")
+@plac.opt("test_size", "Fraction of records held out for testing", type=float, abbrev="T")
+@plac.opt("valid_size", "Fraction of records used for validation", type=float, abbrev="V")
+@plac.opt("sources", "Comma separated sources to build models for, from block_group, census_tract, and zip_code", type=str, abbrev="G")
+@plac.opt("runname", "Name of the run, used to name artifacts", type=str, abbrev="R")
+@plac.opt("year", "ACS year to use", type=str, abbrev="y")
+@plac.opt("span", "Year span of ACS data to use", type=str, abbrev="S")
+@plac.flg("checkpoint", "Save prepared chunks so an interrupted build can be resumed", abbrev="K")
+@plac.opt("string_backend", "How strings are cleaned while preparing data", choices=["python", "arrow"], abbrev="u")
+@plac.flg("parse_address", "Geocode each street address by one parsed street key instead of replicating its variants", abbrev="e")
+@plac.flg("geo_index", "Join addresses only to the lookup table segments of their street in their zip code", abbrev="i")
+def build(input_path, file_path=".", zrp_model_name="zrp_0", chunk_size=25000, test_size=0.2, valid_size=0.0,
+          sources=None, runname=None, year="2019", span="5", checkpoint=False, string_backend="python", parse_address=False, geo_index=False, key="ZEST_KEY",
+          first_name="first_name", middle_name="middle_name", last_name="last_name", house_number="house_number",
+          street_address="street_address", city="city", state="state", zip_code="zip_code", race="race",
+          census_tract=None, block_group=None, street_address_2=None, name_prefix=None, name_suffix=None):
+    """
+    Builds custom ZRP pipelines & models from a file of records with race. Training samples from every record, so
+    the whole file is loaded; data preparation runs in chunks.
+    """
+    from zrp.modeling.pipeline_builder import ZRP_Build
+    from zrp.prepare.utils import load_file
+
+    columns = column_kwargs(locals())
+    if sources is not None:
+        sources = sources.split(",")
+    z_build = ZRP_Build(file_path=file_path, zrp_model_name=zrp_model_name, test_size=test_size,
+                        valid_size=valid_size, sources=sources, runname=runname, year=year, span=span,
+                        string_backend=string_backend, parse_address=parse_address, geo_index=geo_index, **columns)
+    z_build.transform(load_file(input_path), chunk_size=chunk_size, checkpoint=checkpoint)
+
+
+@with_column_options
+@plac.opt("host", "Address to listen on", type=str, abbrev="H")
+@plac.opt("port", "Port to listen on", type=int, abbrev="O")
+@plac.opt("pipe_path", "Folder containing pipelines", type=str, abbrev="P")
+@plac.opt("max_batch_rows", "Most rows coalesced into one batch", type=int, abbrev="b")
+@plac.opt("max_wait_ms", "Longest a request waits for other requests to join its batch, in milliseconds", type=float, abbrev="W")
+@plac.flg("no_bisg", "Do not generate BISG proxies", abbrev="N")
+@plac.opt("runname", "Name of the run, used to name artifacts", type=str, abbrev="R")
+@plac.opt("out_path", "Folder to write artifacts to", type=str, abbrev="d")
+@plac.opt("year", "ACS year to use", type=str, abbrev="y")
+@plac.opt("span", "Year span of ACS data to use", type=str, abbrev="S")
+@plac.opt("string_backend", "How strings are cleaned while preparing data", choices=["python", "arrow"], abbrev="u")
+@plac.flg("parse_address", "Geocode each street address by one parsed street key instead of replicating its variants", abbrev="e")
+@plac.flg("geo_index", "Join addresses only to the lookup table segments of their street in their zip code", abbrev="i")
+def serve(host="127.0.0.1", port=8000, pipe_path=None, max_batch_rows=1000, max_wait_ms=5.0, no_bisg=False,
+          runname="serve", out_path=None, year="2019", span="5", string_backend="python", parse_address=False, geo_index=False, key="ZEST_KEY", first_name="first_name",
+          middle_name="middle_name", last_name="last_name", house_number="house_number",
+          street_address="street_address", city="city", state="state", zip_code="zip_code", race="race",
+          census_tract=None, block_group=None, street_address_2=None, name_prefix=None, name_suffix=None):
+    """
+    Serves race & ethnicity proxies over HTTP with support files & models held in memory, coalescing concurrent
+    requests into batches
+    """
+    from zrp.serve import ZRPServer
+    from zrp.zrp import ZRP
+
+    columns = column_kwargs(locals())
+    zest_race_predictor = ZRP(pipe_path=pipe_path, bisg=not no_bisg, runname=runname, out_path=out_path, year=year,
+                              span=span, string_backend=string_backend, parse_address=parse_address, geo_index=geo_index, **columns)
+    ZRPServer(zest_race_predictor, max_batch_rows=max_batch_rows, max_wait_ms=max_wait_ms).run(host, port)
+
+
+@plac.opt("states", "Comma separated 2-letter state codes to index, every state with a geo lookup table if not given", type=str, abbrev="s")
+@plac.opt("year", "Geo lookup table year", type=str, abbrev="y")
+@plac.opt("geo_path", "Folder containing the geo lookup tables", type=str, abbrev="d")
+def build_index(states=None, year="2019", geo_path=None):
+    """
+    Builds the street & zip code index of each state geo lookup table, written next to the table as
+    Zest_Geo_Index_<year>_State_<fips>.parquet
+    """
+    from zrp.prepare.geo_geocoder import geo_load
+    from zrp.prepare.geo_index import GeoIndex
+    from zrp.prepare.utils import load_json
+    import glob
+    import re
+
+    if geo_path is None:
+        geo_path = os.path.join(os.path.dirname(__file__), "data/processed/geo/2019")
+    if states is not None:
+        inv_state_mapping = load_json(os.path.join(os.path.dirname(__file__), "data/processed/inv_state_mapping.json"))
+        geos = [inv_state_mapping[state.strip().upper()].zfill(2) for state in states.split(",")]
+    else:
+        table_paths = glob.glob(os.path.join(geo_path, f"Zest_Geo_Lookup_{year}_State_*.parquet"))
+        geos = sorted(re.search("_State_([0-9]{2})\\.parquet$", path).group(1) for path in table_paths)
+    if len(geos) == 0:
+        print(f"No geo lookup tables found in {geo_path}")
+    for geo in geos:
+        index_path = os.path.join(geo_path, f"Zest_Geo_Index_{year}_State_{geo}.parquet")
+        geo_index = GeoIndex.build(geo_load(geo, year, geo_path))
+        geo_index.save(index_path)
+        print(f"...{len(geo_index.keys)} street & zip code keys of state {geo} saved to {index_path}")
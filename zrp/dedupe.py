@@ -0,0 +1,66 @@
+import pandas as pd
+
+
+def record_hashes(data, columns):
+    """
+    Returns a hash of each record's normalized input fields. Fields are compared after the same upper casing,
+    whitespace trimming, and missing value handling `ProcessStrings` applies, so records that only differ in
+    those respects share a hash.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Input data
+    columns: list
+        Input fields to hash
+    """
+    normalized = pd.DataFrame(index=data.index)
+    for col in columns:
+        values = data[col].fillna("").astype(str).str.upper().str.strip().str.replace(" +", " ", regex=True)
+        normalized[col] = values.replace("^(NAN|NONE|<NA>)?$", "", regex=True)
+    return (pd.util.hash_pandas_object(normalized, index=False))
+
+
+def dedupe_records(data, key, columns):
+    """
+    Returns the distinct records of the input data, and the key of the record each input row was deduplicated to
+    indexed by the row's own key. The first row of each set of repeated records is kept.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Input data
+    key: str
+        Name of key column
+    columns: list
+        Input fields identifying a record
+    """
+    hashes = record_hashes(data, columns)
+    is_first = ~hashes.duplicated(keep="first").values
+    distinct_data = data[is_first]
+    distinct_keys = pd.Series(data[key].values[is_first], index=hashes.values[is_first])
+    key_map = pd.Series(distinct_keys.reindex(hashes.values).values, index=data[key].values, name="dedupe_key")
+    key_map = key_map[~key_map.index.duplicated(keep="first")]
+    key_map.index.name = key
+    return (distinct_data, key_map)
+
+
+def fan_out(data, key_map):
+    """
+    Returns the rows of each distinct record repeated for every input key deduplicated to it, indexed by the
+    input key
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Proxies or other outputs indexed by the key of the distinct records
+    key_map: pd.Series
+        Key of the distinct record of each input key, as returned by `dedupe_records`
+    """
+    if data is None:
+        return (None)
+    index_name = data.index.name
+    data = key_map.to_frame().merge(data, left_on="dedupe_key", right_index=True, how="inner")
+    data = data.drop("dedupe_key", axis=1)
+    data.index.name = index_name
+    return (data)
@@ -1,8 +1,33 @@
-from .predict import PredictPass, ZRP_Predict_ZipCode, ZRP_Predict_BlockGroup, ZRP_Predict_CensusTract, ZRP_Predict, BISGWrapper, FEtoPredict
-from .performance import ZRP_Performance
-from .pipeline_builder import ZRP_Build_Pipeline, ZRP_Build_Model, ZRP_DataSampling, ZRP_Build
+import importlib
 
+# Submodules are imported the first time one of their names is used, so xgboost, surgeo, and sklearn are only
+# loaded when predicting or building models
+_lazy_imports = {
+    'PredictPass': '.predict',
+    'ZRP_Predict_ZipCode': '.predict',
+    'ZRP_Predict_BlockGroup': '.predict',
+    'ZRP_Predict_CensusTract': '.predict',
+    'ZRP_Predict': '.predict',
+    'BISGWrapper': '.predict',
+    'FEtoPredict': '.predict',
+    'ZRP_Performance': '.performance',
+    'ZRP_Build_Pipeline': '.pipeline_builder',
+    'ZRP_Build_Model': '.pipeline_builder',
+    'ZRP_DataSampling': '.pipeline_builder',
+    'ZRP_Build': '.pipeline_builder',
+}
 
 __all__ = ['PredictPass', 'ZRP_Predict_ZipCode', 'ZRP_Predict_BlockGroup', 
            'ZRP_Predict_CensusTract', 'ZRP_Predict', 'FEtoPredict', 'ZRP_Performance',
           'ZRP_Build_Pipeline', 'ZRP_Build_Model', 'ZRP_DataSampling', 'ZRP_Build']
+
+
+def __getattr__(name):
+    if name in _lazy_imports:
+        module = importlib.import_module(_lazy_imports[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(list(globals()) + list(_lazy_imports)))
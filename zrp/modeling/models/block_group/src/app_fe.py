@@ -46,8 +46,7 @@ class AppFeatureEngineering(BaseEstimator, TransformerMixin):
         self.keys = [self.key, self.geo_key]
 
     def _process_target(self, y): 
-        y_unique = y.unique()
-        y_unique.sort()
+        y_unique = np.sort(y.unique())
         self.n_classes = len(y_unique)
         
         possible_race_classes = ["AAPI", "AIAN",  "BLACK", "HISPANIC", "WHITE"]
@@ -55,8 +54,8 @@ class AppFeatureEngineering(BaseEstimator, TransformerMixin):
         # handle multi-labeled output
         self.mlb = MultiLabelBinarizer(classes = y_unique)
         self.mlb_columns = list(set(possible_race_classes) & set(y_unique))
-        self.mlb.fit(y.values.reshape(-1,1))
-        y_ohe = pd.DataFrame(self.mlb.transform(y.values.reshape(-1,1)), columns=self.mlb_columns)
+        self.mlb.fit(y.to_numpy().reshape(-1,1))
+        y_ohe = pd.DataFrame(self.mlb.transform(y.to_numpy().reshape(-1,1)), columns=self.mlb_columns)
         
         self.le = {}
         for i in range(self.n_classes):
@@ -53,6 +53,9 @@ class HandleCompoundNames(BaseEstimator, TransformerMixin):
         X[self.last_name] = X[self.last_name].str.replace(' +', ' ', regex=True)
 
         compound_name_str_all = X[self.last_name].str.split(' ', expand=True) # split compounds from non_compounds
+        # Return if there're no compound names
+        if compound_name_str_all.shape[1] == 1:
+            return X
         non_compound = X[compound_name_str_all[1].isna()].copy().reset_index(drop=True)
         compound = X[~compound_name_str_all[1].isna()].copy().reset_index(drop=True)
 
@@ -70,7 +73,7 @@ class HandleCompoundNames(BaseEstimator, TransformerMixin):
         compound_tiled[self.last_name] = unrolled_names
         compound_result = compound_tiled[~compound_tiled[self.last_name].isna()]
 
-        joint_result = non_compound.append(compound_result).reset_index(drop=True)
+        joint_result = pd.concat([non_compound, compound_result]).reset_index(drop=True)
 
         return joint_result
 
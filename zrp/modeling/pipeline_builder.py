@@ -8,12 +8,14 @@ import json
 import joblib
 import pickle
 import time
+import inspect
 
 import xgboost
 from xgboost import XGBClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import roc_auc_score
 from feature_engine.imputation import MeanMedianImputer
 from feature_engine.selection import SmartCorrelatedSelection, DropFeatures
@@ -25,6 +27,10 @@ from zrp.modeling.src.set_key import SetKey
 from zrp.prepare.utils import load_json, load_file, save_feather, make_directory
 from zrp.prepare.base import BaseZRP
 from zrp.prepare.prepare import ZRP_Prepare
+from zrp.session import ZRP_Session
+from zrp.checkpoint import RunManifest, data_fingerprint
+from zrp.profiling import profiler
+from zrp.autotune import probe_memory, tune_chunks
 
 
 import warnings
@@ -32,6 +38,9 @@ warnings.filterwarnings(action='ignore')
 
 curpath = dirname(__file__)
 
+# xgboost renamed the custom evaluation metric argument of `train` from feval to custom_metric in 1.6
+feval_arg = "custom_metric" if "custom_metric" in inspect.signature(xgboost.train).parameters else "feval"
+
 
 class ZRP_Build_Pipeline(BaseZRP):
     """
@@ -180,7 +189,7 @@ class ZRP_Build_Model(BaseZRP):
         early_stopping_rounds = opt_params.pop('early_stopping_rounds',None)  
         
         ##### Initialize the zrp_model
-        label_encoder = xgboost.compat.XGBoostLabelEncoder().fit(y[self.race])
+        label_encoder = LabelEncoder().fit(y[self.race])
         y_dummies = label_encoder.transform(y[self.race])
         num_class=len(y[self.race].unique())
         self.zrp_model = XGBClassifier(objective=objective,
@@ -212,19 +221,24 @@ class ZRP_Build_Model(BaseZRP):
                           evals=evals,
                           early_stopping_rounds=early_stopping_rounds,
                           evals_result=evals_result,
-                          feval=feval)  
+                          **{feval_arg: feval})
         elapsed_time = time.time() - start_time
-        self.y_unique = y[self.race].unique().astype(str)
+        self.y_unique = np.asarray(y[self.race].unique()).astype(str)
         print('\n---\nfinished fitting zrp_model....{:.3f}'.format(elapsed_time))
-        setattr(self.zrp_model,'classes_',self.y_unique)
-        setattr(self.zrp_model,'n_classes_',num_class)
-        setattr(self.zrp_model,'_le',label_encoder)    
-        setattr(self.zrp_model,'_Booster',model)  
-        setattr(self.zrp_model,'objective ',objective)
-        setattr(self.zrp_model,'evals_result_ ',evals_result) 
-        setattr(self.zrp_model,'best_score',model.best_score)  
-        setattr(self.zrp_model,'best_iteration',model.best_iteration)   
-        setattr(self.zrp_model,'best_ntree_limit',model.best_ntree_limit)
+        # classes_ & the best_* attributes are read-only properties derived from the booster in newer xgboost
+        # releases, they are only set where the installed release stores them as attributes
+        model_attributes = {'classes_': self.y_unique,
+                            'n_classes_': num_class,
+                            '_le': label_encoder,
+                            '_Booster': model,
+                            'objective ': objective,
+                            'evals_result_ ': evals_result,
+                            'best_score': model.best_score,
+                            'best_iteration': model.best_iteration,
+                            'best_ntree_limit': model.best_iteration + 1}
+        for name, value in model_attributes.items():
+            if not isinstance(getattr(XGBClassifier, name, None), property):
+                setattr(self.zrp_model, name, value)
         
         self.y_unique.sort()
         
@@ -357,11 +371,14 @@ class ZRP_Build(BaseZRP):
         {'gamma': 5,'learning_rate': 0.01,'max_depth': 3,'min_child_weight': 500,'n_estimators': 2000,'subsample': 0.20}
     sources: list (default=None)
         The sources to build a model for.  If None is provided then all sources will be used: ['block_group', 'census_tract', 'zip_code']
+    data_path: str (default=None)
+        Folder of the processed support files, with the layout of `zrp/data/processed`. The package data folder is used if None.
     """
 
-    def __init__(self, file_path=None, zrp_model_name='zrp_0', test_size=0.2, valid_size=0.0, xgb_params=None, sources=None, *args, **kwargs):
+    def __init__(self, file_path=None, zrp_model_name='zrp_0', test_size=0.2, valid_size=0.0, xgb_params=None, sources=None, data_path=None, *args, **kwargs):
         super().__init__(file_path=file_path, *args, **kwargs)
         self.params_dict =  kwargs
+        self.data_path = data_path
         self.zrp_model_name = zrp_model_name
         self.geo_key = 'GEOID'  
         self.test_size = test_size
@@ -440,7 +457,7 @@ class ZRP_Build(BaseZRP):
     def fit(self):
         return self
 
-    def transform(self, data, population_weights_dict = None, chunk_size=25000):
+    def transform(self, data, population_weights_dict = None, chunk_size=25000, checkpoint=False, memory_budget=None):
         """
         Transforms the data
         
@@ -452,8 +469,15 @@ class ZRP_Build(BaseZRP):
             Prevalence of target classes within the USA population as provided by the end-user. Sum of the values provided in the dictionary must be equal to one. Example: {'class1': 0.7, 'class2': 0.3}
         chunk_size: int
             Numer of rows to be processed in each iteration. input_data processed all at once if None is provided.
+        checkpoint: bool, default False
+            Whether to save the prepared data of each chunk to a run manifest as soon as the chunk is prepared. Rerunning
+            with the same `runname` and input data resumes data preparation and skips the completed chunks.
+        memory_budget: float, optional
+            Peak RSS in Mb to keep data preparation under. A small sample of the input is probed first and `chunk_size`
+            is picked to fit the budget. A resumed run keeps the chunk size of the run it resumes.
         """            
         cur_path = dirname(__file__)
+        profiler.reset()
         self.validate_input_columns(data)
         
         standard_population_weights_path = os.path.join(cur_path, '../data/processed/standard_population_weights.json')
@@ -480,25 +504,47 @@ class ZRP_Build(BaseZRP):
                   )
         data = data.drop_duplicates(subset=['ZEST_KEY'])
         
+        session = ZRP_Session(year=self.year, span=self.span, data_path=self.data_path).load(models=False)
+        if memory_budget is not None:
+            resumed_manifest = RunManifest(self.checkpoint_path(), len(data), chunk_size)
+            if checkpoint and resumed_manifest.exists():
+                chunk_size = resumed_manifest.recorded_config()["chunk_size"]
+            else:
+                probe_out_path = os.path.join(self.out_path, "probe")
+
+                def prepare_chunk(data_chunk):
+                    z_prepare = ZRP_Prepare(file_path=self.file_path, session=session, **dict(self.params_dict, out_path=probe_out_path))
+                    z_prepare.fit(data_chunk)
+                    return z_prepare.transform(data_chunk)
+                chunk_size, _ = tune_chunks(memory_budget, probe_memory(prepare_chunk, data), len(data), workers=1)
         if chunk_size is None: 
             chunk_size = len(data) 
         chunk_max = int((len(data)-1)/chunk_size) + 1 
         prepare_out_list = list() 
+        run_manifest = None
+        if checkpoint:
+            run_manifest = RunManifest(self.checkpoint_path(), len(data), chunk_size, data_fingerprint(data)).start()
         
         for chunk in range(chunk_max):  
+            if (run_manifest is not None) and run_manifest.is_complete(chunk):
+                print(f'Loading prepared rows: {chunk*chunk_size}:{(chunk+1)*chunk_size}')
+                prepare_out_list.append(run_manifest.load_chunk(chunk)["prepared"])
+                continue
             print("####################################") 
             print(f'Processing rows: {chunk*chunk_size}:{(chunk+1)*chunk_size}') 
             print("####################################") 
             data_chunk = data[chunk*chunk_size:(chunk+1)*chunk_size] 
             
-            z_prepare = ZRP_Prepare(file_path=self.file_path, **self.params_dict) 
+            z_prepare = ZRP_Prepare(file_path=self.file_path, session=session, **self.params_dict) 
             z_prepare.fit(data_chunk)                                
             prepared_data_chunk = z_prepare.transform(data_chunk)
             print('chunk_size = {}Mb'.format(np.sum(prepared_data_chunk.memory_usage(deep=True))*1.0e-6))
+            if run_manifest is not None:
+                run_manifest.save_chunk(chunk, {"prepared": prepared_data_chunk})
             prepare_out_list.append(prepared_data_chunk) 
         prepared_data = pd.concat(prepare_out_list) 
         prepare_out_list = None
-        display(prepared_data.acs_source.value_counts(dropna=False))
+        print(prepared_data.acs_source.value_counts(dropna=False))
 
         ft_list_source_map = {'census_tract': 'ct', 'block_group': 'bg', 'zip_code': 'zp'}
         source_to_geoid_level_map = {'census_tract': 'GEOID_CT', 'block_group': 'GEOID_BG', 'zip_code': 'GEOID_ZIP'}
@@ -531,7 +577,7 @@ class ZRP_Build(BaseZRP):
             relevant_source_data = prepared_data[(prepared_data['acs_source']==acs_source)]
             ## Add un-geocoded records
             add_nans = prepared_data[~(prepared_data.index.isin(relevant_source_data.index))]
-            relevant_source_data = relevant_source_data.append(add_nans)
+            relevant_source_data = pd.concat([relevant_source_data, add_nans])
             
             print("    ...Data shape pre feature drop: ", relevant_source_data.shape)
             relevant_source_data = relevant_source_data[relevant_source_data.columns.intersection(features_to_keep_list)]
@@ -603,8 +649,10 @@ class ZRP_Build(BaseZRP):
             
             # Build Pipeline
             build_pipe = ZRP_Build_Pipeline(file_path=self.file_path, zrp_model_source=source, zrp_model_name=self.zrp_model_name)
-            build_pipe.fit(X_train, y_train)
-            X_train_fe = build_pipe.transform(X_train)
+            with profiler.stage(f"{source}_build_pipeline", len(X_train)) as stage:
+                build_pipe.fit(X_train, y_train)
+                X_train_fe = build_pipe.transform(X_train)
+                profiler.set_output(stage, X_train_fe)
             X_valid_fe = None
             if X_valid is not None:
                 X_valid_fe = build_pipe.transform(X_valid, "valid_fe_data.feather")
@@ -614,10 +662,11 @@ class ZRP_Build(BaseZRP):
                                           zrp_model_source=source, 
                                           zrp_model_name=self.zrp_model_name,
                                           xgb_params=self.xgb_params)
-            build_model.fit(X_train_fe, y_train, X_valid_fe, y_valid)
+            with profiler.stage(f"{source}_build_model", len(X_train_fe)) as stage:
+                build_model.fit(X_train_fe, y_train, X_valid_fe, y_valid)
             
             print(f"Completed building {source} model.")
         
         print("\n##############################")
         print("Custom ZRP model build complete.")
-        
\ No newline at end of file
+        profiler.save(os.path.join(self.out_path, "experiments", self.zrp_model_name), "zrp_profile.json")
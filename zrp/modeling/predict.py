@@ -5,6 +5,7 @@ from zrp.prepare.acs_mapper import *
 from zrp.prepare.base import BaseZRP
 from zrp.prepare.utils import *
 from zrp.validate import *
+from zrp.profiling import profiler
 import pandas as pd
 import numpy as np
 import warnings
@@ -28,6 +29,67 @@ from zrp.modeling.src.acs_scaler import CustomRatios
 from zrp.modeling.src.app_fe import AppFeatureEngineering, NameAggregation
 
 
+def load_pipeline(pipe_path, model_type):
+    """
+    Loads the pipeline and xgboost model of a model type
+
+    Parameters
+    ----------
+    pipe_path: str
+        Folder path to directory containing pipelines
+    model_type: str
+        One of 'block_group', 'census_tract', or 'zip_code'
+    """
+    src_path = os.path.join(pipe_path, model_type)
+    if src_path not in sys.path:
+        sys.path.append(src_path)
+    model = xgboost.Booster()
+    model.load_model(os.path.join(src_path, "model.txt"))
+    pipe = pd.read_pickle(os.path.join(src_path, "pipe.pkl"))
+    return (pipe, model)
+
+
+def pipeline_transform(pipe, data, model_type):
+    """
+    Runs the steps of a fitted pipeline one at a time, recording each step in the profiler
+
+    Parameters
+    ----------
+    pipe: sklearn.pipeline.Pipeline
+        Fitted pipeline
+    data: pd.DataFrame
+        Dataframe to be transformed
+    model_type: str
+        One of 'block_group', 'census_tract', or 'zip_code'
+    """
+    for name, step in pipe.steps:
+        if (step is None) or (step == "passthrough"):
+            continue
+        with profiler.stage(f"{model_type}_{name}", len(data)) as stage:
+            data = step.transform(data)
+            profiler.set_output(stage, data)
+    return (data)
+
+
+def model_predict(model, fe_matrix, model_type):
+    """
+    Generates xgboost model predictions, recording the prediction in the profiler
+
+    Parameters
+    ----------
+    model: xgboost.Booster
+        Trained model
+    fe_matrix: xgboost.DMatrix
+        Feature engineered data
+    model_type: str
+        One of 'block_group', 'census_tract', or 'zip_code'
+    """
+    with profiler.stage(f"{model_type}_predict", fe_matrix.num_row()) as stage:
+        predictions = model.predict(fe_matrix)
+        profiler.set_output(stage, predictions)
+    return (predictions)
+
+
 class PredictPass(BaseZRP):
     """
     Generates proxies
@@ -63,6 +125,32 @@ class PredictPass(BaseZRP):
                                 "HISPANIC": None, "WHITE": None, f"{self.race}_proxy": None}, index = data.index)
         return(proxies) 
 
+
+all_source_cols = [
+    'source_zrp_block_group', 'source_zrp_census_tract',
+    'source_zrp_zip_code', 'source_bisg', 'source_zrp_block_group_geo_only',
+    'source_zrp_census_tract_geo_only', 'source_zrp_zip_code_geo_only',
+    'source_zrp_name_only', 'source_no_proxy']
+
+
+def conform_source_cols(proxies):
+    """
+    Adds the source columns missing from a set of proxies, so proxies generated in separate chunks share one schema
+
+    Parameters
+    ----------
+    proxies: pd.DataFrame
+        Proxies generated by ZRP_Predict
+    """
+    proxies = proxies.copy()
+    for col in all_source_cols:
+        if col not in proxies.columns:
+            proxies[col] = np.nan
+    proxies = proxies[[col for col in proxies.columns if col not in all_source_cols] + all_source_cols]
+    proxies[all_source_cols] = proxies[all_source_cols].astype(float)
+    return(proxies)
+
+
 def validate_case(data, key, last_name):
     df = data.copy()
     new_row = df.tail(1).reset_index(drop=False)
@@ -82,9 +170,15 @@ class BISGWrapper(BaseZRP):
     Wrapper function for Bayesian Improved Surname Geocoding
 
     Generates proxies using BISG algorithm.
+
+    Parameters
+    ----------
+    session: ZRP_Session, optional
+        Session holding a preloaded BISG model. A new model is loaded on each call if not provided.
     """
-    def __init__(self, *args, **kwargs):
+    def __init__(self, session=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.session = session
         
         
     def fit(self, input_data):
@@ -117,9 +211,14 @@ class BISGWrapper(BaseZRP):
         df = df.filter([self.last_name, self.zip_code, self.census_tract])
         df[self.zip_code] = np.where((df[self.zip_code] == "") | (df[self.zip_code] == " ") | (df[self.zip_code] == None) | (df[self.zip_code].str.len()<5), "99999", df[self.zip_code])
         
-        bisg = surgeo.SurgeoModel()
-        bisg_results = bisg.get_probabilities(names  = df[self.last_name].reset_index(drop=True),
-                                              geo_df = df[self.zip_code].astype(int))
+        if self.session is not None:
+            bisg = self.session.bisg_model
+        else:
+            bisg = surgeo.SurgeoModel()
+        with profiler.stage("BISG", len(df)) as stage:
+            bisg_results = bisg.get_probabilities(names  = df[self.last_name].reset_index(drop=True),
+                                                  geo_df = df[self.zip_code].astype(int))
+            profiler.set_output(stage, bisg_results)
         combo = df.reset_index().merge(bisg_results, 
                            how="left", 
                            left_on=[self.last_name, self.zip_code], 
@@ -142,7 +241,8 @@ class BISGWrapper(BaseZRP):
         race_col_ov = ['WHITE', 'BLACK', 'AAPI', 'AIAN', 'HISPANIC']
         subset = combo.filter(race_col_ov)
         subset = subset[race_col_ov].div(subset[race_col_ov].sum(axis=1), axis=0)              
-        identifiedRaces = subset.idxmax(axis=1)
+        # Names & zip codes missing from the BISG tables have no proxy
+        identifiedRaces = subset.dropna(how='all').idxmax(axis=1)
         combo[f"{self.race}_proxy"] = identifiedRaces
         combo['source_bisg'] = 1
         proxies = combo.filter(["AAPI", "AIAN", "BLACK", "HISPANIC",
@@ -159,11 +259,14 @@ class ZRP_Predict_ZipCode(BaseZRP):
     ----------
     pipe_path: str
         Folder path to directory containing pipeline
+    session: ZRP_Session, optional
+        Session holding preloaded pipelines. The pipeline is read from disk on each call if not provided.
     """
 
-    def __init__(self, pipe_path, *args, **kwargs):
+    def __init__(self, pipe_path, session=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.pipe_path = pipe_path
+        self.session = session
         
     def fit(self):
         return self
@@ -178,8 +281,6 @@ class ZRP_Predict_ZipCode(BaseZRP):
             Dataframe to be transformed
         """
 
-        src_path = os.path.join(self.pipe_path, "zip_code")
-        sys.path.append(src_path)        
         # Load Data
         try:
             data = input_data.copy()
@@ -189,17 +290,16 @@ class ZRP_Predict_ZipCode(BaseZRP):
         numeric_cols = list(data.filter(regex='^B|^C16').columns)
         data[numeric_cols] = data[numeric_cols].apply(pd.to_numeric, errors='coerce') 
         
-        model = xgboost.Booster()
-        model.load_model(os.path.join(src_path,"model.txt"))
-        pipe = pd.read_pickle(os.path.join(src_path, "pipe.pkl") )
-        
-        
+        if self.session is not None:
+            pipe, model = self.session.pipelines["zip_code"]
+        else:
+            pipe, model = load_pipeline(self.pipe_path, "zip_code")
         data = validate_case(data, self.key, self.last_name)
-        fe_data = pipe.transform(data)
+        fe_data = pipeline_transform(pipe, data, "zip_code")
         fe_data = validate_drop(fe_data)
         fe_matrix = xgboost.DMatrix(fe_data)
         
-        proxies = pd.DataFrame(model.predict(fe_matrix), index = fe_data.index)
+        proxies = pd.DataFrame(model_predict(model, fe_matrix, "zip_code"), index = fe_data.index)
         proxies.columns = sorted(pipe.steps[2][1].mlb_columns)
         proxies[f"{self.race}_proxy"] = proxies.idxmax(axis=1)
         if not geo_only:
@@ -218,11 +318,14 @@ class ZRP_Predict_BlockGroup(BaseZRP):
     ----------
     pipe_path: str
         Folder path to directory containing pipeline
+    session: ZRP_Session, optional
+        Session holding preloaded pipelines. The pipeline is read from disk on each call if not provided.
     """
 
-    def __init__(self, pipe_path, *args, **kwargs):
+    def __init__(self, pipe_path, session=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.pipe_path = pipe_path
+        self.session = session
         
     def fit(self):
         return self
@@ -241,9 +344,6 @@ class ZRP_Predict_BlockGroup(BaseZRP):
             Whether or not the predictions will be based on name features only.
         """        
 
-        src_path = os.path.join(self.pipe_path,"block_group")
-        sys.path.append(src_path)
-        
         # Load Data
         try:
             data = input_data.copy()
@@ -253,14 +353,15 @@ class ZRP_Predict_BlockGroup(BaseZRP):
         numeric_cols = list(data.filter(regex='^B|^C16').columns)
         data[numeric_cols] = data[numeric_cols].apply(pd.to_numeric, errors='coerce')
         
-        model = xgboost.Booster()
-        model.load_model(os.path.join(src_path,"model.txt"))
-        pipe = pd.read_pickle(os.path.join(src_path, "pipe.pkl") )
+        if self.session is not None:
+            pipe, model = self.session.pipelines["block_group"]
+        else:
+            pipe, model = load_pipeline(self.pipe_path, "block_group")
         data = validate_case(data, self.key, self.last_name)
-        fe_data = pipe.transform(data)
+        fe_data = pipeline_transform(pipe, data, "block_group")
         fe_data = validate_drop(fe_data)
         fe_matrix = xgboost.DMatrix(fe_data)
-        proxies = pd.DataFrame(model.predict(fe_matrix), index = fe_data.index)
+        proxies = pd.DataFrame(model_predict(model, fe_matrix, "block_group"), index = fe_data.index)
         proxies.columns = sorted(pipe.steps[2][1].mlb_columns)
         proxies[f"{self.race}_proxy"] = proxies.idxmax(axis=1)
         
@@ -283,11 +384,14 @@ class ZRP_Predict_CensusTract(BaseZRP):
     ----------
     pipe_path: str
         Folder path to directory containing pipeline
+    session: ZRP_Session, optional
+        Session holding preloaded pipelines. The pipeline is read from disk on each call if not provided.
     """
 
-    def __init__(self, pipe_path, *args, **kwargs):
+    def __init__(self, pipe_path, session=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.pipe_path = pipe_path
+        self.session = session
         
     def fit(self):
         return self
@@ -302,9 +406,6 @@ class ZRP_Predict_CensusTract(BaseZRP):
             Dataframe to be transformed
         """        
 
-        src_path = os.path.join(self.pipe_path,"census_tract")
-        sys.path.append(src_path)
-        
         # Load Data
         try:
             data = input_data.copy()
@@ -314,15 +415,15 @@ class ZRP_Predict_CensusTract(BaseZRP):
         numeric_cols = list(data.filter(regex='^B|^C16').columns)
         data[numeric_cols] = data[numeric_cols].apply(pd.to_numeric, errors='coerce') 
 
-        model = xgboost.Booster()
-        model.load_model(os.path.join(src_path,"model.txt"))        
-        pipe = pd.read_pickle(os.path.join(src_path, "pipe.pkl") )
-        
+        if self.session is not None:
+            pipe, model = self.session.pipelines["census_tract"]
+        else:
+            pipe, model = load_pipeline(self.pipe_path, "census_tract")
         data = validate_case(data, self.key, self.last_name)
-        fe_data = pipe.transform(data)
+        fe_data = pipeline_transform(pipe, data, "census_tract")
         fe_data = validate_drop(fe_data)
         fe_matrix = xgboost.DMatrix(fe_data)
-        proxies = pd.DataFrame(model.predict(fe_matrix), index = fe_data.index)
+        proxies = pd.DataFrame(model_predict(model, fe_matrix, "census_tract"), index = fe_data.index)
         proxies.columns = sorted(pipe.steps[2][1].mlb_columns)
         proxies[f"{self.race}_proxy"] = proxies.idxmax(axis=1)
         if not geo_only:
@@ -345,11 +446,14 @@ class ZRP_Predict(BaseZRP):
         Folder path to directory containing pipeline
     file_path: str
         Path indicating where to put artifacts folder its files (pipeline, model, and supporting data), generated during intermediate steps.
+    session: ZRP_Session, optional
+        Session holding preloaded pipelines. Pipelines are read from disk on each call if not provided.
     """
 
-    def __init__(self, pipe_path, file_path=None, *args, **kwargs):
+    def __init__(self, pipe_path, file_path=None, session=None, *args, **kwargs):
         super().__init__(file_path=file_path, *args, **kwargs)
         self.pipe_path = pipe_path
+        self.session = session
         self.params_dict = kwargs
         self.census_tract = 'GEOID_CT'
         self.block_group = 'GEOID_BG'
@@ -357,7 +461,9 @@ class ZRP_Predict(BaseZRP):
         
         
     def fit(self, data):
-        if xgboost.__version__ != "1.0.2":
+        # The released models are saved with xgboost 1.0.2, pipelines built with ZRP_Build load with the release that built them
+        is_release_pipe = os.path.abspath(self.pipe_path) == os.path.abspath(join(dirname(__file__), "models"))
+        if is_release_pipe and (xgboost.__version__ != "1.0.2"):
             raise AssertionError("XGBoost version does not match requirements, required version is 1.0.2")
 
         data_cols =  list(data.columns)
@@ -408,11 +514,14 @@ class ZRP_Predict(BaseZRP):
         Parameter
         ---------
         """
+        if self.session is not None:
+            return(self.session.target_is_standard)
         model_types = ['block_group', 'census_tract', 'zip_code']
         all_model_cols = set()
         for model_type in model_types:
             src_path = os.path.join(self.pipe_path, model_type)
-            sys.path.append(src_path)
+            if src_path not in sys.path:
+                sys.path.append(src_path)
             pipe = pd.read_pickle(os.path.join(src_path, "pipe.pkl"))
             cols = set(pipe.steps[2][1].mlb_columns)
             all_model_cols = all_model_cols.union(cols)
@@ -437,9 +546,14 @@ class ZRP_Predict(BaseZRP):
             data = load_file(self.proxy_data)
         cur_path = dirname(__file__)
 
-        flb = load_json(f'{cur_path}/feature_list_bg.json')
-        flc = load_json(f'{cur_path}/feature_list_ct.json')
-        flz = load_json(f'{cur_path}/feature_list_zp.json')
+        if self.session is not None:
+            flb = self.session.feature_lists['block_group']
+            flc = self.session.feature_lists['census_tract']
+            flz = self.session.feature_lists['zip_code']
+        else:
+            flb = load_json(f'{cur_path}/feature_list_bg.json')
+            flc = load_json(f'{cur_path}/feature_list_ct.json')
+            flz = load_json(f'{cur_path}/feature_list_zp.json')
         
         # Determine records with names provided
         data = self.validate_data_has_names(input_data)
@@ -520,31 +634,31 @@ class ZRP_Predict(BaseZRP):
             
         out_list = []
         if not df_0.empty:    # BG & Names
-            zrp_bg_complete = ZRP_Predict_BlockGroup(self.pipe_path, **self.params_dict)
+            zrp_bg_complete = ZRP_Predict_BlockGroup(self.pipe_path, session=self.session, **self.params_dict)
             out_0 = zrp_bg_complete.transform(df_0.filter(flb))
             out_list.append(out_0)    
         if not df_1.empty:    # CT & Names
-            zrp_ct_complete = ZRP_Predict_CensusTract(self.pipe_path, **self.params_dict)
+            zrp_ct_complete = ZRP_Predict_CensusTract(self.pipe_path, session=self.session, **self.params_dict)
             out_1 = zrp_ct_complete.transform(df_1.filter(flc))
             out_list.append(out_1)    
         if not df_2.empty:    # ZC & Names
-            zrp_zp_complete = ZRP_Predict_ZipCode(self.pipe_path, **self.params_dict)
+            zrp_zp_complete = ZRP_Predict_ZipCode(self.pipe_path, session=self.session, **self.params_dict)
             out_2 = zrp_zp_complete.transform(df_2.filter(flz))
             out_list.append(out_2)    
         if not df_3.empty:    # BC Only
-            zrp_bg_geo_only = ZRP_Predict_BlockGroup(self.pipe_path, **self.params_dict)
+            zrp_bg_geo_only = ZRP_Predict_BlockGroup(self.pipe_path, session=self.session, **self.params_dict)
             out_3 = zrp_bg_geo_only.transform(df_3.filter(flb), geo_only=True)
             out_list.append(out_3)  
         if not df_4.empty:    # CT Only
-            zrp_ct_geo_only = ZRP_Predict_CensusTract(self.pipe_path, **self.params_dict)
+            zrp_ct_geo_only = ZRP_Predict_CensusTract(self.pipe_path, session=self.session, **self.params_dict)
             out_4 = zrp_ct_geo_only.transform(df_4.filter(flc), geo_only=True)
             out_list.append(out_4)   
         if not df_5.empty:    # ZC Only
-            zrp_zp_geo_only = ZRP_Predict_ZipCode(self.pipe_path, **self.params_dict)
+            zrp_zp_geo_only = ZRP_Predict_ZipCode(self.pipe_path, session=self.session, **self.params_dict)
             out_5 = zrp_zp_geo_only.transform(df_5.filter(flz), geo_only=True)
             out_list.append(out_5)  
         if not df_6.empty:    # BISG
-            bisgw = BISGWrapper(**self.params_dict)
+            bisgw = BISGWrapper(session=self.session, **self.params_dict)
             bisgw.fit(df_6)
             out_6 = bisgw.transform(df_6)
 
@@ -566,7 +680,7 @@ class ZRP_Predict(BaseZRP):
                     (records_failed_bisg_proxy['has_last_name'] == 1)
                 ]     
                 if not df_7.empty:
-                    zrp_names_only = ZRP_Predict_BlockGroup(self.pipe_path, **self.params_dict)
+                    zrp_names_only = ZRP_Predict_BlockGroup(self.pipe_path, session=self.session, **self.params_dict)
                     out_7 = zrp_names_only.transform(df_7.filter(flb), name_only=True)
                     out_list.append(out_7)  
 
@@ -586,11 +700,6 @@ class ZRP_Predict(BaseZRP):
         proxies_out = pd.concat(out_list)
         
         # Rearangement of columns    
-        all_source_cols = [
-            'source_zrp_block_group', 'source_zrp_census_tract',
-            'source_zrp_zip_code', 'source_bisg', 'source_zrp_block_group_geo_only',
-            'source_zrp_census_tract_geo_only', 'source_zrp_zip_code_geo_only',
-            'source_zrp_name_only', 'source_no_proxy']
         source_cols = [col for col in all_source_cols if col in proxies_out.columns]
         race_cols = list(set(proxies_out.columns) - set(source_cols) - set([f"{self.race}_proxy"]))
         race_cols.sort()
@@ -611,6 +720,85 @@ class ZRP_Predict(BaseZRP):
         
         return(proxies_out)
 
+
+
+    def predict_records(self, records):
+        """
+        Generates ZRP proxies for a few prepared records with low latency, for online scoring. Uses the pipelines,
+        models, and BISG model preloaded in the session; nothing is read from or written to disk. Records are routed
+        to a model with the same rules as `transform`, and each model's pipeline & booster run once over all of its
+        records, so geo only & name only records share the pipeline call of the records with complete data.
+        Returns proxies indexed by key, in the order of the records, with every source column.
+
+        Parameters
+        -----------
+        records: list or pd.DataFrame
+            Prepared records as returned by `ZRP_Prepare.transform`, either a list of dicts with a key or a dataframe
+            indexed by key
+        """
+        if (self.session is None) or not self.session.has_models:
+            raise ValueError("predict_records needs a session with loaded models, please provide a loaded ZRP_Session")
+        if isinstance(records, pd.DataFrame):
+            data = records
+        else:
+            data = pd.DataFrame.from_records(records, index=self.key)
+        if 'acs_source' not in data.columns:
+            raise KeyError("Processed data is required for ZRP_Predict. Please use EnginetoPredict if supplying feature engineered data to generate predictions")
+        numeric_cols = list(data.filter(regex='^B|^C16').columns)
+        data = data.copy()
+        data[numeric_cols] = data[numeric_cols].apply(pd.to_numeric, errors='coerce')
+
+        has_name = self.validate_data_has_names(data)[["has_first_name", "has_middle_name", "has_last_name"]].any(axis=1).values
+        acs_source = data['acs_source'].astype(object).values
+        # Model & source of each record, in the order `transform` assigns them
+        acs_models = {'BG': 'block_group', 'CT': 'census_tract', 'ZIP': 'zip_code'}
+        model_types = np.array([acs_models.get(source) for source in acs_source], dtype=object)
+        sources = np.array([None if model_type is None else f"source_zrp_{model_type}" if named else f"source_zrp_{model_type}_geo_only"
+                            for model_type, named in zip(model_types, has_name)], dtype=object)
+
+        out_list = []
+        no_geo = np.array([model_type is None for model_type in model_types], dtype=bool)
+        if no_geo.any():
+            bisgw = BISGWrapper(session=self.session, **self.params_dict)
+            bisg_out = bisgw.transform(data[no_geo])
+            if self.session.target_is_standard:
+                bisg_failed = bisg_out[f"{self.race}_proxy"].isna().reindex(data.index[no_geo]).fillna(True).values
+                out_list.append(bisg_out[~bisg_out[f"{self.race}_proxy"].isna()])
+            else:
+                bisg_failed = np.ones(no_geo.sum(), dtype=bool)
+            name_only = np.zeros(len(data), dtype=bool)
+            name_only[no_geo] = bisg_failed & has_name[no_geo]
+            model_types[name_only] = 'block_group'
+            sources[name_only] = 'source_zrp_name_only'
+            no_proxy = np.zeros(len(data), dtype=bool)
+            no_proxy[no_geo] = bisg_failed & ~has_name[no_geo]
+            if no_proxy.any():
+                failed_proxies = bisg_out.reindex(data.index[no_proxy]).rename(columns={"source_bisg": "source_no_proxy"})
+                failed_proxies["source_no_proxy"] = 1
+                out_list.append(failed_proxies)
+
+        for model_type in ['block_group', 'census_tract', 'zip_code']:
+            in_model = model_types == model_type
+            if not in_model.any():
+                continue
+            pipe, model = self.session.pipelines[model_type]
+            # No validation case is added, the pipelines pass batches without compound surnames through
+            model_data = data[in_model].filter(self.session.feature_lists[model_type])
+            fe_data = pipeline_transform(pipe, model_data, model_type)
+            proxies = pd.DataFrame(model_predict(model, xgboost.DMatrix(fe_data), model_type), index=fe_data.index)
+            proxies.columns = sorted(pipe.steps[2][1].mlb_columns)
+            proxies[f"{self.race}_proxy"] = proxies.idxmax(axis=1)
+            model_sources = pd.Series(sources[in_model], index=data.index[in_model]).reindex(proxies.index)
+            for source in model_sources.unique():
+                proxies[source] = (model_sources == source).astype(float)
+            out_list.append(proxies)
+
+        proxies_out = conform_source_cols(pd.concat(out_list))
+        race_cols = sorted(set(proxies_out.columns) - set(all_source_cols) - set([f"{self.race}_proxy"]))
+        proxies_out = proxies_out[race_cols + [f"{self.race}_proxy"] + all_source_cols]
+        proxies_out[race_cols + all_source_cols] = proxies_out[race_cols + all_source_cols].fillna(0)
+        proxies_out = proxies_out[~proxies_out.index.duplicated(keep='first')].reindex(data.index)
+        return(proxies_out)
     
     
 class FEtoPredict(BaseZRP):
@@ -47,8 +47,7 @@ class AppFeatureEngineering(BaseEstimator, TransformerMixin):
 
     def _process_target(self, y): 
         y = y.astype(str)
-        y_unique = y.unique()
-        y_unique.sort()
+        y_unique = np.sort(y.unique())
         self.n_classes = len(y_unique)
         
         #possible_race_classes = ["AAPI", "AIAN",  "BLACK", "HISPANIC", "WHITE"]
@@ -57,8 +56,8 @@ class AppFeatureEngineering(BaseEstimator, TransformerMixin):
         self.mlb = MultiLabelBinarizer(classes = y_unique)
         #self.mlb_columns = list(set(possible_race_classes) & set(y_unique))
         self.mlb_columns = y_unique
-        self.mlb.fit(y.values.reshape(-1,1))
-        y_ohe = pd.DataFrame(self.mlb.transform(y.values.reshape(-1,1)), columns=self.mlb_columns)
+        self.mlb.fit(y.to_numpy().reshape(-1,1))
+        y_ohe = pd.DataFrame(self.mlb.transform(y.to_numpy().reshape(-1,1)), columns=self.mlb_columns)
         
         self.le = {}
         for i in range(self.n_classes):
@@ -1,7 +1,26 @@
-from .base import BaseZRP
-from .acs_mapper import ACSModelPrep
-from .geo_geocoder import ZGeo
-from .preprocessing import  ProcessStrings, ProcessGeo, ProcessACS
-from .prepare import ZRP_Prepare
+import importlib
 
-__all__ = ['BaseZRP','ZRP_Prepare', 'ProcessStrings', 'ProcessGeo', 'ProcessACS', 'ACSModelPrep' ]
\ No newline at end of file
+# Submodules are imported the first time one of their names is used
+_lazy_imports = {
+    'BaseZRP': '.base',
+    'ACSModelPrep': '.acs_mapper',
+    'ZGeo': '.geo_geocoder',
+    'ProcessStrings': '.preprocessing',
+    'ProcessGeo': '.preprocessing',
+    'ProcessACS': '.preprocessing',
+    'ZRP_Prepare': '.prepare',
+    'AddressParser': '.address',
+}
+
+__all__ = ['BaseZRP','ZRP_Prepare', 'ProcessStrings', 'ProcessGeo', 'ProcessACS', 'ACSModelPrep', 'AddressParser']
+
+
+def __getattr__(name):
+    if name in _lazy_imports:
+        module = importlib.import_module(_lazy_imports[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(list(globals()) + list(_lazy_imports)))
@@ -1,12 +1,13 @@
 from .preprocessing import *
 from .base import BaseZRP
 from .utils import *
+from zrp.profiling import profiler
 import pandas as pd
 import os
 import warnings
 warnings.filterwarnings(action='ignore')
 
-def acs_search(year, span):
+def acs_search(year, span, data_path=None):
     """
     Searches for processed ACS data
     
@@ -16,12 +17,15 @@ def acs_search(year, span):
         Release year of ACS data
     span: str
         Span of ACS data (ie '1' or '5')      
+    data_path: str, optional
+        Filepath of the processed support data directory. The package data folder is used if not provided.
     """
     file_list_z = []
     file_list_c = []
     file_list_b = []
-    curpath = dirname(__file__)
-    data_path = join(curpath, f'../data/processed/acs/{year}/{span}yr')
+    if data_path is None:
+        data_path = join(dirname(__file__), '../data/processed')
+    data_path = join(data_path, f'acs/{year}/{span}yr')
     for root, dirs, files in os.walk(os.path.join(data_path)):
         for file in files:
             if (f"_zip" in file) & ("processed" in file):
@@ -33,13 +37,39 @@ def acs_search(year, span):
     return (file_list_z, file_list_c, file_list_b)
 
 
+def acs_load(year, span, data_path=None):
+    """
+    Loads the processed ACS lookup tables
+    
+    Parameters:
+    -----------
+    year: str
+        Release year of ACS data
+    span: str
+        Span of ACS data (ie '1' or '5')      
+    data_path: str, optional
+        Filepath of the processed support data directory. The package data folder is used if not provided.
+    """
+    file_list_z, file_list_c, file_list_b = acs_search(year, span, data_path)
+    acs_bg = load_file(file_list_b[0])
+    acs_ct = load_file(file_list_c[0])
+    acs_zip = load_file(file_list_z[0])
+    return (acs_bg, acs_ct, acs_zip)
+
+
 class ACSModelPrep(BaseZRP):
     """
     Prepares ACS data & processed user input for modeling
+
+    Parameters
+    ----------
+    session: ZRP_Session, optional
+        Session holding preloaded support files. ACS lookup tables are read from disk if not provided.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, session=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.session = session
 
     def fit(self):
         pass
@@ -155,19 +185,19 @@ class ACSModelPrep(BaseZRP):
             except KeyError:
                 pass
 
-        file_list_z, file_list_c, file_list_b = acs_search(self.year,
-                                                           self.span)
-
         print("   ...loading ACS lookup tables")
-        acs_bg = load_file(file_list_b[0])
-        acs_ct = load_file(file_list_c[0])
-        acs_zip = load_file(file_list_z[0])
+        if self.session is not None:
+            acs_bg, acs_ct, acs_zip = self.session.acs_tables
+        else:
+            acs_bg, acs_ct, acs_zip = acs_load(self.year, self.span)
 
         print("   ... combining ACS & user input data")
-        data_out = self.acs_combine(data,
-                                    acs_bg,
-                                    acs_ct,
-                                    acs_zip)
+        with profiler.stage("acs_combine", len(data)) as stage:
+            data_out = self.acs_combine(data,
+                                        acs_bg,
+                                        acs_ct,
+                                        acs_zip)
+            profiler.set_output(stage, data_out)
 
         if save_table:
             make_directory(self.out_path)
@@ -0,0 +1,183 @@
+import pandas as pd
+import numpy as np
+
+
+address_components = ["pre_directional", "street_name", "street_suffix", "post_directional", "unit", "street_key"]
+
+
+def mapping_words(mapping):
+    """
+    Returns a dict of the words of a mapping of word bounded regular expressions, ie '\\bAVENUE\\b': 'AVE-', to their
+    canonical form. Canonical forms map to themselves.
+
+    Parameters
+    ----------
+    mapping: dict
+        Dictionary of regular expressions to replacements, with '-' marking where the replacement is joined
+    """
+    words = {}
+    for pattern, replacement in mapping.items():
+        canonical = replacement.strip("-")
+        words[canonical] = canonical
+        words[pattern.replace("\\b", "")] = canonical
+    return (words)
+
+
+def join_street_key(*components):
+    """
+    Returns the street key joining the given address components, None if all of them are missing
+
+    Parameters
+    ----------
+    components: str
+        Address components, None if missing
+    """
+    street_key = " ".join(c for c in components if c is not None)
+    return (street_key if street_key != "" else None)
+
+
+class AddressParser():
+    """
+    Splits street addresses into pre-directional, street name, suffix, post-directional, and unit in one pass over the
+    words of each distinct address, with directionals, suffixes, and unit designators in the canonical forms of the
+    shipped mappings. The street key joins the components other than the unit, ie 'NORTH MAIN STREET APT 4' has the
+    street key 'N MAIN ST', the form street names take in `ZEST_FULLNAME`.
+
+    Addresses are read from the right: a unit starts at the first unit designator or '#' after the street name, or
+    at a last word with digits right after a suffix or a post-directional, ie the '4' of 'ELM ST 4'. A last directional is a
+    post-directional if a street name is left before it, the last word is a suffix if a street name is left before
+    it, and the first word is a pre-directional if a street name is left after it. Words that are not parsed as
+    another component are part of the street name, so 'NORTH ST' & 'AVENUE N' keep their street names.
+
+    Street names that end in a number, ie 'COUNTY RD 12', are read as a unit too. Lookup table street names, which
+    have no units, are parsed with `units=False`, and the geocoder falls back to the key read without units when
+    the parsed key does not match, see `replicate_street_keys`.
+
+    Parameters
+    ----------
+    street_suffix_mapping: dict
+        Dictionary with street suffix mappings
+    directionals_mapping: dict
+        Dictionary with directional mappings
+    unit_mapping: dict
+        Dictionary with unit designator mappings
+    """
+
+    def __init__(self, street_suffix_mapping, directionals_mapping, unit_mapping):
+        self.suffixes = mapping_words(street_suffix_mapping)
+        self.directionals = mapping_words(directionals_mapping)
+        units = mapping_words(unit_mapping)
+        self.units = {word: canonical for word, canonical in units.items() if " " not in word}
+        self.unit_phrases = {tuple(word.split()): canonical for word, canonical in units.items() if " " in word}
+
+    def unit_start(self, words):
+        """
+        Returns the position of the first word of the unit and the canonical unit designator, or the number of words
+        and None if there is no unit
+
+        Parameters
+        ----------
+        words: list
+            Words of a street address
+        """
+        for i in range(1, len(words)):
+            if words[i] == "#":
+                return (i, "#", 1)
+            if i < 2:
+                continue
+            for phrase, canonical in self.unit_phrases.items():
+                if tuple(words[i:i + len(phrase)]) == phrase:
+                    return (i, canonical, len(phrase))
+            if words[i] in self.units:
+                follows_street = (words[i - 1] in self.suffixes) or (words[i - 1] in self.directionals)
+                if follows_street or (i + 1 < len(words)):
+                    return (i, self.units[words[i]], 1)
+        # A last word with digits after a suffix is a unit without designator, ie 'ELM ST 4' & 'ELM ST N 4'
+        if (len(words) >= 3) and any(c.isdigit() for c in words[-1]):
+            after_suffix = (words[-2] in self.suffixes) or ((len(words) >= 4) and (words[-2] in self.directionals) and (words[-3] in self.suffixes))
+            if after_suffix:
+                return (len(words) - 1, "#", 0)
+        return (len(words), None, 0)
+
+    def parse(self, street_address, units=True):
+        """
+        Returns the components of a street address as a tuple in the order of `address_components`
+
+        Parameters
+        ----------
+        street_address: str
+            Upper case street address with words separated by whitespace
+        units: bool, default True
+            Whether to parse units. All words are part of the street if False, as in lookup table street names.
+        """
+        if not isinstance(street_address, str):
+            return (None,) * len(address_components)
+        # '#4' is read as the unit designator '#' followed by the unit number
+        words = street_address.replace("#", " # ").split()
+        unit = None
+        if units:
+            end, designator, n_designator = self.unit_start(words)
+            if designator is not None:
+                unit = " ".join([designator] + words[end + n_designator:])
+            words = words[:end]
+
+        post_directional = None
+        if (len(words) >= 2) and (words[-1] in self.directionals):
+            # 'AVENUE N' keeps N as its street name, 'ELM ST N' & 'BROADWAY N' have a post-directional
+            street_left = (len(words) >= 3) or ((words[-2] not in self.suffixes) and (words[-2] not in self.directionals))
+            if street_left:
+                post_directional = self.directionals[words[-1]]
+                words = words[:-1]
+        suffix = None
+        if (len(words) >= 2) and (words[-1] in self.suffixes):
+            suffix = self.suffixes[words[-1]]
+            words = words[:-1]
+        pre_directional = None
+        if (len(words) >= 2) and (words[0] in self.directionals):
+            pre_directional = self.directionals[words[0]]
+            words = words[1:]
+
+        street_name = " ".join(words) if len(words) > 0 else None
+        street_key = join_street_key(pre_directional, street_name, suffix, post_directional)
+        return (pre_directional, street_name, suffix, post_directional, unit, street_key)
+
+    def transform(self, data, units=True):
+        """
+        Returns a dataframe of the components of each street address, with the index of the addresses. Each distinct
+        address is parsed once.
+
+        Parameters
+        ----------
+        data: pd.Series
+            Street address column
+        units: bool, default True
+            Whether to parse units
+        """
+        codes, uniques = pd.factorize(data)
+        parsed = pd.DataFrame([self.parse(street_address, units) for street_address in uniques],
+                              columns=address_components, dtype=object)
+        parsed = pd.concat([parsed, pd.DataFrame([(None,) * len(address_components)], columns=address_components, dtype=object)],
+                           ignore_index=True)
+        # Missing addresses have code -1, which takes the last row of all missing components
+        components = parsed.take(np.where(codes < 0, len(parsed) - 1, codes))
+        components.index = data.index
+        return (components)
+
+    def street_keys(self, data, units=True, directionals=True):
+        """
+        Returns the street key of each street address
+
+        Parameters
+        ----------
+        data: pd.Series
+            Street address column
+        units: bool, default True
+            Whether to parse units. Lookup table street names are parsed without units.
+        directionals: bool, default True
+            Whether the street keys keep the pre-directional & post-directional
+        """
+        components = self.transform(data, units)
+        if directionals:
+            return (components["street_key"].rename(data.name))
+        street_keys = [join_street_key(street_name, suffix) for street_name, suffix in zip(components["street_name"], components["street_suffix"])]
+        return (pd.Series(street_keys, index=data.index, name=data.name, dtype=object))
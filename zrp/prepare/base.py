@@ -58,6 +58,17 @@ class BaseZRP():
     span: str, default '5'
         Year span of ACS data to use.
     runname: str, default 'test'
+    out_path: str, optional
+        Path where to put artifacts. Defaults to the 'artifacts' folder inside `file_path`.
+    string_backend: str, default 'python'
+        How string columns are cleaned while preparing data: 'python' with pandas string methods, or 'arrow' with
+        pyarrow compute kernels, which is faster and holds strings in Arrow memory while they are cleaned.
+    parse_address: bool, default False
+        Whether street addresses are geocoded by the street key of `AddressParser`, one canonical key per address,
+        instead of being replicated with each variant of their street suffix & cardinal directions.
+    geo_index: bool, default False
+        Whether addresses are joined only to the lookup table segments of their street in their zip code, found with
+        the `GeoIndex` of the state, instead of to every segment of their street in the state.
     """
 
     def __init__(self, support_files_path="data/processed", key="ZEST_KEY", first_name="first_name",
@@ -65,7 +76,8 @@ class BaseZRP():
                  street_address="street_address", city="city", state="state", zip_code="zip_code", race='race',
                  census_tract=None, block_group=None, street_address_2=None, name_prefix=None, name_suffix=None,
                  na_values=None, file_path=None, geocode=True, bisg=True, readout=True, n_jobs=-1, year="2019",
-                 span="5", runname=None):
+                 span="5", runname=None, out_path=None, string_backend="python", parse_address=False,
+                 geo_index=False):
         self.key = key
         self.first_name = first_name
         self.middle_name = middle_name
@@ -90,7 +102,14 @@ class BaseZRP():
         self.year = year
         self.span = span
         self.runname = runname
-        if file_path:
+        if string_backend not in ("python", "arrow"):
+            raise ValueError(f"Unknown string backend {string_backend}, use 'python' or 'arrow'")
+        self.string_backend = string_backend
+        self.parse_address = parse_address
+        self.geo_index = geo_index
+        if out_path:
+            self.out_path = out_path
+        elif file_path:
             self.out_path = os.path.join(self.file_path, "artifacts")
         else:
             self.out_path = "artifacts"
@@ -120,6 +139,14 @@ class BaseZRP():
         
         return(column_names)
 
+    def checkpoint_path(self):
+        """
+        Returns the folder the run manifest & chunk outputs of a checkpointed run are kept in.
+        """
+        if self.runname is not None:
+            return os.path.join(self.out_path, f"checkpoint_{self.runname}")
+        return os.path.join(self.out_path, "checkpoint")
+
     def reset_column_names(self):
         """
         Resets this class' stored column names to the defaults expected by ZRP. 
@@ -1,8 +1,12 @@
 from os.path import dirname, join, expanduser
 from zrp.validate import ValidateGeo
 from .preprocessing import *
+from .address import AddressParser
+from .geo_index import GeoIndex
 from .base import BaseZRP
 from .utils import *
+from zrp.profiling import frame_mb
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 import statistics
@@ -10,6 +14,7 @@ import json
 import sys
 import os
 import re
+import threading
 import warnings
 warnings.filterwarnings(action='ignore')
 
@@ -50,6 +55,378 @@ def geo_read(file_list):
         geo_df = pd.concat([geo_df, tmp], axis=0)
     return (geo_df)
 
+geo_drop_cols = ['RAW_ZEST_TRACTCE', 'TLID', 'PARITYL', 'RAW_ZEST_STATEFP', 'TFID', 'OFFSETR', 'TTRACTCE',
+                 'RAW_ZEST_COUNTYFP', 'LFROMTYP', 'RTOADD', 'ARIDR', 'RAW_ZEST_BLKGRPCE', 'STATEFP10', 'BLOCKCE',
+                 'PUMACE10', 'LTOADD', 'LTOTYP', 'FROMHN', 'OFFSETL', 'TRACTCE10', 'TOHN', 'TBLKGPCE', 'RTOTYP',
+                 'BLKGRPCE10', 'RAW_ZEST_FULLNAME', 'PARITYR', 'RFROMTYP', 'LFROMADD', 'SIDE', 'ARIDL', 'PUMACE',
+                 'OFFSET', 'BLOCKCE10', 'COUNTYFP10', 'RFROMADD', 'EDGE_MTFCC', 'ROAD_MTFCC', 'RAW_ZEST_ZIP',
+                 'ZCTA5CE10', 'LINEARID']
+
+
+class GeoTableCache():
+    """
+    Process-wide cache of geo lookup tables keyed by file path & modification time, so a state table is read and
+    trimmed once however many chunks geocode the state, and is read again if its file changes. Tables are evicted
+    least recently used first once the cache holds more than `max_mb`. Cached tables are shared by every caller and
+    are not to be changed in place.
+
+    Parameters
+    ----------
+    max_mb: float, optional
+        Most memory the cached tables may hold, in Mb. Tables are not evicted if None.
+    """
+
+    def __init__(self, max_mb=4000):
+        self.max_mb = max_mb
+        self.tables = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.mb = 0
+
+    def get(self, file_path, loader, variant=None):
+        """
+        Returns the cached table of a file, loading it with `loader` on a miss
+
+        Parameters
+        ----------
+        file_path: str
+            File the table is read from
+        loader: callable
+            Returns the table, called without arguments
+        variant: str, optional
+            Name of a table derived from the file, cached apart from the table as read
+        """
+        try:
+            cache_key = (file_path, os.path.getmtime(file_path), variant)
+        except OSError:
+            return loader()
+        with self.lock:
+            if cache_key in self.tables:
+                self.hits += 1
+                self.tables.move_to_end(cache_key)
+                return self.tables[cache_key][0]
+            self.misses += 1
+        table = loader()
+        table_mb = float(frame_mb(table))
+        with self.lock:
+            # Tables of an older version of the file are not read again
+            for stale_key in [k for k in self.tables if (k[0], k[2]) == (file_path, variant) and k != cache_key]:
+                self.mb -= self.tables.pop(stale_key)[1]
+            if cache_key not in self.tables:
+                self.tables[cache_key] = (table, table_mb)
+                self.mb += table_mb
+                self.evict()
+        return table
+
+    def evict(self, max_mb=None):
+        """
+        Evicts least recently used tables until the cache holds at most `max_mb`, or the cache's own cap
+
+        Parameters
+        ----------
+        max_mb: float, optional
+            Memory to evict down to, in Mb
+        """
+        if max_mb is None:
+            max_mb = self.max_mb
+        if max_mb is None:
+            return
+        while (self.mb > max_mb) and (len(self.tables) > 0):
+            _, (_, table_mb) = self.tables.popitem(last=False)
+            self.mb -= table_mb
+            self.evictions += 1
+
+    def resize(self, max_mb):
+        """
+        Sets the memory cap of the cache, evicting tables down to it
+
+        Parameters
+        ----------
+        max_mb: float, optional
+            Most memory the cached tables may hold, in Mb. Tables are not evicted if None.
+        """
+        with self.lock:
+            self.max_mb = max_mb
+            self.evict()
+
+    def clear(self):
+        """
+        Empties the cache & resets its counters
+        """
+        with self.lock:
+            self.tables.clear()
+            self.hits, self.misses, self.evictions, self.mb = 0, 0, 0, 0
+
+    def stats(self):
+        """
+        Returns the hits, misses, evictions, number of tables, and Mb held by the cache
+        """
+        return ({"hits": self.hits,
+                 "misses": self.misses,
+                 "evictions": self.evictions,
+                 "tables": len(self.tables),
+                 "mb": self.mb,
+                 "max_mb": self.max_mb})
+
+
+geo_cache = GeoTableCache()
+
+
+def geo_load(geo, year, geo_files_path=None, address_parser=None):
+    """
+    Returns the geo lookup table of a state or state county code, trimmed to the columns used in geocoding. State
+    tables are kept in `geo_cache`.
+
+    Parameters
+    ----------
+    geo: str
+        A string for the state fips code or state county code
+    year: str
+        A string year
+    geo_files_path: str, optional
+        A string representing file path of the folder containing geo lookup tables
+    address_parser: AddressParser, optional
+        Parser to replace street names with their street keys, see `parse_geo_table`
+    """
+    if geo_files_path is None:
+        geo_files_path = os.path.join(dirname(__file__), '../data/processed/geo/2019')
+    if len(geo) > 2:
+        file_list = geo_search(geo_files_path, year, geo)
+        geo_df = geo_read(file_list)
+        return (parse_geo_table(geo_df, address_parser) if address_parser is not None else geo_df)
+
+    file_path = os.path.join(geo_files_path, f"Zest_Geo_Lookup_{year}_State_{geo}.parquet")
+    if address_parser is not None:
+        return (geo_cache.get(file_path, lambda: parse_geo_table(geo_load(geo, year, geo_files_path), address_parser), "parsed"))
+
+    def load_trimmed():
+        geo_df = load_file(file_path)
+        return (geo_df.drop(list(set(geo_df.columns).intersection(set(geo_drop_cols))), axis=1))
+    return (geo_cache.get(file_path, load_trimmed))
+
+
+def geo_index_load(geo, year, geo_files_path=None, address_parser=None):
+    """
+    Returns the `GeoIndex` of the geo lookup table `geo_load` returns with the same arguments. State indexes are read
+    from the `Zest_Geo_Index_*` file written by `build-index` when it is newer than the lookup table, and built
+    otherwise, then kept in `geo_cache`.
+
+    Parameters
+    ----------
+    geo: str
+        A string for the state fips code or state county code
+    year: str
+        A string year
+    geo_files_path: str, optional
+        A string representing file path of the folder containing geo lookup tables
+    address_parser: AddressParser, optional
+        Parser the street names of the lookup table are replaced with street keys by
+    """
+    if geo_files_path is None:
+        geo_files_path = os.path.join(dirname(__file__), '../data/processed/geo/2019')
+    geo_df = geo_load(geo, year, geo_files_path, address_parser)
+    if len(geo) > 2:
+        return (GeoIndex.build(geo_df))
+
+    file_path = os.path.join(geo_files_path, f"Zest_Geo_Lookup_{year}_State_{geo}.parquet")
+    index_path = os.path.join(geo_files_path, f"Zest_Geo_Index_{year}_State_{geo}.parquet")
+
+    def load_index():
+        # Prebuilt indexes are of the tables as loaded, parsed tables are indexed on first use
+        if (address_parser is None) and os.path.exists(index_path) and (os.path.getmtime(index_path) >= os.path.getmtime(file_path)):
+            return GeoIndex.load(index_path)
+        return GeoIndex.build(geo_df)
+    return (geo_cache.get(file_path, load_index, "parsed_index" if address_parser is not None else "index"))
+
+
+def parse_geo_table(geo_df, address_parser):
+    """
+    Returns a geo lookup table with street names replaced by the street keys of `AddressParser`. Variants of a street
+    name collapse into one street key, so the rows they duplicate are dropped. Street names have no units, so a last
+    number stays part of the street key, ie 'COUNTY RD 12'.
+
+    Parameters
+    ----------
+    geo_df: pd.DataFrame
+        Geo lookup table
+    address_parser: AddressParser
+        Parser of the street names
+    """
+    geo_df = geo_df.assign(ZEST_FULLNAME=map_unique(geo_df["ZEST_FULLNAME"], lambda x: address_parser.street_keys(x, units=False), "geo_street_key"))
+    geo_df = geo_df[geo_df["ZEST_FULLNAME"].notna()]
+    return (geo_df.drop_duplicates().reset_index(drop=True))
+
+
+def is_odd(numbers):
+    """
+    Returns 1 for odd and 0 for even house numbers, the parity of their last digit
+
+    Parameters
+    ----------
+    numbers: np.ndarray
+        Integer house numbers, negative for missing ones
+    """
+    return (np.abs(numbers) % 2)
+
+
+def match_house_numbers(geo_df, house_number):
+    """
+    Returns whether the house number of each address is in the range of the segment it is joined to, and whether it
+    has the parity of the range, as two boolean arrays. A house number matches a range if its prefix is the prefix of
+    the range and its number is between the numbers the range starts & ends at. Missing house numbers are -1 and
+    missing range bounds -2, so they never match a range and have opposite parity.
+
+    Parameters
+    ----------
+    geo_df: pd.DataFrame
+        Addresses joined to the segments of their street, with the '_LEFT' prefix & '_RIGHT' number of the address
+        house number and of the 'FROMHN' & 'TOHN' range bounds
+    house_number: str
+        Name of the house number column of the addresses
+    """
+    from_hn = geo_df['FROMHN_RIGHT'].replace('nan', np.nan).fillna(-2).astype(float).astype(int).values
+    to_hn = geo_df['TOHN_RIGHT'].replace('nan', np.nan).fillna(-2).astype(float).astype(int).values
+    hn = geo_df[house_number + '_RIGHT'].replace("", np.nan).fillna(-1).astype(float).astype(int).values
+    same_prefix = (geo_df['house_number_LEFT'] == geo_df['FROMHN_LEFT']).values
+    hn_match = same_prefix & (hn >= from_hn) & (hn <= to_hn)
+    parity_match = is_odd(from_hn) == is_odd(hn)
+    return (hn_match, parity_match)
+
+
+def any_by_key(geo_df, flags, key='ZEST_KEY_LONG'):
+    """
+    Returns a mask of the rows of the addresses with at least one flagged row, keeping the order of the rows
+
+    Parameters
+    ----------
+    geo_df: pd.DataFrame
+        Addresses joined to the segments of their street
+    flags: np.ndarray
+        Boolean flag of each row
+    key: str
+        Name of the column identifying an address
+    """
+    codes, _ = pd.factorize(geo_df[key])
+    # Rows with a missing key have code -1, which flags the last slot only
+    flagged = np.zeros(len(codes) + 1, dtype=bool)
+    flagged[codes[flags]] = True
+    return (flagged[codes])
+
+
+def join_geoid(data, columns, length):
+    """
+    Returns GEOIDs joined from the codes in `columns`, ie state, county, and tract codes for census tracts. Missing
+    codes are skipped, and GEOIDs that are not `length` digits are None.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Data with the codes
+    columns: list
+        Names of the code columns, in the order they are joined
+    length: int
+        Number of digits of a valid GEOID
+    """
+    joined = data[columns[0]].fillna("").astype(str)
+    for col in columns[1:]:
+        joined = joined + data[col].fillna("").astype(str)
+    valid = joined.str.fullmatch(f"[0-9]{{{length}}}").fillna(False).values.astype(bool)
+    return (pd.Series(np.where(valid, joined.values, None), index=data.index, dtype=object))
+
+
+def fill_geoid(geoid, user_geoid):
+    """
+    Returns the GEOIDs provided by the user, with geocoded GEOIDs where they are missing, empty, or contain 'None'
+
+    Parameters
+    ----------
+    geoid: pd.Series
+        Geocoded GEOIDs
+    user_geoid: pd.Series
+        GEOIDs provided by the user
+    """
+    missing = user_geoid.isna().values | (user_geoid == '').values | \
+              user_geoid.astype(str).str.contains("None", regex=False).values
+    return (np.where(missing, geoid, user_geoid))
+
+
+majority_vote_cols = ['TRACTCE', 'BLKGRPCE', 'NEW_SUPER_ZIP', 'COUNTYFP']
+
+
+def majority_vote(data, key, columns=majority_vote_cols):
+    """
+    Returns the most frequent value of each column for each key, as a dataframe indexed by the keys in the order they
+    first appear. Ties go to the smallest value, like `pd.Series.mode()[0]`, and missing values are not counted. The
+    counts of all columns are taken in one sort of integer codes instead of one `mode` call per key and column.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Data to vote on
+    key: str
+        Name of the column identifying a group
+    columns: list
+        Names of the columns to vote on
+    """
+    key_codes, keys = pd.factorize(data[key])
+    n_rows, n_cols = len(data), len(columns)
+    value_codes, values = [], []
+    for col in columns:
+        codes, uniques = pd.factorize(data[col], sort=True)
+        value_codes.append(codes)
+        values.append(uniques)
+
+    # One (key, column, value) triple per non missing value, sorted so equal triples are consecutive
+    group_codes = np.tile(key_codes, n_cols) * n_cols + np.repeat(np.arange(n_cols), n_rows)
+    codes = np.concatenate(value_codes)
+    present = (codes >= 0) & (group_codes >= 0)
+    group_codes, codes = group_codes[present], codes[present]
+    order = np.lexsort((codes, group_codes))
+    group_codes, codes = group_codes[order], codes[order]
+    new_run = np.ones(len(codes), dtype=bool)
+    new_run[1:] = (group_codes[1:] != group_codes[:-1]) | (codes[1:] != codes[:-1])
+    run_starts = np.flatnonzero(new_run)
+    counts = np.diff(np.append(run_starts, len(codes)))
+    run_groups, run_codes = group_codes[run_starts], codes[run_starts]
+
+    # Runs of a group are in increasing value order, so a stable sort by decreasing count puts the smallest of the
+    # most frequent values first
+    order = np.lexsort((-counts, run_groups))
+    run_groups, run_codes = run_groups[order], run_codes[order]
+    first = np.ones(len(run_groups), dtype=bool)
+    first[1:] = run_groups[1:] != run_groups[:-1]
+    modes = np.full(len(keys) * n_cols, -1)
+    modes[run_groups[first]] = run_codes[first]
+    modes = modes.reshape(len(keys), n_cols)
+
+    # Keys with no value in a column get NaN, integer columns are upcast to float only then
+    modes = {col: pd.Series(values[j]).reindex(modes[:, j]).values for j, col in enumerate(columns)}
+    return (pd.DataFrame(modes, index=keys))
+
+
+def majority_vote_deduplication(data, key, columns=majority_vote_cols):
+    """
+    When other deduplication methods fail we leave the most prevalent prediction: the first row of each key, with
+    the most frequent value of each of `columns` among the rows of the key
+    
+    Parameters
+    ----------
+    data: Dataframe
+        Data to deduplicate
+    key: string
+        Key used in deduplication
+    columns: list
+        Names of the columns to vote on
+    """
+    modes = majority_vote(data, key, columns)
+    data = data.drop_duplicates(keep = 'first', subset = [key]).copy()
+    for col in columns:
+        data[col] = modes[col].reindex(data[key]).values
+    return data
+
+
 class ZGeo(BaseZRP):
     """
     This class geocodes addresses.
@@ -58,52 +435,20 @@ class ZGeo(BaseZRP):
     ----------
     file_path: str
         Path indicating where to put artifacts folder its files (pipeline, model, and supporting data), generated during intermediate steps.
+    session: ZRP_Session, optional
+        Session holding preloaded support files. Geo lookup tables are read from disk if not provided.
     """
 
-    def __init__(self, file_path=None, *args, **kwargs):
+    def __init__(self, file_path=None, session=None, *args, **kwargs):
         super().__init__(file_path=file_path, *args, **kwargs)
         self.key = 'ZEST_KEY'
+        self.session = session
         self.params_dict =  kwargs    
 
     def fit(self):
         return self
   
-    def __majority_vote_deduplication(self, data, key):
-        """
-        When other deduplication methods fail we leave the most prevalent prediction
-        
-        Parameters
-        ----------
-        data: Dataframe
-            Data to deduplicate
-        key: string
-            Key used in deduplication
-        """
-        
-        data.sort_values(['NEW_SUPER_ZIP', 'COUNTYFP', 'TRACTCE', 'TRACTCE', 'BLKGRPCE'])
-        data['TRACTCE'] = data.groupby(key)['TRACTCE'].transform(lambda x: x.mode()[0])
-        data['BLKGRPCE'] = data.groupby(key)['BLKGRPCE'].transform(lambda x: x.mode()[0])
-        data['NEW_SUPER_ZIP'] = data.groupby(key)['NEW_SUPER_ZIP'].transform(lambda x: x.mode()[0])
-        data['COUNTYFP'] = data.groupby(key)['COUNTYFP'].transform(lambda x: x.mode()[0])
-        data = data.drop_duplicates(keep = 'first', subset = [key])
-        
-        return data
-    
-    def __is_odd(self, s):
-        """
-        Checks if a number is odd.
-        
-        Parameters
-        ----------
-        s: string
-            String with a number to be checked
-        """
-        try:
-            return (int(str(s)[-1]) % 2)
-        except:
-            return 0
-    
-    def transform(self, input_data, geo, processed, replicate, save_table=True):
+    def transform(self, input_data, geo, processed, replicate, save_table=True, validate=True):
         """
         Returns a DataFrame of geocoded addresses.
 
@@ -112,6 +457,7 @@ class ZGeo(BaseZRP):
         :param processed: A boolean.
         :param replicate: A boolean.
         :param save_table: A boolean. Tables are saved if True. Default is True.
+        :param validate: A boolean. The geo validator is saved if True. Default is True.
         :return: A DataFrame
         """
         
@@ -127,45 +473,35 @@ class ZGeo(BaseZRP):
             data = load_file(self.file_path)
             print("   Data file is loaded")
             
-        prg = ProcessGeo(**self.params_dict)
+        prg = ProcessGeo(session=self.session, **self.params_dict)
         data = prg.transform(data, processed=processed, replicate=replicate)
         print("   [Start] Mapping geo data")        
-        if len(geo)>2:
-            file_list = geo_search(out_geo_path, self.year, geo)
-            geo_df = geo_read(file_list)
-        if len(geo) <= 2:
-            geo_df = load_file(os.path.join(out_geo_path, f"Zest_Geo_Lookup_{self.year}_State_{geo}.parquet"))
-            drop_intro = list(set(geo_df.columns).intersection(set(['RAW_ZEST_TRACTCE', 'TLID', 'PARITYL', 'RAW_ZEST_STATEFP', 'TFID', 'OFFSETR', 'TTRACTCE',
-                      'RAW_ZEST_COUNTYFP', 'LFROMTYP', 'RTOADD', 'ARIDR', 'RAW_ZEST_BLKGRPCE', 'STATEFP10', 'BLOCKCE', 
-                      'PUMACE10', 'LTOADD', 'LTOTYP', 'FROMHN', 'OFFSETL', 'TRACTCE10', 'TOHN', 'TBLKGPCE', 'RTOTYP',
-                      'BLKGRPCE10', 'RAW_ZEST_FULLNAME', 'PARITYR', 'RFROMTYP', 'LFROMADD', 'SIDE', 'ARIDL', 'PUMACE',
-                      'OFFSET', 'BLOCKCE10', 'COUNTYFP10', 'RFROMADD', 'EDGE_MTFCC', 'ROAD_MTFCC', 'RAW_ZEST_ZIP',
-                      'ZCTA5CE10', 'LINEARID'])))
-            geo_df = geo_df.drop(drop_intro, axis=1)
+        geo_index = None
+        if self.session is not None:
+            geo_df = self.session.geo_table(geo, self.parse_address)
+            if self.geo_index:
+                geo_index = self.session.geo_table_index(geo, self.parse_address)
+        else:
+            address_parser = None
+            if self.parse_address:
+                _, street_suffix_mapping, directionals_mapping, unit_mapping = load_mappings(join(curpath, '../data/processed'))
+                address_parser = AddressParser(street_suffix_mapping, directionals_mapping, unit_mapping)
+            geo_df = geo_load(geo, self.year, out_geo_path, address_parser)
+            if self.geo_index:
+                geo_index = geo_index_load(geo, self.year, out_geo_path, address_parser)
         
         data["ZEST_FULLNAME"] = data[self.street_address]
         data['ZEST_KEY_LONG'] = data[[self.key, 'replicate_flg']].apply(lambda x: "".join(x.dropna()), axis=1)
         
         print("      ...merge user input & lookup table")
-        geo_df = data.merge(geo_df, on=["ZEST_FULLNAME"], how="left")
+        if geo_index is not None:
+            geo_df = geo_index.join(data, geo_df, self.zip_code)
+        else:
+            geo_df = data.merge(geo_df, on=["ZEST_FULLNAME"], how="left")
         
-        geo_df['FROMHN_RIGHT'] = geo_df['FROMHN_RIGHT'].replace('nan', np.nan).fillna(-2).astype(float).astype(int)
-        geo_df['TOHN_RIGHT'] = geo_df['TOHN_RIGHT'].replace('nan', np.nan).fillna(-2).astype(float).astype(int)
-        geo_df["house_number_RIGHT"] = geo_df[self.house_number+'_RIGHT'].replace("", np.nan).fillna(-1).astype(float).astype(int)
-                    
-        geo_df["HN_Match"] = np.where(
-            (geo_df.house_number_LEFT == geo_df.FROMHN_LEFT) &
-            (geo_df.house_number_RIGHT >= geo_df.FROMHN_RIGHT) &
-            (geo_df.house_number_RIGHT <= geo_df.TOHN_RIGHT),
-            True,
-            False)
-        geo_df = geo_df.drop(['house_number_LEFT', 'TOHN_RIGHT'], axis=1)
-
-        geo_df["Parity_Match"] = np.where(
-            (geo_df.FROMHN_RIGHT.apply(self.__is_odd)) == (geo_df.house_number_RIGHT.apply(self.__is_odd)) ,
-            True,
-            False) 
-        geo_df = geo_df.drop(['house_number_RIGHT', 'FROMHN_RIGHT'], axis=1)
+        geo_df["HN_Match"], geo_df["Parity_Match"] = match_house_numbers(geo_df, self.house_number)
+        geo_df = geo_df.drop(list(set(geo_df.columns).intersection(set(['house_number_LEFT', 'house_number_RIGHT',
+                                                                         'FROMHN_RIGHT', 'TOHN_RIGHT']))), axis=1)
         
         geo_df['ZCTA5CE'] = geo_df['ZCTA5CE'].replace('None', np.nan)
         geo_df["NEW_SUPER_ZIP"] = np.where(geo_df.ZCTA5CE == geo_df[self.zip_code], geo_df.ZCTA5CE, geo_df.ZEST_ZIP)
@@ -174,13 +510,8 @@ class ZGeo(BaseZRP):
 
         print("      ...mapping")    
         #ZIP not matched
-        all_keys = list(geo_df['ZEST_KEY_LONG'].unique())
-        
-        zip_match_keys = geo_df.loc[geo_df['ZIP_Match'], 'ZEST_KEY_LONG'].tolist()
-        no_zip_match_keys = geo_df.loc[~geo_df['ZIP_Match'], 'ZEST_KEY_LONG'].tolist() 
-        
-        df_zip_only = geo_df[geo_df['ZEST_KEY_LONG'].isin(no_zip_match_keys)] 
-        geo_df = geo_df[geo_df['ZEST_KEY_LONG'].isin(zip_match_keys)]     
+        df_zip_only = geo_df[any_by_key(geo_df, ~geo_df['ZIP_Match'].values)]
+        geo_df = geo_df[any_by_key(geo_df, geo_df['ZIP_Match'].values)]
         geo_df = geo_df.drop(['ZIP_Match'], axis=1)    
         na_match_cols = ['BLKGRPCE', 'COUNTYFP', 'FROMHN', 'TOHN', 'TRACTCE', 'ZCTA5CE',
                          'ZCTA5CE10', 'ZEST_FULLNAME', 'ZEST_ZIP', 'small', 'big','HN_Match', 
@@ -190,51 +521,42 @@ class ZGeo(BaseZRP):
         df_zip_only = df_zip_only.drop(list(set(df_zip_only.columns).intersection(set(na_match_cols))), axis=1)
         df_zip_only = df_zip_only.drop_duplicates(subset = ['ZEST_KEY_LONG'])
         #ZIP matched, HN not match
-        all_keys = list(geo_df['ZEST_KEY_LONG'].unique())
-        
-        HN_match_keys = geo_df.loc[geo_df['HN_Match'], 'ZEST_KEY_LONG'].tolist()
-        no_HN_match_keys = list(set(all_keys) - set(HN_match_keys)) 
-        
-        df_no_HN = geo_df[geo_df['ZEST_KEY_LONG'].isin(no_HN_match_keys)] 
-        geo_df = geo_df[geo_df['ZEST_KEY_LONG'].isin(HN_match_keys)] 
+        HN_match = any_by_key(geo_df, geo_df['HN_Match'].values)
+        df_no_HN = geo_df[~HN_match]
+        geo_df = geo_df[HN_match]
         na_match_cols = ['BLKGRPCE', 'FROMHN', 'TOHN', 'NEW_SUPER_ZIP', 'ZIP_Match']
-        df_no_HN = self.__majority_vote_deduplication(df_no_HN, 'ZEST_KEY_LONG')
+        df_no_HN = majority_vote_deduplication(df_no_HN, 'ZEST_KEY_LONG')
         df_no_HN = df_no_HN.drop(list(set(df_no_HN.columns).intersection(set(na_match_cols))), axis=1) 
             
         #ZIP matched, HN matched, Parity not matched
-        all_keys = list(geo_df['ZEST_KEY_LONG'].unique())
-        
-        parity_match_keys = geo_df.loc[geo_df['Parity_Match'], 'ZEST_KEY_LONG'].tolist() 
-        no_parity_match_keys = list(set(all_keys) - set(parity_match_keys))       
-        
-        df_no_parity = geo_df[geo_df['ZEST_KEY_LONG'].isin(no_parity_match_keys)] 
-        geo_df = geo_df[geo_df['ZEST_KEY_LONG'].isin(parity_match_keys)]  
-        df_no_parity = self.__majority_vote_deduplication(df_no_parity, 'ZEST_KEY_LONG')
+        parity_match = any_by_key(geo_df, geo_df['Parity_Match'].values)
+        df_no_parity = geo_df[~parity_match]
+        geo_df = geo_df[parity_match]
+        df_no_parity = majority_vote_deduplication(df_no_parity, 'ZEST_KEY_LONG')
         
         #ZIP matched, HN matched, Parity matched
         df_parity = geo_df.copy()
-        df_parity = self.__majority_vote_deduplication(df_parity, 'ZEST_KEY_LONG')
+        df_parity = majority_vote_deduplication(df_parity, 'ZEST_KEY_LONG')
         geo_df = None 
         
         #Merge all results
         geo_df_merged = pd.concat([df_zip_only, df_no_HN, df_no_parity, df_parity])
                        
         # Create GEOIDs
-        geo_df_merged["GEOID_CT"] = geo_df_merged[["STATEFP", "COUNTYFP", "TRACTCE"]].apply(lambda x: "".join(x.dropna()) if "".join(x.dropna()) != "" else None, axis=1)
-        geo_df_merged["GEOID_CT"] = geo_df_merged["GEOID_CT"].apply(lambda x: x if x is None or len(x) == 11 else None)
-        geo_df_merged["GEOID_BG"] = geo_df_merged[["GEOID_CT", "BLKGRPCE"]].apply(lambda x: "".join(x.dropna()) if "".join(x.dropna()) != "" else None, axis=1)
-        geo_df_merged["GEOID_BG"] = geo_df_merged["GEOID_BG"].apply(lambda x: x if x is None or len(x) == 12 else None)
+        geo_df_merged["GEOID_CT"] = join_geoid(geo_df_merged, ["STATEFP", "COUNTYFP", "TRACTCE"], 11)
+        geo_df_merged["GEOID_BG"] = join_geoid(geo_df_merged, ["GEOID_CT", "BLKGRPCE"], 12)
         geo_df_merged["GEOID_ZIP"] = np.where(geo_df_merged["ZCTA5CE"].notna(), geo_df_merged["ZCTA5CE"], geo_df_merged[self.zip_code])
         
         # Choose one entry from 'replicate_flg'
         if replicate:
             geo_df_merged = geo_df_merged.sort_values(['ZEST_KEY_LONG']).groupby('ZEST_KEY').first()
 
-        geo_validate = ValidateGeo()
-        geo_validate.fit()
-        geo_validators_in = geo_validate.transform(geo_df_merged)
-        save_json(geo_validators_in, self.out_path, "input_geo_validator.json") 
-        print("   [Completed] Validating input geo data")        
+        if validate:
+            geo_validate = ValidateGeo()
+            geo_validate.fit()
+            geo_validators_in = geo_validate.transform(geo_df_merged)
+            save_json(geo_validators_in, self.out_path, "input_geo_validator.json") 
+            print("   [Completed] Validating input geo data")        
 
         cols_to_drop = list(set(geo_df_merged.columns).intersection(set(['BLKGRPCE', 'COUNTYFP', 'FROMHN', 'TOHN',
                                                                          'TRACTCE', 'ZCTA5CE', 'ZCTA5CE10', 'ZEST_FULLNAME',
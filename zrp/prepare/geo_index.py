@@ -0,0 +1,127 @@
+import pandas as pd
+import numpy as np
+
+
+class GeoIndex():
+    """
+    Index of the segments of a geo lookup table by street name & zip code. Segments are listed under their
+    `ZEST_ZIP` and, when it differs, their `ZCTA5CE`, the two zip codes an address is matched on, sorted so the
+    segments of a street & zip code are one range of rows. Addresses are joined to the segments of their street in
+    their zip code only, instead of every segment of their street in the state. An address with no segment of its
+    street in its zip code is joined to the first segment of its street, which geocodes it to its zip code like the
+    full join would.
+
+    Parameters
+    ----------
+    entries: pd.DataFrame
+        Street names 'ZEST_FULLNAME', zip codes 'ZIP_KEY', and row numbers 'GEO_ROW' of the lookup table, sorted by
+        all three
+    """
+
+    index_cols = ["ZEST_FULLNAME", "ZIP_KEY", "GEO_ROW"]
+
+    def __init__(self, entries):
+        self.entries = entries.reset_index(drop=True)
+        streets = self.entries["ZEST_FULLNAME"].values
+        zips = self.entries["ZIP_KEY"].values
+        new_key = np.ones(len(self.entries), dtype=bool)
+        new_key[1:] = (streets[1:] != streets[:-1]) | (zips[1:] != zips[:-1])
+        self.starts = np.flatnonzero(new_key)
+        self.stops = np.append(self.starts[1:], len(self.entries))
+        self.keys = pd.MultiIndex.from_arrays([streets[self.starts], zips[self.starts]])
+        self.rows = self.entries["GEO_ROW"].values
+        self.first_rows = self.entries.groupby("ZEST_FULLNAME", sort=False)["GEO_ROW"].min()
+
+    @classmethod
+    def build(cls, geo_df):
+        """
+        Returns the index of a geo lookup table
+
+        Parameters
+        ----------
+        geo_df: pd.DataFrame
+            Geo lookup table, with the row order it is joined in
+        """
+        geo_rows = np.arange(len(geo_df))
+        zcta = geo_df["ZCTA5CE"]
+        other_zcta = (zcta.notna() & (zcta != "None") & (zcta != geo_df["ZEST_ZIP"])).values
+        entries = pd.concat([pd.DataFrame({"ZEST_FULLNAME": geo_df["ZEST_FULLNAME"].values,
+                                           "ZIP_KEY": geo_df["ZEST_ZIP"].values,
+                                           "GEO_ROW": geo_rows}),
+                             pd.DataFrame({"ZEST_FULLNAME": geo_df["ZEST_FULLNAME"].values[other_zcta],
+                                           "ZIP_KEY": zcta.values[other_zcta],
+                                           "GEO_ROW": geo_rows[other_zcta]})], ignore_index=True)
+        entries = entries[entries["ZEST_FULLNAME"].notna()]
+        entries = entries.sort_values(cls.index_cols, kind="mergesort")
+        return (cls(entries))
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Returns an index saved with `save`
+
+        Parameters
+        ----------
+        file_path: str
+            Parquet file of the index
+        """
+        return (cls(pd.read_parquet(file_path, columns=cls.index_cols)))
+
+    def save(self, file_path):
+        """
+        Saves the index as a parquet file
+
+        Parameters
+        ----------
+        file_path: str
+            Parquet file to write
+        """
+        self.entries.to_parquet(file_path, index=False)
+
+    @property
+    def nbytes(self):
+        return (int(self.entries.memory_usage(deep=True).sum()) + self.starts.nbytes + self.stops.nbytes)
+
+    def candidates(self, streets, zips):
+        """
+        Returns the positions of the addresses and the lookup table rows each is joined to, as two arrays of the
+        same length. Addresses whose street is not in the table are joined to row -1.
+
+        Parameters
+        ----------
+        streets: np.ndarray
+            Street names of the addresses
+        zips: np.ndarray
+            Zip codes of the addresses
+        """
+        key_positions = self.keys.get_indexer(pd.MultiIndex.from_arrays([streets, zips]))
+        matched = key_positions >= 0
+        starts = np.where(matched, self.starts[key_positions], 0)
+        counts = np.where(matched, self.stops[key_positions] - starts, 1)
+
+        address_positions = np.repeat(np.arange(len(key_positions)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        geo_rows = self.rows[np.repeat(starts, counts) + offsets]
+        unmatched = ~matched[address_positions]
+        first_rows = self.first_rows.reindex(pd.Index(streets, dtype=object)[address_positions[unmatched]])
+        geo_rows[unmatched] = first_rows.fillna(-1).astype(int).values
+        return (address_positions, geo_rows)
+
+    def join(self, data, geo_df, zip_code):
+        """
+        Returns the addresses joined to their candidate segments, with the columns of
+        `data.merge(geo_df, on=["ZEST_FULLNAME"], how="left")`
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            Addresses with a 'ZEST_FULLNAME' street name column
+        geo_df: pd.DataFrame
+            Geo lookup table the index was built on
+        zip_code: str
+            Name of the zip code column of `data`
+        """
+        address_positions, geo_rows = self.candidates(data["ZEST_FULLNAME"].values, data[zip_code].values)
+        left = data.iloc[address_positions].reset_index(drop=True)
+        right = geo_df.drop(["ZEST_FULLNAME"], axis=1).reset_index(drop=True).reindex(geo_rows).reset_index(drop=True)
+        return (left.join(right, lsuffix="_x", rsuffix="_y"))
@@ -5,6 +5,8 @@ from .geo_geocoder import *
 from .acs_mapper import *
 from .base import BaseZRP
 from .utils import *
+from zrp.profiling import profiler
+from tqdm import tqdm
 import pandas as pd
 import numpy as np
 import warnings
@@ -17,6 +19,29 @@ import warnings
 warnings.filterwarnings(action='ignore')
 
 
+def check_support_files(data_path):
+    """
+    Raises an error if the geo or ACS lookup tables have not been downloaded
+
+    Parameters
+    ----------
+    data_path: str
+        Filepath of the processed support data directory
+    """
+    lookup_tables_config = load_json(join(data_path, "lookup_tables_config.json"))
+
+    geo_folder = os.path.join(data_path, "geo", lookup_tables_config['geo_year'])
+    acs_folder = os.path.join(data_path, 'acs', lookup_tables_config['acs_year'], lookup_tables_config['acs_span'])
+
+    if not ((os.path.isdir(geo_folder)) &
+            (os.path.isdir(acs_folder ))
+           ):
+        raise AssertionError("Missing required support files please see the README for how to download the support files: https://github.com/zestai/zrp/blob/main/README.rst#install ")
+    if not ((len(os.listdir(geo_folder)) > 0) &
+            (len(os.listdir(acs_folder)) > 0)):
+        raise AssertionError("Missing required support files please see the README for how to download the support files: https://github.com/zestai/zrp/blob/main/README.rst#install ") 
+
+
 class ZRP_Prepare(BaseZRP):
     """
     Prepares data to generate race & ethnicity proxies
@@ -25,10 +50,13 @@ class ZRP_Prepare(BaseZRP):
     ------------
     file_path: str, optional
         Path where to put artifacts and other files generated during intermediate steps.
+    session: ZRP_Session, optional
+        Session holding preloaded support files. Support files are read from disk on each call if not provided.
     """
     
-    def __init__(self, file_path=None, *args, **kwargs):
+    def __init__(self, file_path=None, session=None, *args, **kwargs):
         super().__init__(file_path=file_path, *args, **kwargs)
+        self.session = session
         self.params_dict =  kwargs
         
     def fit(self, input_data):
@@ -47,7 +75,7 @@ class ZRP_Prepare(BaseZRP):
                 raise ValueError("Improper Census Block Group format provided. The tool requires the full state fips, county fips, tract, and block group format. (ie '060373116003')")
                 
     
-    def transform(self, input_data):
+    def transform(self, input_data, save_artifacts=True):
         """
         Transforms the data
         
@@ -55,6 +83,9 @@ class ZRP_Prepare(BaseZRP):
         ----------
         input_data: pd.Dataframe
             Dataframe to be transformed
+        save_artifacts: bool, default True
+            Whether to save the input validators and the geocoded tables to the artifacts folder. Nothing is written
+            to disk if False.
         """  
 
         curpath = dirname(__file__)
@@ -67,33 +98,28 @@ class ZRP_Prepare(BaseZRP):
             print("Data file is loaded")
             
         data_path = join(curpath, f'../data/processed')
-        lookup_tables_config = load_json(join(data_path, "lookup_tables_config.json"))
-
-        geo_folder = os.path.join(data_path, "geo", lookup_tables_config['geo_year'])
-        acs_folder = os.path.join(data_path, 'acs', lookup_tables_config['acs_year'], lookup_tables_config['acs_span'])
-
-        if not ((os.path.isdir(geo_folder)) &
-                (os.path.isdir(acs_folder ))
-               ):
-            raise AssertionError("Missing required support files please see the README for how to download the support files: https://github.com/zestai/zrp/blob/main/README.rst#install ")
-        if not ((len(os.listdir(geo_folder)) > 0) &
-                (len(os.listdir(acs_folder)) > 0)):
-            raise AssertionError("Missing required support files please see the README for how to download the support files: https://github.com/zestai/zrp/blob/main/README.rst#install ") 
+        if self.session is None:
+            check_support_files(data_path)
         gen_process = ProcessStrings(file_path=self.file_path, **self.params_dict)
-        gen_process.fit(data)
-        data = gen_process.transform(data)
+        gen_process.fit(data, validate=save_artifacts)
+        with profiler.stage("ProcessStrings", len(data)) as stage:
+            data = gen_process.transform(data)
+            profiler.set_output(stage, data)
         
         print("")
 
         print("[Start] Preparing geo data")
 
-        inv_state_map = load_json(join(data_path, "inv_state_mapping.json"))
+        if self.session is not None:
+            inv_state_map = self.session.inv_state_mapping
+        else:
+            inv_state_map = load_json(join(data_path, "inv_state_mapping.json"))
         data['zest_in_state_fips'] = data[self.state].replace(inv_state_map)
         print("")
         
-        geocode = ZGeo(file_path=self.file_path, **self.params_dict)
+        geocode = ZGeo(file_path=self.file_path, session=self.session, **self.params_dict)
         geocode_out = [] 
-        geo_grps = data.groupby([self.state])
+        geo_grps = data.groupby(self.state)
         geo_dict = {}
         for s, g in geo_grps:
             geo_dict[s] = g
@@ -107,7 +133,9 @@ class ZRP_Prepare(BaseZRP):
         for s in tqdm(gdkys):
             print("   ... on state:", str(s))                         
             geo = inv_state_map[s].zfill(2)
-            output = geocode.transform(geo_dict[s], geo, processed = True, replicate = True, save_table = True)
+            with profiler.stage(f"ZGeo_{s}", len(geo_dict[s])) as stage:
+                output = geocode.transform(geo_dict[s], geo, processed = True, replicate = True, save_table = save_artifacts, validate = save_artifacts)
+                profiler.set_output(stage, output)
             geocode_out.append(output)
         if len(geocode_out) > 0:
             geo_coded = pd.concat(geocode_out)
@@ -127,28 +155,19 @@ class ZRP_Prepare(BaseZRP):
         if self.block_group is not None and self.census_tract is not None:
             geo_coded = geo_coded.drop([self.block_group, self.census_tract], axis = 1)
             geo_coded = geo_coded.merge(data[[self.block_group, self.census_tract]], right_index = True, left_index = True, how = 'left')
-            geo_coded['GEOID_BG'] = np.where((geo_coded[self.block_group].isna()) | (geo_coded[self.block_group].str.contains("None") | (geo_coded[self.block_group] == ''))
-                                             ,geo_coded['GEOID_BG']
-                                             ,geo_coded[self.block_group])
-            geo_coded['GEOID_CT'] = np.where((geo_coded[self.census_tract].isna()) | (geo_coded[self.census_tract].str.contains("None") | (geo_coded[self.census_tract] == ''))
-                                             ,geo_coded['GEOID_CT']
-                                             ,geo_coded[self.census_tract])
+            geo_coded['GEOID_BG'] = fill_geoid(geo_coded['GEOID_BG'], geo_coded[self.block_group])
+            geo_coded['GEOID_CT'] = fill_geoid(geo_coded['GEOID_CT'], geo_coded[self.census_tract])
             geo_coded = geo_coded.drop([self.block_group, self.census_tract], axis = 1) 
         elif self.block_group is not None:
             geo_coded = geo_coded.drop(self.block_group, axis = 1)
             geo_coded = geo_coded.merge(data[self.block_group], right_index = True, left_index = True, how = 'left')
-            geo_coded['GEOID_BG'] = np.where((geo_coded[self.block_group].isna()) | (geo_coded[self.block_group].str.contains("None") | (geo_coded[self.block_group] == ''))
-                                             ,geo_coded['GEOID_BG']
-                                             ,geo_coded[self.block_group])
+            geo_coded['GEOID_BG'] = fill_geoid(geo_coded['GEOID_BG'], geo_coded[self.block_group])
             geo_coded = geo_coded.drop(self.block_group, axis = 1)            
         elif self.census_tract is not None:
             geo_coded['GEOID_BG'] = np.nan
             geo_coded = geo_coded.drop(self.census_tract, axis = 1)
             geo_coded = geo_coded.merge(data[self.census_tract], right_index = True, left_index = True, how = 'left')
-            print(geo_coded[self.census_tract] == '')
-            geo_coded['GEOID_CT'] = np.where((geo_coded[self.census_tract].isna()) | (geo_coded[self.census_tract].str.contains("None") | (geo_coded[self.census_tract] == ''))
-                                             ,geo_coded['GEOID_CT']
-                                             ,geo_coded[self.census_tract])
+            geo_coded['GEOID_CT'] = fill_geoid(geo_coded['GEOID_CT'], geo_coded[self.census_tract])
             geo_coded = geo_coded.drop(self.census_tract, axis = 1)
                                                    
         print("")
@@ -157,14 +176,15 @@ class ZRP_Prepare(BaseZRP):
         print("")
         print("[Start] Preparing ACS data")
         
-        print("   [Start] Validating ACS input data")
-        validate = ValidateGeocoded()
-        validate.fit()
-        acs_validator = validate.transform(geo_coded)
-        save_json(acs_validator, self.out_path, "input_acs_validator.json")
-        print("   [Completed] Validating ACS input data")
-        print("")
-        amp = ACSModelPrep(**self.params_dict)
+        if save_artifacts:
+            print("   [Start] Validating ACS input data")
+            validate = ValidateGeocoded()
+            validate.fit()
+            acs_validator = validate.transform(geo_coded)
+            save_json(acs_validator, self.out_path, "input_acs_validator.json")
+            print("   [Completed] Validating ACS input data")
+            print("")
+        amp = ACSModelPrep(session=self.session, **self.params_dict)
         amp.fit()
         data_out = amp.transform(geo_coded, False)
         print("[Complete] Preparing ACS data")
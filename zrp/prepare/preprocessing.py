@@ -1,9 +1,10 @@
 from os.path import dirname, join, expanduser
-from joblib import Parallel, delayed
 from .base import BaseZRP
-import multiprocessing
-from tqdm import tqdm
+from .replacer import replace_patterns
+from .address import AddressParser
 from .utils import *
+import pyarrow.compute as pc
+import pyarrow as pa
 import pandas as pd
 import numpy as np 
 import json
@@ -11,6 +12,7 @@ import sys
 import os
 import re
 from zrp.validate import *
+from zrp.profiling import profiler
 import warnings
 warnings.filterwarnings(action='ignore')
 
@@ -61,7 +63,7 @@ def norm_na(data, na_values):
     for key in na_values:
         na_dict[key] = None
 
-    data = data.replace(na_dict, regex=True)
+    data = replace_patterns(data, na_dict)
     return(data)
 
 
@@ -96,7 +98,82 @@ def set_id(data, key):
     return(data)
 
 
-def reduce_whitespace(data):
+string_backends = ("python", "arrow")
+na_patterns = ["^\\s*$", "^NAN$", "^NONE$"]
+
+
+def nan_arrow_string_dtype():
+    """
+    Returns the pandas string dtype that keeps values in a pyarrow array and treats missing values as NaN, so results
+    of pyarrow compute kernels become columns without a copy & masks built from them work with `np.where`. Returns
+    None on pandas versions without one, where columns fall back to objects.
+    """
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except (TypeError, ValueError, ImportError):
+        pass
+    try:
+        return pd.StringDtype("pyarrow_numpy")
+    except (TypeError, ValueError, ImportError):
+        return None
+
+
+arrow_string_dtype = nan_arrow_string_dtype()
+
+
+def arrow_strings(data, missing_as_str=True):
+    """
+    Returns a column as a pyarrow string array. Columns already held in pyarrow are read without a copy.
+    
+    Parameters
+    ----------
+    data: pd.Series
+        Column to convert
+    missing_as_str: bool
+        Whether missing values become 'None' or 'nan' the way `str(x)` makes them, or stay null
+    """
+    if getattr(data.dtype, "storage", None) == "pyarrow":
+        array = pa.array(data.array)
+        if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+            if missing_as_str:
+                array = pc.fill_null(array, str(data.dtype.na_value))
+            return array
+    if missing_as_str:
+        return pa.array(as_str(data).values, type=pa.large_string())
+    return pa.array(data.values, type=pa.large_string(), from_pandas=True)
+
+
+def from_arrow_strings(array, data):
+    """
+    Returns a pyarrow string array as a column with the index & name of the column it was computed from. The column
+    keeps the array without a copy, with NaN for nulls. Nulls become None in an object column on pandas versions
+    without an Arrow string dtype.
+    
+    Parameters
+    ----------
+    array: pa.Array
+        String array
+    data: pd.Series
+        Column the array was computed from
+    """
+    if arrow_string_dtype is not None:
+        return pd.Series(array, dtype=arrow_string_dtype, index=data.index, name=data.name)
+    return pd.Series(array.to_numpy(zero_copy_only=False), index=data.index, name=data.name)
+
+
+def arrow_reduce_whitespace(array):
+    """
+    Trims whitespace and collapses runs of spaces of a pyarrow string array
+    
+    Parameters
+    ----------
+    array: pa.Array
+        String array
+    """
+    return pc.replace_substring_regex(pc.utf8_trim_whitespace(array), pattern=" +", replacement=" ")
+
+
+def reduce_whitespace(data, string_backend="python"):
     """
     Reduce whitespace
     
@@ -104,28 +181,251 @@ def reduce_whitespace(data):
     ----------
     data: pd.DataFrame
         DataFrame to make changes to 
+    string_backend: str
+        'python' to use pandas string methods or 'arrow' to use pyarrow compute kernels
     """
-    return data.apply(lambda x: x.str.strip().str.replace(" +", " ", regex=True))
+    if string_backend != "arrow":
+        return data.apply(lambda x: x.str.strip().str.replace(" +", " ", regex=True))
+    data = data.copy()
+    for col in data.columns:
+        try:
+            data[col] = from_arrow_strings(arrow_reduce_whitespace(arrow_strings(data[col], missing_as_str=False)), data[col])
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Columns holding other types than strings
+            data[col] = data[col].str.strip().str.replace(" +", " ", regex=True)
+    return data
+
 
+def format_strings(data, string_backend="python"):
+    """
+    Converts every value to an upper case string, reduces whitespace, and sets empty strings & 'NAN' or 'NONE' values
+    to None
+    
+    Parameters
+    ----------
+    data: pd.DataFrame
+        DataFrame to make changes to 
+    string_backend: str
+        'python' to use pandas string methods or 'arrow' to use pyarrow compute kernels
+    """
+    if string_backend != "arrow":
+        data = data.astype(str)
+        data = data.apply(lambda x: x.str.upper())
+        data = reduce_whitespace(data)
+        data = replace_patterns(data, {pattern: None for pattern in na_patterns})
+        return data
+    formatted = {}
+    for col in data.columns:
+        array = arrow_reduce_whitespace(pc.utf8_upper(arrow_strings(data[col])))
+        is_na = pc.match_substring_regex(array, pattern="|".join(na_patterns))
+        formatted[col] = from_arrow_strings(pc.if_else(is_na, pa.scalar(None, array.type), array), data[col])
+    return pd.DataFrame(formatted, index=data.index, columns=data.columns)
 
 
-def address_mining(data, i):
+def arrow_word_boundaries(pattern):
+    """
+    Returns a regular expression for pyarrow compute kernels with `\\b` word boundaries spelled out, since pyarrow only
+    treats ascii characters as word characters while Python treats every letter & digit as one
+    
+    Parameters
+    ----------
+    pattern: str
+        Regular expression with `\\b` only at its start & end
     """
-    Cleans street addresses
+    word = "\\pL\\pN_"
+    start, end = "", ""
+    if pattern.startswith("\\b"):
+        pattern, start = pattern[2:], f"(?:^|[^{word}])"
+    if pattern.endswith("\\b"):
+        pattern, end = pattern[:-2], f"(?:$|[^{word}])"
+    return f"{start}(?:{pattern}){end}"
 
+
+def null_matches(data, pattern, string_backend="python"):
+    """
+    Sets values matching a regular expression to None
+    
     Parameters
     ----------
     data: pd.DataFrame
         DataFrame to make changes to 
-    i: int
-        Iteration variable
+    pattern: str
+        Regular expression to search values for
+    string_backend: str
+        'python' to use pandas string methods or 'arrow' to use pyarrow compute kernels
+    """
+    if string_backend != "arrow":
+        return replace_patterns(data, {pattern: None})
+    data = data.copy()
+    for col in data.columns:
+        try:
+            array = arrow_strings(data[col], missing_as_str=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            data[col] = replace_patterns(data[col], {pattern: None})
+            continue
+        is_match = pc.fill_null(pc.match_substring_regex(array, pattern=arrow_word_boundaries(pattern)), False)
+        data[col] = from_arrow_strings(pc.if_else(is_match, pa.scalar(None, array.type), array), data[col])
+    return data
+
+
+def as_str(data):
     """
-    data[i]  = re.sub("[^A-Za-z0-9\\s]",
-                                   "",
-                                   re.sub("[^A-Za-z0-9']",
-                                          " ",
-                                          str(data[i])))
-    return(data[i])
+    Converts every value of a column to a string the way `str(x)` does, so missing values become 'None' or 'nan'.
+    Strings are kept as objects so `.str` methods match with Python regular expressions.
+    
+    Parameters
+    ----------
+    data: pd.Series
+        Column to convert
+    """
+    strings = data.astype(str).astype(object)
+    missing = strings.isna()
+    if missing.any():
+        strings[missing] = data[missing].map(str)
+    return strings
+
+
+def replace_regex(data, replacements, string_backend="python"):
+    """
+    Applies regular expression substitutions in order to the string of each value, same as nested `re.sub` calls on
+    `str(x)`
+    
+    Parameters
+    ----------
+    data: pd.Series
+        Column to make changes to 
+    replacements: list
+        (pattern, replacement) tuples
+    string_backend: str
+        'python' to use pandas string methods or 'arrow' to use pyarrow compute kernels
+    """
+    if string_backend != "arrow":
+        strings = as_str(data)
+        for pattern, replacement in replacements:
+            strings = strings.str.replace(pattern, replacement, regex=True)
+        return strings
+    array = arrow_strings(data)
+    for pattern, replacement in replacements:
+        array = pc.replace_substring_regex(array, pattern=pattern, replacement=replacement)
+    return from_arrow_strings(array, data)
+
+
+def keep_digits(data, string_backend="python"):
+    """
+    Removes every character that is not a digit, same as `re.sub("[^0-9]", "", str(x))` on each value
+    
+    Parameters
+    ----------
+    data: pd.Series
+        Column to make changes to 
+    string_backend: str
+        'python' to use pandas string methods or 'arrow' to use pyarrow compute kernels
+    """
+    return replace_regex(data, [("[^0-9]", "")], string_backend)
+
+
+def clean_names(data, string_backend="python"):
+    """
+    Replaces characters other than letters & apostrophes with spaces, then removes apostrophes. Same as
+    `re.sub("[^A-Za-z\\s]", "", re.sub("[^A-Za-z']", " ", str(x)))` on each value
+    
+    Parameters
+    ----------
+    data: pd.Series
+        Column to make changes to 
+    string_backend: str
+        'python' to use pandas string methods or 'arrow' to use pyarrow compute kernels
+    """
+    return replace_regex(data, [("[^A-Za-z']", " "), ("[^A-Za-z\\s]", "")], string_backend)
+
+
+def clean_addresses(data, string_backend="python"):
+    """
+    Replaces characters other than letters, digits & apostrophes with spaces, then removes apostrophes. Same as
+    `re.sub("[^A-Za-z0-9\\s]", "", re.sub("[^A-Za-z0-9']", " ", str(x)))` on each value
+    
+    Parameters
+    ----------
+    data: pd.Series
+        Column to make changes to 
+    string_backend: str
+        'python' to use pandas string methods or 'arrow' to use pyarrow compute kernels
+    """
+    return replace_regex(data, [("[^A-Za-z0-9']", " "), ("[^A-Za-z0-9\\s]", "")], string_backend)
+
+
+
+def map_unique(data, func, name):
+    """
+    Applies a column transformation to each distinct value once and maps the results back to every row by the value's
+    code. Names, streets, and cities repeat heavily, so far fewer values are transformed than there are rows. The
+    number of distinct values and the share of rows that reused a result are recorded in the profiler. Arrow-backed
+    results stay Arrow-backed.
+    
+    Parameters
+    ----------
+    data: pd.Series
+        Column to transform
+    func: callable
+        Transformation of a column that transforms each value independently of the others
+    name: str
+        Name of the column, the profiler stage is named 'unique_{name}'
+    """
+    with profiler.stage(f"unique_{name}", len(data)) as stage:
+        codes, uniques = pd.factorize(data)
+        # Missing values are left out of the codes, they are transformed as they are since None & NaN may differ
+        missing = codes == -1
+        values = pd.concat([pd.Series(uniques, dtype=data.dtype), data[missing].reset_index(drop=True)], ignore_index=True)
+        transformed = func(values)
+        if isinstance(transformed, pd.Series):
+            transformed = transformed.array
+        else:
+            transformed = np.asarray(transformed, dtype=object)
+        indexer = codes.copy()
+        indexer[missing] = len(uniques) + np.arange(missing.sum())
+        out = pd.Series(transformed.take(indexer), index=data.index, name=data.name, dtype=transformed.dtype)
+        profiler.set_output(stage, out)
+        stage["unique_values"] = len(values)
+        stage["hit_rate"] = 1 - len(values) / len(data) if len(data) > 0 else None
+    return out
+
+
+def add_to_replicate_flg(flags, add_to_flg):
+    """
+    Adds to the 'replicate_flg' of replicated rows, keeping the flags 6 digit strings
+    
+    Parameters
+    ----------
+    flags: pd.Series
+        'replicate_flg' column
+    add_to_flg: int
+        Value added to the flags
+    """
+    return map_unique(flags, lambda x: (x.astype(int) + add_to_flg).astype(str).str.zfill(6), "replicate_flg")
+
+
+def map_street_suffixes(data, street_suffix_mapping):
+    """
+    Maps street suffixes to their standard abbreviations, removes text after a '-' and house numbers left in street
+    addresses
+    
+    Parameters
+    ----------
+    data: pd.Series
+        Street address column
+    street_suffix_mapping: dict
+       Dictionary with street mappings
+    """
+    data = replace_patterns(data, street_suffix_mapping)
+    data = pd.Series(np.where(data=='nan', None, data), index=data.index, name=data.name)
+    # Remove addtl "-"
+    data = data.str.split("-", n=1, expand=True)[0]
+    data = data.str.replace(pat = "-", repl = "", regex=False)
+    data = data.str.replace("^([0-9]{1,6}[A-Z]{1,3})", "", regex=True)
+    data = data.str.replace("^([0-9]{1,3} [A-Z]{2})", "", regex=True)
+    data = data.str.replace(" [0-9]{4,7} ", "", regex=True)
+    return data
+
 
 def replicate_house_number(data, house_number, add_to_flg):
     """
@@ -143,9 +443,9 @@ def replicate_house_number(data, house_number, add_to_flg):
     """
     print("         ...Base")
     df_base =  data.copy()# base is complete, containing the original record (1)
-    data['replicate_flg'] = data['replicate_flg'].apply(lambda s: str(int(s) + add_to_flg).zfill(6))
+    data['replicate_flg'] = add_to_replicate_flg(data['replicate_flg'], add_to_flg)
     print("         ...Number processing...")
-    data[house_number] = data[house_number].apply(lambda x: re.sub("[^0-9]","",str(x))) 
+    data[house_number] = map_unique(data[house_number], keep_digits, house_number)
     dataout = pd.concat([df_base, data], axis=0)
     dataout = dataout.drop_duplicates(keep = 'first', subset = [col for col in dataout.columns if col != 'replicate_flg'])
     print(f"         House number dataframe expansion is complete! (n={len(dataout)})")
@@ -172,18 +472,9 @@ def replicate_address_2(data, street_address, street_suffix_mapping, add_to_flg
     print("         ...Base")
     df_base =  data.copy()
     if replicate_with_flg ==1:
-        data['replicate_flg'] = data['replicate_flg'].apply(lambda s: str(int(s) + add_to_flg).zfill(6))
-    print("         ...Map street suffixes...")
-    data[street_address] = data[street_address].replace(street_suffix_mapping, regex=True) # this mapping takes the longest but is ok for 10K records
-    data[street_address] = np.where(data[street_address]=='nan', None, data[street_address])
-    print("         ...Mapped & split by street suffixes...")
-    # Remove addtl "-"
-    data[street_address] = data[street_address].str.split("-", 1, expand=True)[0]
-    data[street_address] = data[street_address].str.replace(pat = "-", repl = "", regex=False)
-    print("         ...Number processing...")
-    data[street_address] = data[street_address].str.replace("^([0-9]{1,6}[A-Z]{1,3})", "", regex=True)
-    data[street_address] = data[street_address].str.replace("^([0-9]{1,3} [A-Z]{2})", "", regex=True)
-    data[street_address] = data[street_address].str.replace(" [0-9]{4,7} ", "", regex=True)
+        data['replicate_flg'] = add_to_replicate_flg(data['replicate_flg'], add_to_flg)
+    print("         ...Map street suffixes & number processing...")
+    data[street_address] = map_unique(data[street_address], lambda x: map_street_suffixes(x, street_suffix_mapping), "street_suffixes")
     print("")
     dataout = pd.concat([df_base, data], axis=0)
     dataout = dataout.drop_duplicates(keep = 'first', subset = [col for col in dataout.columns if col != 'replicate_flg'])
@@ -224,14 +515,48 @@ def replicate_north_n(data, street_address, add_to_flg = 0, replicate_with_flg =
                         '\\bSUDOESTE\\b' : 'SO'}
 
     df_base =  data.copy()
-    data[street_address] = data[street_address].replace(north_n_mapping, regex=True)
+    data[street_address] = map_unique(data[street_address], lambda x: replace_patterns(replace_patterns(x, north_n_mapping), north_n_mapping), "north_n")
     if replicate_with_flg == 1:
-        data['replicate_flg'] = data['replicate_flg'].apply(lambda s: str(int(s) + add_to_flg).zfill(6))
-    data[street_address] = data[street_address].replace(north_n_mapping, regex=True)
+        data['replicate_flg'] = add_to_replicate_flg(data['replicate_flg'], add_to_flg)
     dataout = pd.concat([df_base, data], axis=0)
     dataout = dataout.drop_duplicates(keep = 'first', subset = [col for col in dataout.columns if col != 'replicate_flg'])
     return dataout
        
+def replicate_street_keys(data, street_address, addresses, address_parser, add_to_flg = 0):
+    """
+    Replicate street keys by the fallback keys of each address: the key of the address read without units, which
+    matches street names ending in a number, ie 'COUNTY RD 12', and the key without pre & post-directionals, which
+    matches lookup tables that do not carry the directional.
+    
+    Parameters
+    ----------
+    data: pd.DataFrame
+        DataFrame to make changes to, with the street keys of `addresses` in the street address column
+    street_address: str
+       Name of street address column 
+    addresses: pd.Series
+        Street addresses the street keys were parsed from, with the index of the data before replication
+    address_parser: AddressParser
+        Parser of the street addresses
+    add_to_flg: int
+        'replicate_flg' column indicates the order of preference of replicated rows. The smaller the flag the higher the preference. The key without units gets 'add_to_flg' added to its flag, and the key without directionals 10 times 'add_to_flg'.
+    """
+    df_base = data.copy()
+    addresses = addresses.reindex(data.index)
+    fallbacks = [(add_to_flg, "street_key_no_unit", lambda x: address_parser.street_keys(x, units=False)),
+                 (10 * add_to_flg, "street_key_no_directional", lambda x: address_parser.street_keys(x, directionals=False))]
+    replicated = [df_base]
+    for flg, name, street_keys in fallbacks:
+        df_fallback = data.copy()
+        df_fallback[street_address] = map_unique(addresses, street_keys, name)
+        df_fallback['replicate_flg'] = add_to_replicate_flg(df_fallback['replicate_flg'], flg)
+        replicated.append(df_fallback[df_fallback[street_address].notna()])
+    dataout = pd.concat(replicated, axis=0)
+    dataout = dataout.drop_duplicates(keep = 'first', subset = [col for col in dataout.columns if col != 'replicate_flg'])
+    print(f"         Street key dataframe expansion is complete! (n={len(dataout)})")
+    return(dataout)
+
+
 def split_char_position(a_string):
     """
     Returns position used to split a non-numeric house number 
@@ -373,7 +698,17 @@ class ProcessStrings(BaseZRP):
     def __init__(self, file_path=None, *args, **kwargs):
         super().__init__(file_path=file_path, *args, **kwargs)
             
-    def fit(self, data):
+    def fit(self, data, validate=True):
+        """
+        Checks that the required columns have data and saves the input validator to the artifacts folder
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            Data to be processed
+        validate: bool, default True
+            Whether to compute & save the input validator. Required columns are checked either way.
+        """
         data_cols = list(data.columns)
         print("   [Start] Validating input data")
         base_req = [self.first_name, self.middle_name, self.last_name, self.state, self.zip_code, self.street_address]
@@ -390,11 +725,12 @@ class ProcessStrings(BaseZRP):
         val_na = is_missing(data, self.required_cols)
         if val_na:
             raise ValueError(f"     Missing required data {val_na}")            
-        validate = ValidateInput()
-        validate.fit()
-        validators_in = validate.transform(data)
-        make_directory(self.out_path)
-        save_json(validators_in, self.out_path, "input_validator.json")
+        if validate:
+            validator = ValidateInput()
+            validator.fit()
+            validators_in = validator.transform(data)
+            make_directory(self.out_path)
+            save_json(validators_in, self.out_path, "input_validator.json")
         print("   [Completed] Validating input data")
         print("")
         return self
@@ -423,15 +759,8 @@ class ProcessStrings(BaseZRP):
         
         # Convert to uppercase & trim whitespace
         print("   Formatting P1")
-        data = data.astype(str)
-        data = data.apply(lambda x: x.str.upper())
-        
-        data = reduce_whitespace(data)
-        na_dict =  {"^\\s*$": None,
-                    "^NAN$": None,
-                    "^NONE$": None}
-        data = data.replace(na_dict, regex=True)     
-        data[self.house_number] = data[self.house_number].apply(lambda x: re.sub("[^0-9]$", "", str(x)))
+        data = format_strings(data, self.string_backend)
+        data[self.house_number] = replace_regex(data[self.house_number], [("[^0-9]$", "")], self.string_backend)
         data = split_HN(data, [self.house_number])
         
         numeric_cols =  list(set([self.zip_code,
@@ -440,22 +769,16 @@ class ProcessStrings(BaseZRP):
         
         # Remove/replace special characters
         for col in numeric_cols:
-            data[col] = data[col].apply(lambda x: re.sub("[^0-9]",\
-                                                     "",\
-                                                    str(x))) 
+            data[col] = map_unique(data[col], lambda x: keep_digits(x, self.string_backend), col)
         if self.last_name:
             name_cols = list(set([self.first_name,
                                   self.middle_name,
                                   self.last_name]).intersection(set(data_cols))) 
             for col in name_cols:
-                    data[col] =  data[col].apply(lambda x: re.sub("[^A-Za-z\\s]",
-                                                              "",
-                                                              re.sub("[^A-Za-z']",
-                                                                     " ",
-                                                                     str(x))))
+                    data[col] = map_unique(data[col], lambda x: clean_names(x, self.string_backend), col)
         print("   Formatting P2")
         print("   reduce whitespace")
-        data = reduce_whitespace(data)
+        data = reduce_whitespace(data, self.string_backend)
         return(data)
     
         
@@ -494,8 +817,8 @@ class  ProcessACS(BaseZRP):
         data_in: pd.DataFrame
             DataFrame to make changes to 
         """
-        data = reduce_whitespace(data)
-        data = data.replace({'\\bN\\b': None}, regex=True) # Note: 800+ columns
+        data = reduce_whitespace(data, self.string_backend)
+        data = null_matches(data, '\\bN\\b', self.string_backend) # Note: 800+ columns
         data = data.reset_index(drop=False)
         return(data)
     
@@ -548,9 +871,12 @@ class  ProcessGeo(BaseZRP):
         Whether to return a readout
     n_jobs: int (default 1)
         Number of jobs in parallel
+    session: ZRP_Session, optional
+        Session holding preloaded support files. Mappings are read from disk if not provided.
     """
-    def __init__(self, *args, **kwargs):
+    def __init__(self, session=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.session = session
         
             
     def fit(self, data):        
@@ -603,29 +929,16 @@ class  ProcessGeo(BaseZRP):
             
 
             print("      ...formatting")
-            data = data.astype(str)
-            data = data.apply(lambda x: x.str.upper())
-            
-            data = reduce_whitespace(data)
-            na_dict =  {"^\\s*$": None,
-                       "^NAN$": None,
-                       "^NONE$": None}
-            data = data.replace(na_dict, regex=True)
+            data = format_strings(data, self.string_backend)
             # Remove/replace special characters
             for col in numeric_cols:
-                data[col] = data[col].apply(lambda x: re.sub("[^0-9]",\
-                                                         "",\
-                                                        str(x))) 
+                data[col] = map_unique(data[col], lambda x: keep_digits(x, self.string_backend), col)
             if self.last_name:
                 name_cols = list(set([self.first_name,
                                       self.middle_name,
                                       self.last_name]).intersection(set(data_cols))) 
                 for col in name_cols:
-                        data[col] =  data[col].apply(lambda x: re.sub("[^A-Za-z\\s]",
-                                                                  "",
-                                                                  re.sub("[^A-Za-z']",
-                                                                         " ",
-                                                                         str(x))))
+                        data[col] = map_unique(data[col], lambda x: clean_names(x, self.string_backend), col)
         
         data_path = join(curpath, f'../data/processed')
                 
@@ -635,12 +948,12 @@ class  ProcessGeo(BaseZRP):
             data["ZEST_KEY_COL"] = data.index        
         
         print("      ...address cleaning")
-        street_addr_dict = dict(zip(data.index, data[self.street_address])) 
-        street_addr_results = Parallel(n_jobs = self.n_jobs, prefer="threads", verbose=1)(delayed((address_mining))(street_addr_dict, i) for i in tqdm(list(data.index)))
-
-        data[self.street_address] = street_addr_results
+        data[self.street_address] = map_unique(data[self.street_address], lambda x: clean_addresses(x, self.string_backend), "street_address")
         
-        state_mapping, street_suffix_mapping, directionals_mapping, unit_mapping = load_mappings(data_path)
+        if self.session is not None:
+            state_mapping, street_suffix_mapping, directionals_mapping, unit_mapping = self.session.mappings
+        else:
+            state_mapping, street_suffix_mapping, directionals_mapping, unit_mapping = load_mappings(data_path)
         # State
         data[self.state]  = data[self.state].str.replace("[^\\w\\s]", "", regex=True)
         data[self.state] = data[self.state].replace(state_mapping)
@@ -648,14 +961,25 @@ class  ProcessGeo(BaseZRP):
         data[self.zip_code] = np.where((data[self.zip_code].isna()) |\
                                  (data[self.zip_code].str.contains("None")),
                                   None,
-                                  data[self.zip_code].apply(lambda x: x.zfill(5)))
+                                  data[self.zip_code].str.zfill(5))
         data[self.zip_code] = data[self.zip_code].astype(str).str[:5]
         data['replicate_flg'] = '000000'
+        if self.parse_address:
+            print("      ...parsing address")
+            if self.session is not None:
+                address_parser = self.session.address_parser
+            else:
+                address_parser = AddressParser(street_suffix_mapping, directionals_mapping, unit_mapping)
+            addresses = data[self.street_address]
+            data[self.street_address] = map_unique(addresses, address_parser.street_keys, "street_key")
         if replicate:
             print("      ...replicating address")
             data = replicate_house_number(data, self.house_number, 1)
-            data = replicate_address_2(data, self.street_address, street_suffix_mapping, 10, 1)
-            data = replicate_north_n(data, self.street_address, 100, 1)
+            if self.parse_address:
+                data = replicate_street_keys(data, self.street_address, addresses, address_parser, 10)
+            else:
+                data = replicate_address_2(data, self.street_address, street_suffix_mapping, 10, 1)
+                data = replicate_north_n(data, self.street_address, 100, 1)
 #             data = replicate_address_3(data, self.street_address, street_suffix_mapping_new_only, 1000)
 #             data = replicate_n_north(data, self.street_address, 1000)
 #             data = replicate_n_norte(data, self.street_address, 2000)
@@ -664,7 +988,7 @@ class  ProcessGeo(BaseZRP):
         addr_cols = list(set(list(data.columns)).intersection(set([self.zip_code, self.census_tract, self.house_number, self.city, self.state, self.street_address])))
 
 
-        data = reduce_whitespace(data)
+        data = reduce_whitespace(data, self.string_backend)
         print("   [Completed] Processing geo data")
         
         return data
@@ -751,26 +1075,17 @@ class  ProcessGLookUp(BaseZRP):
                                   self.block_group,
                                   self.county,
                                  ]).intersection(set(data_cols)))
-        data = data.astype(str)
-        data = data.apply(lambda x: x.str.upper())
-        
-        data = reduce_whitespace(data)
-        na_dict =  {"^\\s*$": None,
-                    "^NAN$": None,
-                    "^NONE$": None} 
-        data = data.replace(na_dict, regex=True)
+        data = format_strings(data, self.string_backend)
         
         # Remove/replace special characters
         for col in numeric_cols:
-            data[col] = data[col].apply(lambda x: re.sub("[^0-9]",\
-                                                     "",\
-                                                    str(x))) 
+            data[col] = map_unique(data[col], lambda x: keep_digits(x, self.string_backend), col)
 
       
         data[self.census_tract] = np.where((data[self.census_tract].isna()) |\
                                  (data[self.census_tract].str.contains("None")),
                                   None,
-                                  data[self.census_tract].apply(lambda x: x.zfill(6)))
+                                  data[self.census_tract].str.zfill(6))
         data[self.block_group] = np.where((data[self.block_group].isna()) |\
                                  (data[self.block_group].str.contains("None")),
                                   None,
@@ -778,20 +1093,25 @@ class  ProcessGLookUp(BaseZRP):
         data[self.county] = np.where((data[self.county].isna()) |\
                                  (data[self.county].str.contains("None")),
                                   None,
-                                  data[self.county].apply(lambda x: x.zfill(3))) 
+                                  data[self.county].str.zfill(3)) 
         
         print("     ...processing")
         spec_cols = list(set(list(data_cols)).intersection(set([self.zip_code, self.block_group, self.county, self.state, self.census_tract])))
         data[spec_cols] = norm_na(data[spec_cols], self.na_values)
-        data = reduce_whitespace(data)
+        data = reduce_whitespace(data, self.string_backend)
         data = split_HN(data, ['FROMHN', 'TOHN'])
         data = sort_HN_columns(data)
         
         curpath = dirname(__file__)
         data_path = join(curpath, '../data/processed')
-        _, street_suffix_mapping, _, _ = load_mappings(data_path)
-        data = replicate_address_2(data, self.street_address, street_suffix_mapping, replicate_with_flg = 0)
-        data = replicate_north_n(data, self.street_address, replicate_with_flg = 0)
+        _, street_suffix_mapping, directionals_mapping, unit_mapping = load_mappings(data_path)
+        if self.parse_address:
+            address_parser = AddressParser(street_suffix_mapping, directionals_mapping, unit_mapping)
+            data[self.street_address] = map_unique(data[self.street_address], lambda x: address_parser.street_keys(x, units=False), "street_key")
+            data = data[data[self.street_address].notna()].drop_duplicates()
+        else:
+            data = replicate_address_2(data, self.street_address, street_suffix_mapping, replicate_with_flg = 0)
+            data = replicate_north_n(data, self.street_address, replicate_with_flg = 0)
         
         print("   [Completed] Processing lookup data")
         
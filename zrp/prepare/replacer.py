@@ -0,0 +1,131 @@
+from functools import lru_cache
+import pandas as pd
+import re
+
+
+word_pattern = re.compile("\\w+")
+# Patterns that are a single word between word boundaries, ie '\\bAVENUE\\b', match exactly when the word is one of
+# the words of a value
+word_bounded_pattern = re.compile("\\\\b(\\w+)\\\\b")
+# Numbered backreferences point at other groups once patterns are combined
+numbered_backreference = re.compile("\\\\[1-9]")
+
+
+class MultiPatternReplacer():
+    """
+    Applies a mapping of regular expressions to replacements in one pass over each distinct value, with the same
+    results as `pd.DataFrame.replace(mapping, regex=True)`: the patterns a value matches are found on the value as it
+    was before any replacement, then the replacements of those patterns are applied in the order of the mapping. A
+    pattern replaced by a string substitutes every match, a pattern replaced by None sets the value to None.
+
+    Word bounded patterns are looked up by word in a dict instead of being searched for, the other patterns are first
+    searched for with one combined pattern. Values that are not strings are left as they are.
+
+    Parameters
+    ----------
+    mapping: dict
+        Dictionary of regular expressions to replacement strings or None
+    """
+
+    def __init__(self, mapping):
+        self.patterns = [re.compile(pattern) for pattern in mapping]
+        self.replacements = list(mapping.values())
+        self.word_lookup = {}
+        self.searched = []
+        for i, pattern in enumerate(mapping):
+            word = word_bounded_pattern.fullmatch(pattern)
+            if word is not None:
+                self.word_lookup.setdefault(word.group(1), []).append(i)
+            else:
+                self.searched.append(i)
+        self.combined = None
+        searched_patterns = [list(mapping)[i] for i in self.searched]
+        if (len(searched_patterns) > 0) and not any(numbered_backreference.search(pattern) for pattern in searched_patterns):
+            try:
+                self.combined = re.compile("|".join(f"(?:{pattern})" for pattern in searched_patterns))
+            except re.error:
+                # Patterns with inline flags or repeated group names cannot be combined, each is searched for
+                self.combined = None
+
+    def matches(self, value):
+        """
+        Returns the indexes of the patterns a value matches, in the order of the mapping
+
+        Parameters
+        ----------
+        value: str
+            Value to match
+        """
+        matched = []
+        if len(self.word_lookup) > 0:
+            for word in set(word_pattern.findall(value)):
+                matched.extend(self.word_lookup.get(word, []))
+        if (len(self.searched) > 0) and ((self.combined is None) or (self.combined.search(value) is not None)):
+            matched.extend(i for i in self.searched if self.patterns[i].search(value) is not None)
+        return sorted(matched)
+
+    def replace_value(self, value):
+        """
+        Returns a value with the replacements of the patterns it matches applied
+
+        Parameters
+        ----------
+        value: str
+            Value to make replacements in
+        """
+        if not isinstance(value, str):
+            return value
+        out = value
+        for i in self.matches(value):
+            if not isinstance(out, str):
+                break
+            if self.replacements[i] is None:
+                if self.patterns[i].search(out) is not None:
+                    out = None
+            else:
+                out = self.patterns[i].sub(self.replacements[i], out)
+        return out
+
+    def replace(self, data):
+        """
+        Returns a column or dataframe with the replacements applied to every string value. Each distinct value is
+        replaced once.
+
+        Parameters
+        ----------
+        data: pd.Series or pd.DataFrame
+            Data to make replacements in
+        """
+        if isinstance(data, pd.DataFrame):
+            return data.apply(self.replace)
+        if not pd.api.types.is_string_dtype(data.dtype):
+            return data
+        replaced = {}
+        values = []
+        for value in data.values:
+            if isinstance(value, str):
+                if value not in replaced:
+                    replaced[value] = self.replace_value(value)
+                value = replaced[value]
+            values.append(value)
+        return pd.Series(values, index=data.index, name=data.name, dtype=object)
+
+
+@lru_cache(maxsize=32)
+def cached_replacer(items):
+    return MultiPatternReplacer(dict(items))
+
+
+def replace_patterns(data, mapping):
+    """
+    Replaces regular expressions in a column or dataframe with `MultiPatternReplacer`, compiling each mapping once per
+    process
+
+    Parameters
+    ----------
+    data: pd.Series or pd.DataFrame
+        Data to make replacements in
+    mapping: dict
+        Dictionary of regular expressions to replacement strings or None
+    """
+    return cached_replacer(tuple(mapping.items())).replace(data)
@@ -4,9 +4,25 @@ import os
 import re
 import sys
 from os.path import join, expanduser
+from contextlib import contextmanager
+import threading
+import shutil
 import json
 import warnings
 warnings.filterwarnings(action='ignore')
+
+file_na_values = ["None",
+                  "NAN",
+                  "NONE",
+                  " ",
+                  "(X)",
+                  "-",
+                  "  ",
+                  "   ",
+                  "-666666666",
+                  "-999999999",
+                  "-888888888"
+                  ]
  
 
 def load_json(path):
@@ -93,6 +109,40 @@ def make_directory(output_directory = None):
         print("Directory already exists")
         pass
 
+
+numbered_file_pattern = re.compile("^(?P<stem>.+)_(?P<number>[0-9]+)(?P<extension>\\.parquet)$")
+
+
+def collect_chunk_artifacts(chunks_folder, out_path):
+    """
+    Moves the artifacts of chunks processed in worker processes from their chunk folders to the artifacts folder,
+    chunk by chunk in chunk order, then removes the chunk folders. Artifacts are left the way chunks processed one at
+    a time leave them: numbered tables (ie `Zest_Geocoded__2019__13_1.parquet`) get the next number of their name,
+    and other files (ie the input validators) are replaced by the last chunk's.
+
+    Parameters
+    ----------
+    chunks_folder: str
+        Folder holding one artifacts folder per chunk
+    out_path: str
+        Artifacts folder to move the chunks' artifacts to
+    """
+    if not os.path.isdir(chunks_folder):
+        return
+    make_directory(out_path)
+    for chunk_folder in sorted(os.listdir(chunks_folder)):
+        chunk_path = os.path.join(chunks_folder, chunk_folder)
+        for file in sorted(os.listdir(chunk_path)):
+            target = file
+            numbered = numbered_file_pattern.match(file)
+            if numbered is not None:
+                numbers = [int(match.group("number")) for match in map(numbered_file_pattern.match, os.listdir(out_path))
+                           if (match is not None) and (match.group("stem") == numbered.group("stem"))]
+                target = f'{numbered.group("stem")}_{max(numbers, default=0) + 1}{numbered.group("extension")}'
+            os.replace(os.path.join(chunk_path, file), os.path.join(out_path, target))
+    shutil.rmtree(chunks_folder, ignore_errors=True)
+
+
 def load_file(file_path):    
     """
     Load files. Compatible with csv, text, feather, xlsx, and parquet
@@ -103,18 +153,7 @@ def load_file(file_path):
         File path of file to load
     """
 
-    na_values = ["None",
-                 "NAN",
-                 "NONE",
-                 " ",
-                 "(X)",
-                 "-",
-                 "  ",
-                 "   ",
-                 "-666666666",
-                 "-999999999",
-                 "-888888888"
-                 ]
+    na_values = file_na_values
     if file_path.endswith(".csv"):
         data = pd.read_csv(file_path,
                            dtype=str,
@@ -274,3 +313,46 @@ def most_common(lizt):
     return max(set(lizt), key=lizt.count)
 
 
+# Threads that are in `quiet_output`
+_quiet_threads = threading.local()
+_quiet_lock = threading.Lock()
+
+
+class ThreadQuietStream():
+    """
+    Wraps sys.stdout or sys.stderr and drops what threads in `quiet_output` write to it, so one thread can run the
+    pipeline silently while other threads keep printing
+
+    Parameters
+    ----------
+    stream: file-like
+        Stream to wrap
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        if getattr(_quiet_threads, "depth", 0) > 0:
+            return len(text)
+        return self.stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextmanager
+def quiet_output():
+    """
+    Silences what the current thread prints to stdout & stderr, ie stage banners and progress bars, inside the block
+    """
+    with _quiet_lock:
+        if not isinstance(sys.stdout, ThreadQuietStream):
+            sys.stdout = ThreadQuietStream(sys.stdout)
+        if not isinstance(sys.stderr, ThreadQuietStream):
+            sys.stderr = ThreadQuietStream(sys.stderr)
+    _quiet_threads.depth = getattr(_quiet_threads, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _quiet_threads.depth -= 1
@@ -0,0 +1,150 @@
+from contextlib import contextmanager
+import json
+import time
+import sys
+import os
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is not recorded there
+    resource = None
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of the current process so far in Mb, None if it cannot be measured
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak_rss * 1.0e-6
+    return peak_rss * 1.0e-3
+
+
+def frame_mb(data):
+    """
+    Returns the memory held by a dataframe, series, or array in Mb, including the contents of string columns
+
+    Parameters
+    ----------
+    data: pd.DataFrame, pd.Series, or np.ndarray
+        Data to measure
+    """
+    if hasattr(data, "memory_usage"):
+        memory_usage = data.memory_usage(deep=True)
+        return (memory_usage.sum() * 1.0e-6 if hasattr(memory_usage, "sum") else memory_usage * 1.0e-6)
+    return (data.nbytes * 1.0e-6)
+
+
+class StageProfiler():
+    """
+    Records wall time, rows in & out, rows per second and peak RSS of the stages of a ZRP run. Peak RSS is the
+    peak of the whole process at the end of the stage. One profiler is shared by the whole process, see `profiler`.
+    Stages run in worker processes are added with `merge`, their peak RSS is the worker's. With `measure_memory`
+    set, the memory held by each stage's output is recorded too.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.measure_memory = False
+
+    def reset(self):
+        """
+        Drops all recorded stages
+        """
+        self.stages = []
+
+    def merge(self, stages, **fields):
+        """
+        Adds stages recorded by the profiler of another process, ie a worker process
+
+        Parameters
+        ----------
+        stages: list
+            Stage records of the other profiler
+        fields: dict
+            Fields to add to each record, ie the chunk the stages ran on
+        """
+        self.stages.extend(dict(record, **fields) for record in stages)
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Records a stage run inside the `with` block. The yielded record takes the number of rows the stage
+        returned under 'rows_out'.
+
+        Parameters
+        ----------
+        name: str
+            Name of the stage
+        rows_in: int, optional
+            Number of rows given to the stage
+        """
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        start_time = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - start_time
+            if rows_in and record["wall_time"] > 0:
+                record["rows_per_second"] = rows_in / record["wall_time"]
+            else:
+                record["rows_per_second"] = None
+            record["peak_rss_mb"] = peak_rss_mb()
+            self.stages.append(record)
+
+    def set_output(self, record, data):
+        """
+        Records the number of rows a stage returned, and the memory its output holds if `measure_memory` is set
+
+        Parameters
+        ----------
+        record: dict
+            Record yielded by `stage`
+        data: pd.DataFrame, pd.Series, or np.ndarray
+            Output of the stage
+        """
+        record["rows_out"] = len(data)
+        if self.measure_memory:
+            record["mb_out"] = frame_mb(data)
+
+    def summary(self):
+        """
+        Returns the recorded stages totalled by stage name, in the order the stages first ran
+        """
+        summary = {}
+        for record in self.stages:
+            total = summary.setdefault(record["stage"], {"calls": 0, "wall_time": 0.0, "rows_in": 0, "rows_out": 0, "peak_rss_mb": None})
+            total["calls"] += 1
+            total["wall_time"] += record["wall_time"]
+            total["rows_in"] += record["rows_in"] or 0
+            total["rows_out"] += record["rows_out"] or 0
+            if record["peak_rss_mb"] is not None:
+                total["peak_rss_mb"] = max(total["peak_rss_mb"] or 0, record["peak_rss_mb"])
+        for total in summary.values():
+            if total["rows_in"] and total["wall_time"] > 0:
+                total["rows_per_second"] = total["rows_in"] / total["wall_time"]
+            else:
+                total["rows_per_second"] = None
+        return (summary)
+
+    def save(self, path, file_name):
+        """
+        Saves the stage summary & every recorded stage as json
+
+        Parameters
+        ----------
+        path: str
+            Folder to save the profile to
+        file_name: str
+            Name of file
+        """
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, file_name), "w") as f:
+            json.dump({"summary": self.summary(), "stages": self.stages}, f, indent=4)
+        return (print("...Profile saved"))
+
+
+profiler = StageProfiler()
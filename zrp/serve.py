@@ -0,0 +1,308 @@
+from concurrent.futures import ThreadPoolExecutor
+from zrp.session import ZRP_Session
+from zrp.profiling import profiler
+from os.path import dirname, join
+import pyarrow as pa
+import pandas as pd
+import numpy as np
+import asyncio
+import json
+
+
+json_content_type = "application/json"
+arrow_content_type = "application/vnd.apache.arrow.stream"
+
+http_reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def records_frame(records):
+    """
+    Returns a dataframe of records, with values read as strings the same way `load_file` reads them
+
+    Parameters
+    ----------
+    records: list or pd.DataFrame
+        List of dicts with one dict per record, or a dataframe of records
+    """
+    data = pd.DataFrame(records)
+    return (data.astype(str).where(data.notna(), None))
+
+
+def arrow_bytes(data):
+    """
+    Returns a dataframe as an Arrow IPC stream
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Dataframe to serialize. Named indexes are written as columns.
+    """
+    table = pa.Table.from_pandas(data, preserve_index=data.index.name is not None)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return (sink.getvalue().to_pybytes())
+
+
+def json_records(data):
+    """
+    Returns the rows of a dataframe as a list of dicts, with missing values as None
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        Dataframe to serialize. Named indexes are written as columns.
+    """
+    if data.index.name is not None:
+        data = data.reset_index(drop=False)
+    return (json.loads(data.to_json(orient="records")))
+
+
+class ZRPServer():
+    """
+    Scores records over HTTP with support files, pipelines, and models held in memory. Concurrent requests are
+    coalesced into one batch: the first waiting request is held for up to `max_wait_ms` while later requests join
+    it, up to `max_batch_rows` rows, and the batch is prepared & predicted with one call to `ZRP.score_records`, which
+    writes no artifacts. Requests arriving while a batch is scored wait for the next batch.
+
+    Endpoints
+    ---------
+    POST /predict
+        Records as json, either a list of records or {"records": [...]}, or as an Arrow IPC stream with content type
+        'application/vnd.apache.arrow.stream'. The response has the same content type: {"proxies": [...],
+        "bisg_proxies": [...]} as json, or the proxies as an Arrow stream. Keys are kept if given.
+    GET /health
+        Returns {"status": "ok"} once the support files are loaded.
+
+    Parameters
+    ----------
+    zrp: ZRP, optional
+        Predictor scoring the batches, with the column names & options of the records. A default ZRP is used if not
+        provided.
+    max_batch_rows: int
+        Most rows a batch is filled to before it is scored
+    max_wait_ms: float
+        Longest a request waits for other requests to join its batch
+    """
+
+    def __init__(self, zrp=None, max_batch_rows=1000, max_wait_ms=5):
+        if zrp is None:
+            from zrp.zrp import ZRP
+            zrp = ZRP()
+        self.zrp = zrp
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_ms = max_wait_ms
+        self.queue = None
+        self.n_requests = 0
+        # Batches are scored one at a time off the event loop, so requests keep being read while a batch is scored
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def load(self):
+        """
+        Loads the support files, pipelines, and models. Called before the server accepts requests.
+        """
+        zrp = self.zrp
+        if zrp.pipe_path is None:
+            zrp.pipe_path = join(dirname(__file__), "modeling/models")
+        if zrp.session is None:
+            zrp.session = ZRP_Session(pipe_path=zrp.pipe_path, year=zrp.year, span=zrp.span, data_path=zrp.data_path)
+        zrp.session.load()
+        self.column_mapping = zrp.data_column_mapping()
+        zrp.reset_column_names()
+        return self
+
+    def score(self, data):
+        """
+        Prepares and predicts a batch of records, returning a tuple of the ZRP proxies and the BISG proxies (None if
+        BISG is not requested) indexed by key
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            Records with the column names of the predictor, including a unique key column
+        """
+        # Stages are recorded per batch, so a long running server does not accumulate them
+        profiler.reset()
+        data = data.rename(columns=self.column_mapping)
+        data = data.sort_values("state")
+        return (self.zrp.score_records(data, bisg=self.zrp.bisg))
+
+    async def submit(self, data):
+        """
+        Adds records to the next batch and waits for their proxies. Returns a tuple of the ZRP proxies and the BISG
+        proxies (None if BISG is not requested) in the order of the records.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            Records with the column names of the predictor
+        """
+        key = self.zrp.key
+        self.n_requests += 1
+        # Keys are only unique within a request, batches are keyed by request and row
+        batch_keys = [f"request_{self.n_requests}_{i}" for i in range(len(data))]
+        request_keys = data[key].values if key in data.columns else np.array(batch_keys)
+        data = data.copy()
+        data[key] = batch_keys
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((data, future))
+        proxies, bisg_proxies = await future
+
+        outputs = []
+        for output in [proxies, bisg_proxies]:
+            if output is not None:
+                output = output.reindex(batch_keys)
+                output.index = pd.Index(request_keys, name=key)
+            outputs.append(output)
+        return (tuple(outputs))
+
+    async def batch_loop(self):
+        """
+        Gathers queued requests into batches and scores them, one batch at a time
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            n_rows = len(pending[0][0])
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while n_rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            batch = pd.concat([data for data, _ in pending])
+            try:
+                outputs = await loop.run_in_executor(self.executor, self.score, batch)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for _, future in pending:
+                if not future.done():
+                    future.set_result(outputs)
+
+    async def handle_predict(self, body, content_type):
+        """
+        Returns the response body & content type of a predict request
+
+        Parameters
+        ----------
+        body: bytes
+            Request body
+        content_type: str
+            Content type of the request body
+        """
+        if content_type.startswith(arrow_content_type):
+            data = pa.ipc.open_stream(body).read_all().to_pandas()
+        else:
+            records = json.loads(body)
+            if isinstance(records, dict):
+                records = records.get("records", [])
+            data = pd.DataFrame(records)
+        if len(data) == 0:
+            raise ValueError("No records to predict")
+        proxies, bisg_proxies = await self.submit(records_frame(data))
+        if content_type.startswith(arrow_content_type):
+            return (arrow_bytes(proxies), arrow_content_type)
+        response = {"proxies": json_records(proxies)}
+        if bisg_proxies is not None:
+            response["bisg_proxies"] = json_records(bisg_proxies)
+        return (json.dumps(response).encode(), json_content_type)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves the HTTP/1.1 requests of one connection until the client closes it
+
+        Parameters
+        ----------
+        reader: asyncio.StreamReader
+        writer: asyncio.StreamWriter
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, content_type = 200, json_content_type
+                try:
+                    if path == "/health":
+                        response = json.dumps({"status": "ok"}).encode()
+                    elif path != "/predict":
+                        status, response = 404, json.dumps({"error": f"Unknown path: {path}"}).encode()
+                    elif method != "POST":
+                        status, response = 405, json.dumps({"error": "Records are posted to /predict"}).encode()
+                    else:
+                        response, content_type = await self.handle_predict(body, headers.get("content-type", json_content_type))
+                except (ValueError, KeyError) as e:
+                    status, response = 400, json.dumps({"error": str(e)}).encode()
+                except Exception as e:
+                    status, response = 500, json.dumps({"error": str(e)}).encode()
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write((f"HTTP/1.1 {status} {http_reasons[status]}\r\n"
+                              f"Content-Type: {content_type}\r\n"
+                              f"Content-Length: {len(response)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1") + response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        """
+        Loads the support files and serves requests until cancelled
+
+        Parameters
+        ----------
+        host: str
+            Address to listen on
+        port: int
+            Port to listen on
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.load)
+        self.queue = asyncio.Queue()
+        batch_task = asyncio.ensure_future(self.batch_loop())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"[Start] Serving ZRP on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batch_task.cancel()
+
+    def run(self, host="127.0.0.1", port=8000):
+        """
+        Serves requests until interrupted
+
+        Parameters
+        ----------
+        host: str
+            Address to listen on
+        port: int
+            Port to listen on
+        """
+        try:
+            asyncio.run(self.serve(host, port))
+        except KeyboardInterrupt:
+            print("[Completed] Stopped serving ZRP")
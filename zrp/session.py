@@ -0,0 +1,172 @@
+from os.path import dirname, join
+from zrp.prepare.prepare import check_support_files
+from zrp.prepare.geo_geocoder import geo_load, geo_index_load, geo_cache
+from zrp.prepare.address import AddressParser
+from zrp.prepare.acs_mapper import acs_load
+from zrp.prepare.utils import load_json, load_mappings
+import time
+
+
+class ZRP_Session():
+    """
+    Holds the ZRP support files in memory so they are loaded once and shared across chunks and calls.
+    Mappings, ACS lookup tables, pipelines, models, and the BISG model are loaded by `load()`. Geo lookup
+    tables are loaded the first time a state is geocoded and kept for later chunks in the process-wide `geo_cache`.
+
+    Parameters
+    ----------
+    pipe_path: str, optional
+        Folder path to directory containing pipelines. The packaged pipelines are used if not provided.
+    year: str, default '2019'
+        ACS & geo year to use.
+    span: str, default '5'
+        Year span of ACS data to use.
+    data_path: str, optional
+        Folder of the processed support files, with the layout of `zrp/data/processed`. The package data folder is
+        used if not provided.
+    """
+
+    model_types = ['block_group', 'census_tract', 'zip_code']
+
+    def __init__(self, pipe_path=None, year="2019", span="5", data_path=None):
+        curpath = dirname(__file__)
+        if pipe_path is None:
+            pipe_path = join(curpath, "modeling/models")
+        self.pipe_path = pipe_path
+        self.year = year
+        self.span = span
+        if data_path is None:
+            data_path = join(curpath, "data/processed")
+        self.data_path = data_path
+        self.geo_path = join(self.data_path, "geo", "2019")
+        self.load_times = {}
+        self.is_loaded = False
+        self.has_models = False
+
+    def __timed(self, name, func, *args):
+        """
+        Runs a loader & records how long it took
+
+        Parameters
+        ----------
+        name: str
+            Name to record the load time under
+        func: callable
+            Loader to run
+        """
+        start_time = time.time()
+        out = func(*args)
+        self.load_times[name] = time.time() - start_time
+        print("   ...{} loaded in {:.3f}s".format(name, self.load_times[name]))
+        return out
+
+    def load(self, models=True):
+        """
+        Loads all support files. Does nothing if the session is already loaded.
+
+        Parameters
+        ----------
+        models: bool, default True
+            Whether to load the pipelines, models, and BISG model. Not needed when building new models.
+        """
+        if self.is_loaded and (self.has_models or not models):
+            return self
+        print("[Start] Loading ZRP session")
+        if not self.is_loaded:
+            check_support_files(self.data_path)
+            self.mappings = self.__timed("mappings", load_mappings, self.data_path)
+            self.address_parser = AddressParser(*self.mappings[1:])
+            self.inv_state_mapping = load_json(join(self.data_path, "inv_state_mapping.json"))
+            self.acs_tables = self.__timed("acs", acs_load, self.year, self.span, self.data_path)
+            self.is_loaded = True
+        if models:
+            self.__load_models()
+        print("[Completed] Loading ZRP session in {:.3f}s".format(sum(self.load_times.values())))
+        return self
+
+    def __load_models(self):
+        """
+        Loads the pipelines, models, and BISG model
+        """
+        # Imported here so sessions that only prepare data do not load xgboost & surgeo
+        from zrp.modeling.predict import load_pipeline
+        import surgeo
+
+        feature_list_names = {'block_group': 'bg', 'census_tract': 'ct', 'zip_code': 'zp'}
+        modeling_path = join(dirname(__file__), "modeling")
+        self.feature_lists = {}
+        self.pipelines = {}
+        for model_type in self.model_types:
+            self.feature_lists[model_type] = load_json(join(modeling_path, f"feature_list_{feature_list_names[model_type]}.json"))
+            self.pipelines[model_type] = self.__timed(f"pipeline_{model_type}", load_pipeline, self.pipe_path, model_type)
+
+        all_model_cols = set()
+        for pipe, _ in self.pipelines.values():
+            all_model_cols = all_model_cols.union(set(pipe.steps[2][1].mlb_columns))
+        self.target_is_standard = all_model_cols == set(["AAPI", "AIAN", "BLACK", "HISPANIC", "WHITE"])
+
+        self.bisg_model = self.__timed("bisg", surgeo.SurgeoModel)
+        self.has_models = True
+
+    def geo_table(self, geo, parse_address=False):
+        """
+        Returns the trimmed geo lookup table of a state from `geo_cache`, loading it on first use
+
+        Parameters
+        ----------
+        geo: str
+            A string for the state fips code or state county code
+        parse_address: bool
+            Whether to return the table with street names replaced by their street keys. Parsed tables are cached
+            apart from the tables as loaded.
+        """
+        address_parser = self.address_parser if parse_address else None
+        misses = geo_cache.misses
+        start_time = time.time()
+        geo_df = geo_load(geo, self.year, self.geo_path, address_parser)
+        if (len(geo) == 2) and (geo_cache.misses > misses):
+            name = f"parse_geo_{geo}" if parse_address else f"geo_{geo}"
+            self.load_times[name] = time.time() - start_time
+            print("   ...{} loaded in {:.3f}s".format(name, self.load_times[name]))
+        return geo_df
+
+    def geo_table_index(self, geo, parse_address=False):
+        """
+        Returns the street & zip code index of the geo lookup table `geo_table` returns, from `geo_cache`
+
+        Parameters
+        ----------
+        geo: str
+            A string for the state fips code or state county code
+        parse_address: bool
+            Whether to index the table with street names replaced by their street keys
+        """
+        address_parser = self.address_parser if parse_address else None
+        return geo_index_load(geo, self.year, self.geo_path, address_parser)
+
+
+_shared_sessions = {}
+
+
+def shared_session(pipe_path=None, year="2019", span="5", models=True, data_path=None):
+    """
+    Returns a loaded session that is shared by every caller in the current process. Used by worker processes
+    so support files are loaded once per worker rather than once per chunk.
+
+    Parameters
+    ----------
+    pipe_path: str, optional
+        Folder path to directory containing pipelines. The packaged pipelines are used if not provided.
+    year: str, default '2019'
+        ACS & geo year to use.
+    span: str, default '5'
+        Year span of ACS data to use.
+    models: bool, default True
+        Whether to load the pipelines, models, and BISG model. Not needed when only preparing data.
+    data_path: str, optional
+        Folder of the processed support files. The package data folder is used if not provided.
+    """
+    session_key = (pipe_path, year, span, data_path)
+    if session_key not in _shared_sessions:
+        _shared_sessions[session_key] = ZRP_Session(pipe_path=pipe_path, year=year, span=span, data_path=data_path)
+    return _shared_sessions[session_key].load(models=models)
@@ -0,0 +1,256 @@
+from zrp.prepare.utils import file_na_values
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+import pyarrow as pa
+import json
+import pandas as pd
+import os
+
+
+batch_file_formats = (".csv", ".parquet", ".feather")
+
+
+def read_batches(file_path, batch_size=100000):
+    """
+    Reads a csv, parquet, or feather file in batches of rows so the whole file never has to fit in memory.
+    Values are read as strings, the same way `load_file` reads them. Feather files are memory mapped.
+
+    Parameters
+    ----------
+    file_path: str
+        File path of csv, parquet, or feather file to read
+    batch_size: int
+        Number of rows per batch
+    """
+    if file_path.endswith(".csv"):
+        reader = pd.read_csv(file_path,
+                             dtype=str,
+                             na_values=file_na_values,
+                             chunksize=batch_size)
+        for batch in reader:
+            yield batch
+    elif file_path.endswith(".parquet"):
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield batch.to_pandas().astype(str)
+    elif file_path.endswith(".feather"):
+        table = feather.read_table(file_path, memory_map=True)
+        for batch in table.to_batches(max_chunksize=batch_size):
+            yield batch.to_pandas().astype(str)
+    else:
+        raise ValueError(f"Batches can only be read from csv, parquet, or feather files: {file_path}")
+
+
+class BatchWriter():
+    """
+    Writes batches of rows to a csv, parquet, or feather file as they are generated. The columns of the first batch
+    are kept for the whole file, later batches are aligned to them. Named indexes are written as columns.
+
+    Parameters
+    ----------
+    file_path: str
+        File path of csv, parquet, or feather file to write
+    """
+
+    def __init__(self, file_path):
+        if not file_path.endswith(batch_file_formats):
+            raise ValueError(f"Batches can only be written to csv, parquet, or feather files: {file_path}")
+        self.file_path = file_path
+        self.columns = None
+        self.schema = None
+        self.writer = None
+        self.n_rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, data):
+        """
+        Appends a batch of rows to the file
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            Batch of rows to write
+        """
+        data = data.reset_index(drop=data.index.name is None)
+        if self.columns is None:
+            self.columns = list(data.columns)
+            out_dir = os.path.dirname(self.file_path)
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+        data = data.reindex(columns=self.columns)
+
+        if self.file_path.endswith(".csv"):
+            data.to_csv(self.file_path,
+                        mode="w" if self.n_rows == 0 else "a",
+                        header=self.n_rows == 0,
+                        index=False)
+        else:
+            if self.writer is None:
+                schema = pa.Schema.from_pandas(data, preserve_index=False)
+                # Columns missing from the whole first batch have no type yet, input columns are strings
+                for i, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(i, field.with_type(pa.string()))
+                self.schema = schema
+                if self.file_path.endswith(".feather"):
+                    # Feather files are Arrow IPC files
+                    self.writer = pa.ipc.new_file(self.file_path, self.schema)
+                else:
+                    self.writer = pq.ParquetWriter(self.file_path, self.schema)
+            table = pa.Table.from_pandas(data, schema=self.schema, preserve_index=False, safe=False)
+            self.writer.write_table(table)
+        self.n_rows += len(data)
+
+    def close(self):
+        """
+        Closes the file. Parquet & feather footers are written on close.
+        """
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def output_writer(path, partition_by=None):
+    """
+    Returns a writer for batches of output rows: a `BatchWriter` for csv, parquet, and feather files, or a
+    `ParquetDatasetWriter` if the path has none of those extensions or `partition_by` is provided.
+
+    Parameters
+    ----------
+    path: str
+        File path or dataset folder to write to
+    partition_by: str, optional
+        Column to partition the parquet dataset by
+    """
+    if (partition_by is not None) or not path.endswith(batch_file_formats):
+        return ParquetDatasetWriter(path, partition_by)
+    return BatchWriter(path)
+
+
+def source_labels(proxies):
+    """
+    Returns the name of the source of each proxy, taken from the source_* column set for the row
+
+    Parameters
+    ----------
+    proxies: pd.DataFrame
+        Proxies generated by ZRP_Predict
+    """
+    source_cols = [col for col in proxies.columns if col.startswith("source_")]
+    labels = proxies[source_cols].fillna(0).astype(float).idxmax(axis=1).str[len("source_"):]
+    return (labels)
+
+
+class ParquetDatasetWriter():
+    """
+    Writes batches of rows as parts of a parquet dataset folder. Each part is written to a temporary file and
+    renamed into place, so parts written before a run stops are complete and kept. Parts can be split into
+    hive style `<column>=<value>` partition folders. `close` writes a `_manifest.json` listing every part and a
+    `_common_metadata` schema file. The dataset can be read lazily and column selectively, for example with
+    `pd.read_parquet(path, columns=[...])`.
+
+    Parameters
+    ----------
+    path: str
+        Folder of the parquet dataset
+    partition_by: str, optional
+        Column to partition parts by. 'source' partitions proxies by the source_* column set for each row.
+    """
+
+    def __init__(self, path, partition_by=None):
+        self.path = path
+        self.partition_by = partition_by
+        self.n_parts = 0
+        self.n_rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, data, part_name=None):
+        """
+        Writes a batch of rows as a new part of the dataset
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            Batch of rows to write
+        part_name: str, optional
+            Name of the part file. Parts are numbered in the order they are written if not provided.
+        """
+        if part_name is None:
+            part_name = f"part-{self.n_parts:05d}"
+        data = data.reset_index(drop=data.index.name is None)
+        if self.partition_by is None:
+            self.__write_part(data, self.path, part_name)
+        else:
+            if (self.partition_by == "source") and ("source" not in data.columns):
+                data["source"] = source_labels(data)
+            partition_values = data[self.partition_by].fillna("__HIVE_DEFAULT_PARTITION__")
+            for value, part in data.groupby(partition_values):
+                folder = os.path.join(self.path, f"{self.partition_by}={value}")
+                self.__write_part(part.drop(columns=self.partition_by), folder, part_name)
+        self.n_parts += 1
+        self.n_rows += len(data)
+
+    def __write_part(self, data, folder, part_name):
+        """
+        Writes one part file through a temporary file
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            Rows of the part
+        folder: str
+            Folder to write the part to
+        part_name: str
+            Name of the part file
+        """
+        os.makedirs(folder, exist_ok=True)
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        # Columns missing from the whole part have no type yet, input columns are strings
+        schema = table.schema
+        for i, field in enumerate(schema):
+            if pa.types.is_null(field.type):
+                schema = schema.set(i, field.with_type(pa.string()))
+        table = table.cast(schema)
+        tmp_file = os.path.join(folder, f".{part_name}.parquet.tmp")
+        pq.write_table(table, tmp_file)
+        os.replace(tmp_file, os.path.join(folder, f"{part_name}.parquet"))
+
+    def parts(self):
+        """
+        Returns the paths of all part files in the dataset, relative to the dataset folder
+        """
+        part_files = []
+        for root, dirs, files in os.walk(self.path):
+            dirs[:] = sorted(folder for folder in dirs if not folder.startswith((".", "_")))
+            for file in sorted(files):
+                if file.endswith(".parquet") and not file.startswith((".", "_")):
+                    part_files.append(os.path.relpath(os.path.join(root, file), self.path))
+        return (part_files)
+
+    def close(self):
+        """
+        Writes the manifest and common metadata of every part in the dataset folder, including parts written by
+        other processes.
+        """
+        part_files = self.parts()
+        if len(part_files) == 0:
+            return
+        manifest = {"partition_by": self.partition_by, "n_rows": 0, "parts": []}
+        for part_file in part_files:
+            metadata = pq.read_metadata(os.path.join(self.path, part_file))
+            manifest["parts"].append({"path": part_file, "n_rows": metadata.num_rows})
+            manifest["n_rows"] += metadata.num_rows
+        schema = pq.read_schema(os.path.join(self.path, part_files[0]))
+        pq.write_metadata(schema, os.path.join(self.path, "_common_metadata"))
+        with open(os.path.join(self.path, "_manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=4)
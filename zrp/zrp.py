@@ -1,16 +1,20 @@
-from zrp.modeling.predict import BISGWrapper, ZRP_Predict
+from zrp.modeling.predict import BISGWrapper, ZRP_Predict, conform_source_cols
 from os.path import dirname, join, expanduser
 from zrp.prepare.prepare import ZRP_Prepare
+from zrp.session import ZRP_Session, shared_session
+from zrp.stream import read_batches, output_writer, ParquetDatasetWriter
+from zrp.checkpoint import RunManifest, data_fingerprint
+from zrp.dedupe import dedupe_records, fan_out
+from zrp.autotune import probe_memory, tune_chunks
+from zrp.profiling import profiler
+from joblib import Parallel, delayed
 from zrp.prepare.base import BaseZRP
 from zrp.prepare.utils import *
 import pandas as pd
 import numpy as np
 import warnings
-import surgeo
-import pickle
-import joblib
+import copy
 import json
-import pycm
 import sys
 import os
 import re
@@ -72,12 +76,21 @@ class ZRP(BaseZRP):
     span: str, default '5'
         Year span of ACS data to use.
     runname: str, default 'test'
+    session: ZRP_Session, optional
+        Session holding preloaded support files. If not provided, one is created on the first call to transform and reused by later calls.
+    data_path: str, optional
+        Folder of the processed support files the sessions load, with the layout of `zrp/data/processed`. The package data folder is used if not provided.
     """
 
-    def __init__(self, file_path=None, pipe_path=None, *args, **kwargs):
+    def __init__(self, file_path=None, pipe_path=None, session=None, data_path=None, *args, **kwargs):
         super().__init__(file_path=file_path, *args, **kwargs)
         self.pipe_path = pipe_path
+        self.session = session
+        self.data_path = data_path
         self.params_dict =  kwargs
+        self.dataset_writers = None
+        self.run_manifest = None
+        self.memory_probe = None
 
     def fit(self):
         return self
@@ -91,11 +104,117 @@ class ZRP(BaseZRP):
         data: pd.Dataframe
             Dataframe to be transformed
         """
-        renamed_columns = {self.first_name: "first_name", self.middle_name: "middle_name", self.last_name: "last_name", self.house_number: "house_number", self.street_address: "street_address", self.city: "city", self.state: "state", self.zip_code: "zip_code"}
-        data = data.rename(columns=renamed_columns)
+        data = data.rename(columns=self.data_column_mapping())
         # self.params_dict = {}
         return data
+
+    def data_column_mapping(self):
+        """
+        Returns the mapping of the user specified column names to the default column names expected by ZRP.
+        """
+        renamed_columns = {self.first_name: "first_name", self.middle_name: "middle_name", self.last_name: "last_name", self.house_number: "house_number", self.street_address: "street_address", self.city: "city", self.state: "state", self.zip_code: "zip_code"}
+        return renamed_columns
     
+    def dedupe_columns(self, data):
+        """
+        Returns the input fields that identify a record when deduplicating input data.
+
+        Parameters
+        -----------
+        data: pd.Dataframe
+            Input data with ZRP's default column names
+        """
+        columns = ["first_name", "middle_name", "last_name", "house_number", "street_address", "city", "state", "zip_code",
+                   self.census_tract, self.block_group, self.street_address_2, self.name_suffix]
+        return [col for col in columns if (col is not None) and (col in data.columns)]
+
+    def chunk_key_maps(self, data, key_map, chunk_size):
+        """
+        Splits the key map of deduplicated input data by the chunk each distinct record is processed in.
+
+        Parameters
+        -----------
+        data: pd.Dataframe
+            Distinct records, in the order they are chunked
+        key_map: pd.Series
+            Key of the distinct record of each input key, as returned by `dedupe_records`
+        chunk_size: int
+            Numer of rows processed in each iteration
+        """
+        distinct_chunks = pd.Series(np.arange(len(data)) // chunk_size, index=data[self.key].values)
+        chunk_of_key = distinct_chunks.reindex(key_map.values).values
+        return dict(tuple(key_map.groupby(chunk_of_key)))
+
+    def tune_chunks(self, data, memory_budget, workers=None):
+        """
+        Picks the chunk size, and the number of workers if not given, that keep the peak RSS of the run under a memory
+        budget. A small sample of the input is processed first to measure the memory each stage needs per row. The
+        probe's artifacts are written to a 'probe' folder in the artifacts folder.
+
+        Parameters
+        -----------
+        data: pd.Dataframe
+            Input data with ZRP's default column names
+        memory_budget: float
+            Peak RSS to stay under, in Mb, summed over the run's process and its workers
+        workers: int, optional
+            Number of worker processes chunks are sent to. Picked from the budget if not provided.
+        """
+        if self.pipe_path is None:
+            self.pipe_path = join(dirname(__file__), "modeling/models")
+        if self.session is None:
+            self.session = ZRP_Session(pipe_path=self.pipe_path, year=self.year, span=self.span, data_path=self.data_path)
+        self.session.load()
+
+        probe_out_path = os.path.join(self.out_path, f'probe_{self.runname}' if self.runname is not None else 'probe')
+        probe_zrp = copy.copy(self)
+        probe_zrp.session = self.session
+        probe_zrp.out_path = probe_out_path
+        probe_zrp.params_dict = dict(self.params_dict, out_path=probe_out_path)
+        probe_zrp.dataset_writers = None
+        probe_zrp.run_manifest = None
+        print("[Start] Probing memory per row")
+        self.memory_probe = probe_memory(probe_zrp.transform_chunk, data)
+        print("[Completed] Probing memory per row: {:.4f}Mb per row".format(self.memory_probe["mb_per_row"]))
+        return tune_chunks(memory_budget, self.memory_probe, len(data), workers)
+
+    def chunk_out_path(self, chunk):
+        """
+        Returns the artifacts folder used by a chunk processed in a worker process. Each chunk gets its own
+        folder so that workers never write to the same artifact files. The artifacts are moved to `out_path` and the
+        folders removed by `collect_chunk_folders` once the chunks' outputs are collected.
+
+        Parameters
+        -----------
+        chunk: int
+            Chunk number
+        """
+        if self.runname is not None:
+            chunks_folder = f'chunks_{self.runname}'
+        else:
+            chunks_folder = 'chunks'
+        return os.path.join(self.out_path, chunks_folder, f'chunk_{chunk:05d}')
+
+    def collect_chunk_folders(self):
+        """
+        Moves the artifacts of the chunks processed in worker processes to `out_path`, named the way chunks processed
+        one at a time name them, and removes the chunks' folders
+        """
+        collect_chunk_artifacts(os.path.dirname(self.chunk_out_path(0)), self.out_path)
+
+    def dataset_paths(self):
+        """
+        Returns the folders of the parquet datasets the ZRP proxies and BISG proxies are written to when
+        `output_dataset` is requested.
+        """
+        if self.runname is not None:
+            proxy_dataset = f'proxy_output_{self.runname}'
+            bisg_proxy_dataset = f'bisg_proxy_output_{self.runname}'
+        else:
+            proxy_dataset = 'proxy_output'
+            bisg_proxy_dataset = 'bisg_proxy_output'
+        return (os.path.join(self.out_path, proxy_dataset), os.path.join(self.out_path, bisg_proxy_dataset))
+
     def check_for_old_files(self):
         """
         Checks if there are no files created in previous runs.
@@ -124,13 +243,100 @@ class ZRP(BaseZRP):
         file = os.path.join(self.out_path,file_like_bisg_proxy)
         if os.path.exists(file):
             old_files.append(file)
+
+        file = os.path.dirname(self.chunk_out_path(0))
+        if os.path.exists(file):
+            old_files.append(file)
+
+        for file in self.dataset_paths():
+            if os.path.exists(file):
+                old_files.append(file)
+
+        file = self.checkpoint_path()
+        if os.path.exists(file):
+            old_files.append(file)
         
         if len(old_files) > 0:
             raise Exception(f"New value of 'runname' parameter needs to be specified or the following files need to be moved or deleted: {old_files}")
-        
-                  
+
+    def save_chunk(self, chunk, predict_out_chunk, bisg_proxies_chunk, prepared_data_chunk):
+        """
+        Appends the proxies of one chunk to the output parquet datasets as soon as the chunk is processed.
+
+        Parameters
+        -----------
+        chunk: int
+            Chunk number, used to name the chunk's part files
+        predict_out_chunk: pd.Dataframe
+            ZRP proxies of the chunk
+        bisg_proxies_chunk: pd.Dataframe
+            BISG proxies of the chunk, None if BISG is not requested
+        prepared_data_chunk: pd.Dataframe
+            Prepared data of the chunk, used to look up the state of each record
+        """
+        part_name = f'part-{chunk:05d}'
+        states = prepared_data_chunk[self.state]
+        states = states[~states.index.duplicated(keep='first')]
+        proxy_writer, bisg_writer = self.dataset_writers
+        for writer, proxies in [(proxy_writer, predict_out_chunk), (bisg_writer, bisg_proxies_chunk)]:
+            if proxies is None:
+                continue
+            proxies = conform_source_cols(proxies) if writer is proxy_writer else proxies
+            if writer.partition_by == self.state:
+                proxies = proxies.join(states)
+            writer.write(proxies, part_name)
+
+    def save_profile(self):
+        """
+        Saves the time, rows, and memory recorded for each stage of the run next to the other artifacts.
+        """
+        if self.runname is not None:
+            file_name = f'zrp_profile_{self.runname}.json'
+        else:
+            file_name = 'zrp_profile.json'
+        profiler.save(self.out_path, file_name)
+
+    def transform_chunk(self, data_chunk, chunk=None, key_map=None):
+        """
+        Prepares one chunk of renamed input data and generates its ZRP predictions, and BISG predictions if specified.
+        Returns a tuple of the ZRP proxies and the BISG proxies (None if BISG is not requested).
+
+        Parameters
+        -----------
+        data_chunk: pd.Dataframe
+            Chunk of input data with ZRP's default column names
+        chunk: int, optional
+            Chunk number. Required to append the chunk's proxies to the output parquet datasets.
+        key_map: pd.Series, optional
+            Key of the distinct record of each input key deduplicated to a record of this chunk. Proxies are fanned out
+            to every input key if provided.
+        """
+        z_prepare = ZRP_Prepare(file_path=self.file_path, session=self.session, **self.params_dict)
+        z_prepare.fit(data_chunk)
+        prepared_data_chunk = z_prepare.transform(data_chunk)
+
+        z_predict = ZRP_Predict(file_path=self.file_path, pipe_path=self.pipe_path, session=self.session, **self.params_dict)
+        z_predict.fit(prepared_data_chunk)
+        predict_out_chunk = z_predict.transform(prepared_data_chunk, save_table = False)
+
+        bisg_proxies_chunk = None
+        if self.bisg:
+            bisgw = BISGWrapper(session=self.session, **self.params_dict)
+            prepared_data_chunk = prepared_data_chunk.astype(str)
+            bisg_proxies_chunk = bisgw.transform(prepared_data_chunk[~prepared_data_chunk.index.duplicated(keep='first')])
+
+        if key_map is not None:
+            predict_out_chunk = fan_out(predict_out_chunk, key_map)
+            bisg_proxies_chunk = fan_out(bisg_proxies_chunk, key_map)
+        if (self.dataset_writers is not None) and (chunk is not None):
+            if key_map is not None:
+                prepared_data_chunk = fan_out(prepared_data_chunk[[self.state]], key_map)
+            self.save_chunk(chunk, predict_out_chunk, bisg_proxies_chunk, prepared_data_chunk)
+        if (self.run_manifest is not None) and (chunk is not None):
+            self.run_manifest.save_chunk(chunk, {"proxies": predict_out_chunk, "bisg_proxies": bisg_proxies_chunk})
+        return (predict_out_chunk, bisg_proxies_chunk)
     
-    def transform(self, input_data, chunk_size = 25000):
+    def transform(self, input_data, chunk_size = 25000, workers = None, output_dataset = False, partition_by = None, checkpoint = False, dedupe = False, memory_budget = None):
         """
         Processes input data and generates ZRP predictions. Generates BISG predictions additionally if specified.
 
@@ -140,7 +346,26 @@ class ZRP(BaseZRP):
             Dataframe to be transformed
         chunk_size: int
             Numer of rows to be processed in each iteration. input_data processed all at once if None is provided.
+        workers: int, optional
+            Number of worker processes chunks are sent to. Chunks are processed one at a time in the current process if None or 1.
+            Each worker loads the support files once and writes its artifacts to a separate folder per chunk, the artifacts are moved to `out_path` once all chunks are processed.
+        output_dataset: bool, default False
+            Whether to append the proxies of each chunk to parquet datasets as soon as the chunk is processed,
+            instead of saving all proxies to feather files at the end of the run.
+        partition_by: str, optional
+            Column to partition the parquet datasets by, 'state' or 'source'. Only used with `output_dataset`.
+        checkpoint: bool, default False
+            Whether to save the proxies of each chunk to a run manifest as soon as the chunk is processed. Rerunning
+            with the same `runname` and input data resumes the run and skips the completed chunks.
+        dedupe: bool, default False
+            Whether to process repeated records once. Records with the same normalized name & address fields are
+            processed once and their proxies are fanned back out to every key. Requires the key column.
+        memory_budget: float, optional
+            Peak RSS in Mb to keep the run under, summed over the run's process and its workers. A small sample of the
+            input is probed first and `chunk_size`, and `workers` if not provided, are picked to fit the budget.
+            A resumed run keeps the chunk size of the run it resumes.
         """
+        profiler.reset()
         # Load Data
         try:
             data = input_data.copy()
@@ -149,57 +374,326 @@ class ZRP(BaseZRP):
 
         data = self.rename_data_columns(data)
         self.reset_column_names()
+        if dedupe:
+            if self.key not in data.columns:
+                raise KeyError(f"Input data needs a '{self.key}' column to fan proxies of deduplicated records back out to")
+            with profiler.stage("dedupe", len(data)) as stage:
+                data, key_map = dedupe_records(data, self.key, self.dedupe_columns(data))
+                profiler.set_output(stage, data)
+                stage["dedupe_ratio"] = stage["rows_in"] / max(len(data), 1)
+            print(f"Deduplicated {stage['rows_in']} rows to {len(data)} distinct records, dedup ratio {stage['dedupe_ratio']:.2f}")
+        data = data.sort_values('state')
+        if memory_budget is not None:
+            resumed_manifest = RunManifest(self.checkpoint_path(), len(data), chunk_size)
+            if checkpoint and resumed_manifest.exists():
+                chunk_size = resumed_manifest.recorded_config()["chunk_size"]
+            else:
+                chunk_size, workers = self.tune_chunks(data, memory_budget, workers)
+        if chunk_size is None:
+            chunk_size = len(data)
+        chunk_key_maps = dict()
+        if dedupe:
+            chunk_key_maps = self.chunk_key_maps(data, key_map, chunk_size)
         
         make_directory(self.out_path)
-        self.check_for_old_files()
+        if checkpoint:
+            self.run_manifest = RunManifest(self.checkpoint_path(), len(data), chunk_size, data_fingerprint(data))
+        if not (checkpoint and self.run_manifest.exists()):
+            self.check_for_old_files()
+        if checkpoint:
+            self.run_manifest.start()
         curpath = dirname(__file__)
         if self.pipe_path is None:
             self.pipe_path = join(curpath, "modeling/models")
+        if workers is not None and workers > 1:
+            parallel = True
+        else:
+            parallel = False
+            if self.session is None:
+                self.session = ZRP_Session(pipe_path=self.pipe_path, year=self.year, span=self.span, data_path=self.data_path)
+            self.session.load()
+        if output_dataset:
+            proxy_dataset, bisg_proxy_dataset = self.dataset_paths()
+            self.dataset_writers = (ParquetDatasetWriter(proxy_dataset, partition_by), ParquetDatasetWriter(bisg_proxy_dataset, partition_by))
 
-        data = data.sort_values('state')
-        if chunk_size is None:
-            chunk_size = len(data)
         chunk_max = int((len(data)-1)/chunk_size) + 1
         predict_out_list = list()
         full_bisg_proxies_list = list()
+        chunk_outputs = dict()
+        if checkpoint:
+            for chunk in self.run_manifest.completed_chunks():
+                outputs = self.run_manifest.load_chunk(chunk)
+                chunk_outputs[chunk] = (outputs["proxies"], outputs["bisg_proxies"])
+        pending_chunks = [chunk for chunk in range(chunk_max) if chunk not in chunk_outputs]
+        if parallel:
+            print(f"Processing {len(pending_chunks)} chunks with {workers} workers")
+            pending_outputs = Parallel(n_jobs=workers, verbose=1)(delayed(_transform_chunk)(self, data[chunk*chunk_size:(chunk+1)*chunk_size], chunk, chunk_key_maps.get(chunk))
+                                                                  for chunk in pending_chunks)
+            for chunk, (outputs, stages) in zip(pending_chunks, pending_outputs):
+                chunk_outputs[chunk] = outputs
+                profiler.merge(stages, chunk=chunk)
+            self.collect_chunk_folders()
+        else:
+            for chunk in pending_chunks:
+                print("####################################")
+                print(f'Processing rows: {chunk*chunk_size}:{(chunk+1)*chunk_size}')
+                print("####################################")
+                data_chunk = data[chunk*chunk_size:(chunk+1)*chunk_size]
+                chunk_outputs[chunk] = self.transform_chunk(data_chunk, chunk, chunk_key_maps.get(chunk))
+        self.run_manifest = None
+
         for chunk in range(chunk_max):
-            print("####################################")
-            print(f'Processing rows: {chunk*chunk_size}:{(chunk+1)*chunk_size}')
-            print("####################################")
-            data_chunk = data[chunk*chunk_size:(chunk+1)*chunk_size]
-            z_prepare = ZRP_Prepare(file_path=self.file_path, **self.params_dict)
-            z_prepare.fit(data_chunk)
-            prepared_data_chunk = z_prepare.transform(data_chunk)
-
-            z_predict = ZRP_Predict(file_path=self.file_path, pipe_path=self.pipe_path, **self.params_dict)
-            z_predict.fit(prepared_data_chunk)
-            predict_out_chunk = z_predict.transform(prepared_data_chunk, save_table = False)
+            predict_out_chunk, bisg_proxies_chunk = chunk_outputs[chunk]
             predict_out_list.append(predict_out_chunk)
-            
             if self.bisg:
-                bisgw = BISGWrapper(**self.params_dict)
-                prepared_data_chunk = prepared_data_chunk.astype(str)
-                bisg_proxies_chunk = bisgw.transform(prepared_data_chunk[~prepared_data_chunk.index.duplicated(keep='first')])
                 full_bisg_proxies_list.append(bisg_proxies_chunk)
            
         predict_out = pd.concat(predict_out_list)
         
-        if self.runname is not None:
-            file_name = f'proxy_output_{self.runname}.feather'
+        if output_dataset:
+            for writer in self.dataset_writers:
+                writer.close()
+            self.dataset_writers = None
+            print("...Output saved")
         else:
-            file_name = 'proxy_output.feather'
-        save_feather(predict_out, self.out_path, file_name)    
-        if self.bisg:
-            full_bisg_proxies = pd.concat(full_bisg_proxies_list)
             if self.runname is not None:
-                file_name = f'bisg_proxy_output_{self.runname}.feather'
+                file_name = f'proxy_output_{self.runname}.feather'
             else:
-                file_name = 'bisg_proxy_output.feather'
-            save_feather(full_bisg_proxies, self.out_path, file_name) 
+                file_name = 'proxy_output.feather'
+            save_feather(predict_out, self.out_path, file_name)    
+            if self.bisg:
+                full_bisg_proxies = pd.concat(full_bisg_proxies_list)
+                if self.runname is not None:
+                    file_name = f'bisg_proxy_output_{self.runname}.feather'
+                else:
+                    file_name = 'bisg_proxy_output.feather'
+                save_feather(full_bisg_proxies, self.out_path, file_name) 
 
         try:
             predict_out = input_data.merge(predict_out.reset_index(drop=False), on=self.key)
         except KeyError:
             pass
 
-        return (predict_out)
\ No newline at end of file
+        self.save_profile()
+        return (predict_out)
+
+    def __transform_batches(self, batches, chunk_size, workers):
+        """
+        Processes batches of input data one at a time. Yields a tuple of the ZRP proxies and the BISG proxies
+        (None if BISG is not requested) of each batch.
+
+        Parameters
+        -----------
+        batches: iterable of pd.Dataframe
+            Batches of input data
+        chunk_size: int
+            Numer of rows to be processed in each iteration
+        workers: int, optional
+            Number of worker processes chunks are sent to
+        """
+        renamed_columns = self.data_column_mapping()
+        self.reset_column_names()
+
+        make_directory(self.out_path)
+        self.check_for_old_files()
+        curpath = dirname(__file__)
+        if self.pipe_path is None:
+            self.pipe_path = join(curpath, "modeling/models")
+        if workers is not None and workers > 1:
+            parallel = True
+        else:
+            parallel = False
+            workers = 1
+            if self.session is None:
+                self.session = ZRP_Session(pipe_path=self.pipe_path, year=self.year, span=self.span, data_path=self.data_path)
+            self.session.load()
+
+        profiler.reset()
+        chunk = 0
+        n_rows = 0
+        with Parallel(n_jobs=workers, verbose=1 if parallel else 0) as parallel_pool:
+            for batch in batches:
+                if len(batch) == 0:
+                    continue
+                print("####################################")
+                print(f'Processing rows: {n_rows}:{n_rows + len(batch)}')
+                print("####################################")
+                n_rows += len(batch)
+                data = batch.rename(columns=renamed_columns)
+                data = data.sort_values('state')
+                if chunk_size is None:
+                    batch_chunks = [data]
+                else:
+                    batch_chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+                if parallel:
+                    chunk_outputs = []
+                    worker_outputs = parallel_pool(delayed(_transform_chunk)(self, data_chunk, chunk + n)
+                                                   for n, data_chunk in enumerate(batch_chunks))
+                    for n, (outputs, stages) in enumerate(worker_outputs):
+                        chunk_outputs.append(outputs)
+                        profiler.merge(stages, chunk=chunk + n)
+                    self.collect_chunk_folders()
+                else:
+                    chunk_outputs = [self.transform_chunk(data_chunk) for data_chunk in batch_chunks]
+                chunk += len(batch_chunks)
+
+                predict_out = pd.concat([predict_out_chunk for predict_out_chunk, _ in chunk_outputs])
+                # Every batch gets every source column so all batches share one schema
+                predict_out = conform_source_cols(predict_out)
+                if self.bisg:
+                    bisg_proxies = pd.concat([bisg_proxies_chunk for _, bisg_proxies_chunk in chunk_outputs])
+                else:
+                    bisg_proxies = None
+
+                try:
+                    predict_out = batch.merge(predict_out.reset_index(drop=False), on=self.key)
+                except KeyError:
+                    pass
+                yield (predict_out, bisg_proxies)
+        self.save_profile()
+
+    def transform_iter(self, batches, chunk_size = 25000, workers = None):
+        """
+        Processes batches of input data one at a time and yields the ZRP predictions of each batch as soon as it is
+        processed. Only one batch and its predictions are held in memory at a time.
+
+        Parameters
+        -----------
+        batches: iterable of pd.Dataframe
+            Batches of input data, for example from `read_batches`
+        chunk_size: int
+            Numer of rows to be processed in each iteration. Each batch processed all at once if None is provided.
+        workers: int, optional
+            Number of worker processes chunks are sent to. Chunks are processed one at a time in the current process if None or 1.
+        """
+        for predict_out, _ in self.__transform_batches(batches, chunk_size, workers):
+            yield predict_out
+
+    def transform_file(self, input_path, output_path, batch_size = 100000, chunk_size = 25000, workers = None, bisg_output_path = None, partition_by = None):
+        """
+        Reads a csv, parquet, or feather file in batches, generates ZRP predictions for each batch, and appends them to
+        a csv, parquet, or feather output file as it goes. Peak memory depends on `batch_size` rather than on the size
+        of the file.
+
+        Parameters
+        -----------
+        input_path: str
+            File path of csv, parquet, or feather input file
+        output_path: str
+            File path of csv, parquet, or feather file to write ZRP predictions to. Predictions are written as a parquet
+            dataset folder, one part per batch, if the path has none of those extensions or `partition_by` is provided.
+        batch_size: int
+            Number of input rows read at a time
+        chunk_size: int
+            Numer of rows to be processed in each iteration. Each batch processed all at once if None is provided.
+        workers: int, optional
+            Number of worker processes chunks are sent to. Chunks are processed one at a time in the current process if None or 1.
+        bisg_output_path: str, optional
+            File path of csv, parquet, or feather file to write BISG predictions to. BISG predictions are not saved if not provided.
+        partition_by: str, optional
+            Output column to partition the parquet dataset by. 'source' partitions predictions by their source_* column.
+        """
+        batches = read_batches(input_path, batch_size)
+        bisg_writer = None
+        if self.bisg and bisg_output_path is not None:
+            # BISG proxies carry no input columns, only their source can partition them
+            bisg_writer = output_writer(bisg_output_path, partition_by if partition_by == "source" else None)
+        try:
+            with output_writer(output_path, partition_by) as writer:
+                for predict_out, bisg_proxies in self.__transform_batches(batches, chunk_size, workers):
+                    writer.write(predict_out)
+                    if bisg_writer is not None:
+                        bisg_writer.write(bisg_proxies)
+        finally:
+            if bisg_writer is not None:
+                bisg_writer.close()
+        print(f"...{writer.n_rows} predictions saved to {output_path}")
+        return (output_path)
+
+    def score_records(self, data, bisg=False):
+        """
+        Prepares and predicts records with the session's preloaded support files, pipelines, and models, for online
+        scoring. Nothing is printed and nothing is written to disk: no input validators, geocoded tables, or proxy
+        files. Returns a tuple of the ZRP proxies and the BISG proxies (None if `bisg` is False), indexed by key in
+        the order of the records.
+
+        Parameters
+        -----------
+        data: pd.Dataframe
+            Records with ZRP's default column names, including a unique key column
+        bisg: bool, default False
+            Whether to return BISG proxies
+        """
+        keys = data[self.key].values
+        with quiet_output():
+            z_prepare = ZRP_Prepare(file_path=self.file_path, session=self.session, **self.params_dict)
+            z_prepare.fit(data)
+            prepared_data = z_prepare.transform(data, save_artifacts=False)
+            z_predict = ZRP_Predict(file_path=self.file_path, pipe_path=self.pipe_path, session=self.session, **self.params_dict)
+            proxies = z_predict.predict_records(prepared_data)
+
+            bisg_proxies = None
+            if bisg:
+                bisgw = BISGWrapper(session=self.session, **self.params_dict)
+                prepared_data = prepared_data.astype(str)
+                bisg_proxies = bisgw.transform(prepared_data[~prepared_data.index.duplicated(keep='first')]).reindex(keys)
+        return (proxies.reindex(keys), bisg_proxies)
+
+    def predict_records(self, records):
+        """
+        Generates ZRP predictions for a few records with low latency, for online scoring. Records are prepared with the
+        session's preloaded support files and predicted with `ZRP_Predict.predict_records`, which runs each model once.
+        Nothing is printed and nothing is written to disk. Returns proxies indexed by key, in the order of the records.
+
+        Parameters
+        -----------
+        records: list or pd.Dataframe
+            List of dicts with one dict per record, or a dataframe of records, including the key column
+        """
+        if self.pipe_path is None:
+            self.pipe_path = join(dirname(__file__), "modeling/models")
+        if self.session is None:
+            self.session = ZRP_Session(pipe_path=self.pipe_path, year=self.year, span=self.span, data_path=self.data_path)
+        self.session.load()
+        data = pd.DataFrame(records)
+        data = data.astype(str).where(data.notna(), None)
+        if self.key not in data.columns:
+            raise KeyError(f"Records need a '{self.key}' column to index their proxies by")
+        data = self.rename_data_columns(data)
+        self.reset_column_names()
+        proxies, _ = self.score_records(data)
+        return (proxies)
+
+    def __getstate__(self):
+        # Sessions hold the loaded support files, which worker processes load for themselves
+        state = self.__dict__.copy()
+        state['session'] = None
+        return state
+
+
+def _transform_chunk(zrp, data_chunk, chunk, key_map=None):
+    """
+    Processes one chunk of input data in a worker process. The worker's shared session is used and the
+    chunk's artifacts are written to a folder of its own, which the calling process moves to `out_path` once it
+    has the chunk's outputs. Returns the outputs of `ZRP.transform_chunk` and the stages the worker's profiler
+    recorded for the chunk, which the calling process merges into its profile.
+
+    Parameters
+    -----------
+    zrp: ZRP
+        ZRP object the chunk belongs to
+    data_chunk: pd.Dataframe
+        Chunk of input data with ZRP's default column names
+    chunk: int
+        Chunk number
+    key_map: pd.Series, optional
+        Key of the distinct record of each input key deduplicated to a record of this chunk
+    """
+    print(f'Processing chunk {chunk}')
+    chunk_out_path = zrp.chunk_out_path(chunk)
+    zrp.session = shared_session(pipe_path=zrp.pipe_path, year=zrp.year, span=zrp.span, data_path=zrp.data_path)
+    zrp.out_path = chunk_out_path
+    zrp.params_dict = dict(zrp.params_dict, out_path=chunk_out_path)
+    profiler.reset()
+    chunk_outputs = zrp.transform_chunk(data_chunk, chunk, key_map)
+    return (chunk_outputs, profiler.stages)